@@ -1,32 +1,150 @@
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi import HTTPException, Depends
-from app.backend.db.models import UserModel
+from app.backend.db.models import RevokedTokenModel, UserModel
+import hashlib
 import os
+import time
+from datetime import datetime
 from jose import jwt, JWTError
-from app.backend.db.database import get_db
+from app.backend.db.database import get_async_db, get_db
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import bcrypt
+from app.backend.classes.password_hash_class import PasswordHashClass
+from app.backend.classes.ttl_cache_class import TtlCacheClass
 
 oauth2_scheme = OAuth2PasswordBearer("/login_users/token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifica una contraseña plana contra un hash bcrypt"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return PasswordHashClass.verify(plain_password, hashed_password)
 
 def hash_password(password: str) -> str:
     """Genera un hash bcrypt de una contraseña"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return PasswordHashClass.hash(password)
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+# Principal (usuario del token) por email, para no consultar users en cada request.
+# Se invalida desde UserClass (update/delete/refresh_password); el TTL acota lo que
+# puede quedar desactualizado en otros procesos/workers.
+principal_cache = TtlCacheClass(
+    maxsize=int(os.environ.get("PRINCIPAL_CACHE_SIZE") or 1024),
+    ttl=int(os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS") or 60),
+)
+
+PRINCIPAL_FIELDS = ("id", "rol_id", "full_name", "email", "added_date", "updated_date")
+
+def invalidate_principal(*emails):
+    for email in emails:
+        if email:
+            principal_cache.delete(email)
+
+# Clave y algoritmo de firma: se leen una vez (main.py los define al arrancar).
+_jwt_settings = None
+
+def load_jwt_settings():
+    global _jwt_settings
+    if _jwt_settings is None:
+        _jwt_settings = (os.environ['SECRET_KEY'], os.environ['ALGORITHM'])
+    return _jwt_settings
+
+# Tokens ya verificados (hash sha256 del token -> claims). Cada entrada vence
+# a lo más en el exp del token, así que un token vencido nunca sale de la caché.
+token_cache = TtlCacheClass(
+    maxsize=int(os.environ.get("JWT_CACHE_SIZE") or 4096),
+    ttl=int(os.environ.get("JWT_CACHE_TTL_SECONDS") or 300),
+)
+
+# Tokens revocados (logout): la fuente es la tabla revoked_tokens, compartida por
+# todos los workers. Esta caché por proceso (hash -> revocado o no) evita
+# consultarla en cada request; un logout hecho en otro worker se nota aquí a lo
+# más en REVOKED_TOKEN_CACHE_TTL_SECONDS.
+revoked_tokens = TtlCacheClass(
+    maxsize=int(os.environ.get("REVOKED_TOKEN_CACHE_SIZE") or 4096),
+    ttl=int(os.environ.get("REVOKED_TOKEN_CACHE_TTL_SECONDS") or 30),
+)
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def revoke_token(token: str, db: Session):
+    """
+    Revoca un token antes de su exp, para todos los workers (tabla
+    revoked_tokens). Las filas de tokens ya vencidos se borran aquí mismo.
+    """
+    key = _token_key(token)
+    expires_at = None
     try:
-        decoded_token = jwt.decode(token, os.environ['SECRET_KEY'], algorithms=[os.environ['ALGORITHM']])
-        email = decoded_token.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+        exp = jwt.get_unverified_claims(token).get("exp")
+        if exp is not None:
+            expires_at = datetime.utcfromtimestamp(exp)
     except JWTError:
+        pass
+
+    now = datetime.utcnow()
+    try:
+        db.query(RevokedTokenModel).filter(RevokedTokenModel.expires_at < now).delete(synchronize_session=False)
+        if db.get(RevokedTokenModel, key) is None:
+            db.add(RevokedTokenModel(token_hash=key, expires_at=expires_at, added_date=now))
+        db.commit()
+    except IntegrityError:
+        # El mismo token revocado dos veces a la vez: ya quedó registrado.
+        db.rollback()
+    except Exception:
+        db.rollback()
+        raise
+
+    revoked_tokens.set(key, True)
+    token_cache.delete(key)
+
+def is_revoked(token: str, db: Session) -> bool:
+    """
+    True si el token se revocó en cualquier worker. Consulta revoked_tokens
+    solo cuando no está en la caché local (o venció).
+    """
+    key = _token_key(token)
+    revoked = revoked_tokens.get(key)
+    if revoked is None:
+        revoked = db.query(RevokedTokenModel.token_hash).filter(RevokedTokenModel.token_hash == key).first() is not None
+        revoked_tokens.set(key, revoked)
+    return revoked
+
+async def is_revoked_async(token: str, db: AsyncSession) -> bool:
+    revoked = revoked_tokens.get(_token_key(token))
+    if revoked is None:
+        revoked = await db.run_sync(lambda session: is_revoked(token, session))
+    return revoked
+
+def decode_token(token: str) -> dict:
+    """
+    Claims de un token con firma válida, verificándola solo la primera vez.
+    No revisa si se revocó: eso lo hace is_revoked / is_revoked_async.
+    """
+    credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    key = _token_key(token)
+    claims = token_cache.get(key)
+    if claims is None:
+        secret, algorithm = load_jwt_settings()
+        try:
+            claims = jwt.decode(token, secret, algorithms=[algorithm])
+        except JWTError:
+            raise credentials_exception
+
+        ttl = token_cache.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        if ttl > 0:
+            token_cache.set(key, claims, ttl=ttl)
+
+    return claims
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    email = decode_token(token).get("sub")
+    if email is None or is_revoked(token, db):
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-    user = get_user(email)
+    user = get_user(email, db)
 
     if user is None or user == "":
         raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
@@ -35,23 +153,47 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
 def get_current_active_user(current_user: UserModel = Depends(get_current_user)):
     return current_user
 
-def get_user(email):
-    db: Session = next(get_db())
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """
+    get_current_user para las rutas async: misma validación, y si el principal
+    no está en caché se consulta con la sesión async (sin pasar por el threadpool).
+    """
+    email = decode_token(token).get("sub")
+    if email is None or await is_revoked_async(token, db):
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-    user = db.query(UserModel). \
-                    filter(UserModel.email == email). \
-                    first()
-    
-    if not user:
-        return None
+    fields = principal_cache.get(email)
+    if fields is not None:
+        return UserModel(**fields)
+
+    user = await db.run_sync(lambda session: get_user(email, session))
+    if user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
     return user
 
-def generate_bcrypt_hash(input_string):
-    encoded_string = input_string.encode('utf-8')
+async def get_current_active_user_async(current_user: UserModel = Depends(get_current_user_async)):
+    return current_user
 
-    salt = bcrypt.gensalt()
+def get_user(email, db: Session):
+    """
+    Usuario por email, usando la sesión del request (Depends(get_db) se comparte
+    dentro del mismo request). Devuelve un UserModel suelto (no ligado a la sesión)
+    armado desde la caché, así ningún request modifica el de otro.
+    """
+    fields = principal_cache.get(email)
+    if fields is None:
+        user = db.query(UserModel). \
+                        filter(UserModel.email == email). \
+                        first()
 
-    hashed_string = bcrypt.hashpw(encoded_string, salt)
+        if not user:
+            return None
 
+        fields = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+        principal_cache.set(email, fields)
+
+    return UserModel(**fields)
+
+def generate_bcrypt_hash(input_string):
     # Guardar como string para compatibilidad con columnas TEXT/VARCHAR
-    return hashed_string.decode('utf-8')
\ No newline at end of file
+    return PasswordHashClass.hash(input_string)
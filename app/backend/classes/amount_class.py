@@ -0,0 +1,197 @@
+import re
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+import numpy as np
+
+
+class AmountClass:
+    """
+    Parseo/formateo de montos guardados como string (amount es VARCHAR en DB).
+    """
+
+    @staticmethod
+    def parse(value) -> Decimal | None:
+        """
+        Convierte montos guardados como string a número.
+
+        Soporta:
+        - "1234"
+        - "1,234.56"  (en-US)
+        - "1.234,56"  (es-CL)
+        - "$ 1.234" / "USD 1,234"
+        """
+        if value is None:
+            return None
+        s = str(value).strip()
+        if not s:
+            return None
+
+        # Dejar solo dígitos y separadores comunes
+        cleaned = re.sub(r"[^0-9\.,\-]", "", s)
+        if not cleaned or cleaned == "-" or cleaned == "," or cleaned == ".":
+            return None
+
+        # Si tiene ambos separadores, asumir miles/decimales según orden
+        if "," in cleaned and "." in cleaned:
+            if cleaned.rfind(",") > cleaned.rfind("."):
+                # "1.234,56" -> miles '.' y decimal ','
+                cleaned = cleaned.replace(".", "").replace(",", ".")
+            else:
+                # "1,234.56" -> miles ',' y decimal '.'
+                cleaned = cleaned.replace(",", "")
+        elif "," in cleaned:
+            # "1234,56" -> decimal ','
+            cleaned = cleaned.replace(",", ".")
+
+        try:
+            return Decimal(cleaned)
+        except (InvalidOperation, Exception):
+            return None
+
+    # Montos por bloque en parse_many()/sum(): acota la matriz de caracteres.
+    BATCH_SIZE = 65536
+
+    @staticmethod
+    def _batches(values):
+        values = iter(values)
+        while True:
+            batch = list(islice(values, AmountClass.BATCH_SIZE))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def _scan(strings):
+        """
+        Misma regla que parse(), sobre una matriz de code points con una columna
+        por monto (caracteres x montos), recorrida de a un carácter a la vez.
+        El último separador que aparece es el decimal; el otro es de miles
+        y se descarta.
+        """
+        n = len(strings)
+        # dtype=str aplica str() a lo que no es string (None queda "None": sin dígitos).
+        codes = np.array(strings, dtype=str)
+        codes = np.ascontiguousarray(codes.view(np.uint32).reshape(n, -1).T)
+
+        is_digit = (codes - ord("0")) < 10
+        is_dot = codes == ord(".")
+        is_comma = codes == ord(",")
+        is_minus = codes == ord("-")
+
+        comma_decimal = np.zeros(n, dtype=bool)
+        for dot, comma in zip(is_dot, is_comma):
+            comma_decimal = (comma_decimal | comma) & ~dot
+        is_decimal = np.where(comma_decimal, is_comma, is_dot)
+
+        # Dígitos vistos hasta cada carácter (inclusive) y signo antes del primer dígito.
+        seen = np.empty(codes.shape, dtype=np.int32)
+        running = np.zeros(n, dtype=np.int32)
+        n_decimal = np.zeros(n, dtype=np.int32)
+        n_minus = np.zeros(n, dtype=np.int32)
+        minus_ok = np.ones(n, dtype=bool)
+        int_digits = np.zeros(n, dtype=np.int32)
+        for i in range(codes.shape[0]):
+            minus_ok &= ~is_minus[i] | ((running == 0) & (n_decimal == 0))
+            n_minus += is_minus[i]
+            np.copyto(int_digits, running, where=is_decimal[i])
+            n_decimal += is_decimal[i]
+            running += is_digit[i]
+            seen[i] = running
+        int_digits = np.where(n_decimal == 0, running, int_digits)
+
+        # Lo que Decimal() acepta: "-" opcional al inicio, al menos un dígito
+        # y a lo más un separador decimal.
+        valid = (running > 0) & (n_decimal <= 1) & (n_minus <= 1) & minus_ok
+
+        return {
+            "codes": codes,
+            "is_digit": is_digit,
+            "is_decimal": is_decimal,
+            "keep": is_digit | is_decimal | is_minus,
+            "valid": valid,
+            "negative": n_minus == 1,
+            "frac_digits": running - int_digits,
+            # Potencia de 10 de cada dígito: 0 para las unidades, -1 para las décimas...
+            "exponent": int_digits - seen,
+        }
+
+    @staticmethod
+    def parse_many(values) -> list:
+        """
+        parse() en bloque con NumPy. Mismo resultado, elemento a elemento
+        (incluida la escala de cada Decimal).
+        """
+        result = []
+        for strings in AmountClass._batches(values):
+            scan = AmountClass._scan(strings)
+            codes, keep = scan["codes"], scan["keep"]
+            n = codes.shape[1]
+
+            # Compactar cada monto a "-123.45": quitar lo descartado y dejar '.' como decimal.
+            cleaned = np.zeros((n, codes.shape[0]), dtype=np.uint32)
+            chars = np.where(scan["is_decimal"], np.uint32(ord(".")), codes)
+            rows = np.arange(n)
+            length = np.zeros(n, dtype=np.intp)
+            for i in range(codes.shape[0]):
+                k = keep[i]
+                cleaned[rows[k], length[k]] = chars[i][k]
+                length += k
+            cleaned = cleaned.view(f"<U{codes.shape[0]}").ravel()
+
+            result.extend(
+                Decimal(s) if ok else None
+                for s, ok in zip(cleaned.tolist(), scan["valid"].tolist())
+            )
+        return result
+
+    @staticmethod
+    def sum(values) -> Decimal:
+        """
+        Total exacto de una columna de montos (ignora los que parse() no entiende).
+        Acumula dígito por dígito según su potencia de 10, sin crear objetos Decimal.
+        """
+        by_exponent = {}
+        min_exponent = 0
+
+        for strings in AmountClass._batches(values):
+            scan = AmountClass._scan(strings)
+            valid = scan["valid"]
+            if not valid.any():
+                continue
+            min_exponent = min(min_exponent, -int(scan["frac_digits"][valid].max()))
+
+            sign = np.where(scan["negative"], -1, 1) * valid
+            digits = np.where(scan["is_digit"], scan["codes"] - ord("0"), 0) * sign
+            exponent = scan["exponent"]
+            offset = int(exponent.min())
+
+            # Cada casillero suma a lo más 9 * BATCH_SIZE: exacto en float64.
+            column_sums = np.bincount((exponent - offset).ravel(), weights=digits.ravel())
+            for i, value in enumerate(column_sums.tolist()):
+                if value:
+                    by_exponent[i + offset] = by_exponent.get(i + offset, 0) + int(value)
+
+        scale = -min_exponent
+        total = sum(value * 10 ** (exponent + scale) for exponent, value in by_exponent.items())
+        # Decimal(str) es exacto; scaleb() redondearía a la precisión del contexto.
+        return Decimal(f"{total}E-{scale}")
+
+    @staticmethod
+    def normalize(amount: Decimal) -> Decimal:
+        """
+        Quita los ceros de relleno de la escala fija de amount_numeric
+        (DECIMAL(20,6): 1234.500000 -> 1234.5, 1234.000000 -> 1234), sin
+        redondear. Los ceros finales que traía el string original (1234.50) no
+        se distinguen del relleno y también se quitan.
+        """
+        amount = amount.normalize()
+        if amount.as_tuple().exponent > 0:
+            # normalize() deja 1200 como 1.2E+3.
+            amount = amount.quantize(Decimal(1))
+        return amount
+
+    @staticmethod
+    def format_currency(amount: Decimal) -> str:
+        # Sin redondeo: se imprime con todos los decimales que traiga el valor.
+        return f"$ {format(amount, ',f')}"
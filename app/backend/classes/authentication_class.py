@@ -1,20 +1,25 @@
 from app.backend.db.models import UserModel
 from fastapi import HTTPException
-from app.backend.classes.user_class import UserClass
+from app.backend.classes.user_class import LoginUser, UserClass
 from app.backend.classes.customer_class import CustomerClass
+from app.backend.classes.password_hash_class import PasswordHashClass
+from app.backend.auth.auth_user import load_jwt_settings
 from datetime import datetime, timedelta
 from typing import Union
-import os
 from jose import jwt
-import json
-import bcrypt
 import hashlib
 
 class AuthenticationClass:
     def __init__(self, db):
         self.db = db
 
-    def authenticate_shopping_login(self, identification_number):
+    def _login_user(self, email) -> LoginUser:
+        result = UserClass(self.db).get_for_login(email)
+        if result.user is None:
+            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+        return result.user
+
+    def authenticate_shopping_login(self, identification_number) -> LoginUser:
         # Login de cliente público: viene por RUT/identification_number,
         # pero el usuario se busca por email (la tabla `users` no tiene `rut`).
         customer = CustomerClass(self.db).get_by_identification_number(identification_number)
@@ -23,47 +28,62 @@ class AuthenticationClass:
         if not getattr(customer, "email", None):
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-        user = UserClass(self.db).get('email', customer.email)
-        
-        # Verificar si user es un string de error
-        if isinstance(user, str) and (user.startswith("Error:") or user.startswith("No se encontraron")):
-            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
-        
-        try:
-            response_data = json.loads(user)
-        except (json.JSONDecodeError, TypeError):
-            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
-
-        print(response_data)
+        return self._login_user(customer.email)
+    
+    def authenticate_user(self, email, password) -> LoginUser:
+        user = self._login_user(email)
 
-        if not response_data or "user_data" not in response_data:
+        if not user.hashed_password or not self.verify_password(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-        return response_data
-    
-    def authenticate_user(self, email, password):
-        user = UserClass(self.db).get('email', email)
-        print(user)
+        if PasswordHashClass.needs_rehash(user.hashed_password):
+            self.rehash_password(user.id, password)
         
-        # Verificar si user es un string de error
-        if isinstance(user, str) and (user.startswith("Error:") or user.startswith("No se encontraron")):
-            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+        return user
         
-        try:
-            response_data = json.loads(user)
-        except (json.JSONDecodeError, TypeError):
-            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+    async def authenticate_user_async(self, email, password) -> LoginUser:
+        """
+        authenticate_user para las rutas async (self.db es una AsyncSession):
+        bcrypt se espera en el event loop, sin ocupar un thread del threadpool.
+        """
+        user = await self.db.run_sync(lambda session: AuthenticationClass(session)._login_user(email))
 
-        if not response_data or "user_data" not in response_data:
+        if not user.hashed_password or not await PasswordHashClass.verify_async(password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
 
-        if not self.verify_password(password, response_data["user_data"]["hashed_password"]):
-            raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
-        
-        return response_data
-        
+        if PasswordHashClass.needs_rehash(user.hashed_password):
+            try:
+                hashed_password = await PasswordHashClass.hash_async(password)
+            except Exception:
+                # Ej. pool de bcrypt lleno (503): se reintenta en el próximo login.
+                return user
+            await self.db.run_sync(lambda session: AuthenticationClass(session).store_password_hash(user.id, hashed_password))
+
+        return user
+
     def verify_password(self, plain_password, hashed_password):
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return PasswordHashClass.verify(plain_password, hashed_password)
+
+    def rehash_password(self, user_id, plain_password):
+        """
+        Re-hashea con el costo configurado (BCRYPT_ROUNDS) una contraseña ya
+        verificada. Si falla, el login sigue: se reintenta en el próximo.
+        """
+        try:
+            hashed_password = PasswordHashClass.hash(plain_password)
+        except Exception:
+            return
+        self.store_password_hash(user_id, hashed_password)
+
+    def store_password_hash(self, user_id, hashed_password):
+        try:
+            self.db.query(UserModel).filter(UserModel.id == user_id).update(
+                {UserModel.hashed_password: hashed_password},
+                synchronize_session=False,
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
     
     def create_token(self, data: dict, time_expire: Union[datetime, None] = None):
         data_copy = data.copy()
@@ -73,7 +93,8 @@ class AuthenticationClass:
             expires = datetime.utcnow() + time_expire
 
         data_copy.update({"exp": expires})
-        token = jwt.encode(data_copy, os.environ['SECRET_KEY'], algorithm=os.environ['ALGORITHM'])
+        secret, algorithm = load_jwt_settings()
+        token = jwt.encode(data_copy, secret, algorithm=algorithm)
 
         return token
 
@@ -96,13 +117,7 @@ class AuthenticationClass:
         return 1
         
     def generate_bcrypt_hash(self, input_string):
-        encoded_string = input_string.encode('utf-8')
-
-        salt = bcrypt.gensalt()
-
-        hashed_string = bcrypt.hashpw(encoded_string, salt)
-
-        return hashed_string
+        return PasswordHashClass.hash(input_string).encode('utf-8')
 
     def validate_budget_token(self, token_md5, budget_id):
         """
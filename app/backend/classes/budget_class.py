@@ -3,10 +3,12 @@ import platform
 from datetime import datetime
 
 from fastapi import HTTPException
-from sqlalchemy import func
 
+from app.backend.classes.amount_class import AmountClass
 from app.backend.classes.file_class import FileClass
 from app.backend.db.models import BudgetModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 
 
 class BudgetClass:
@@ -27,15 +29,33 @@ class BudgetClass:
 
         return f"http://127.0.0.1:8000/api/files/view/{rp}"
 
-    def get_all(self, page=0, items_per_page=10):
+    def _list_row(self, b):
+        return {
+            "id": b.id,
+            "budget_number": b.budget_number,
+            "company": b.company,
+            "amount": getattr(b, "amount", None),
+            "file": b.file,
+            "file_url": self._file_url(b.file),
+            "budget_date": b.budget_date.strftime("%Y-%m-%d") if getattr(b, "budget_date", None) else None,
+            "added_date": b.added_date.strftime("%Y-%m-%d %H:%M:%S") if b.added_date else None,
+            "updated_date": b.updated_date.strftime("%Y-%m-%d %H:%M:%S") if b.updated_date else None,
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             base_query = self.db.query(BudgetModel).order_by(BudgetModel.id.desc())
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(base_query, BudgetModel.id, descending=True).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = self.db.query(func.count(BudgetModel.id)).scalar()
+                total_items, exact = CountCacheClass(self.db).count(base_query, BudgetModel.__tablename__, estimate=not exact_count)
                 total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or (total_pages > 0 and page > total_pages):
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = base_query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -43,20 +63,11 @@ class BudgetClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": b.id,
-                    "budget_number": b.budget_number,
-                    "company": b.company,
-                    "amount": getattr(b, "amount", None),
-                    "file": b.file,
-                    "file_url": self._file_url(b.file),
-                    "budget_date": b.budget_date.strftime("%Y-%m-%d") if getattr(b, "budget_date", None) else None,
-                    "added_date": b.added_date.strftime("%Y-%m-%d %H:%M:%S") if b.added_date else None,
-                    "updated_date": b.updated_date.strftime("%Y-%m-%d %H:%M:%S") if b.updated_date else None,
-                } for b in data]
+                serialized_data = [self._list_row(b) for b in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -64,17 +75,7 @@ class BudgetClass:
                 }
 
             data = base_query.all()
-            return [{
-                "id": b.id,
-                "budget_number": b.budget_number,
-                "company": b.company,
-                "amount": getattr(b, "amount", None),
-                "file": b.file,
-                "file_url": self._file_url(b.file),
-                "budget_date": b.budget_date.strftime("%Y-%m-%d") if getattr(b, "budget_date", None) else None,
-                "added_date": b.added_date.strftime("%Y-%m-%d %H:%M:%S") if b.added_date else None,
-                "updated_date": b.updated_date.strftime("%Y-%m-%d %H:%M:%S") if b.updated_date else None,
-            } for b in data]
+            return [self._list_row(b) for b in data]
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -161,6 +162,7 @@ class BudgetClass:
                 budget_number=str(payload.get("budget_number") or ""),
                 company=str(payload.get("company") or ""),
                 amount=str(payload.get("amount") or ""),
+                amount_numeric=AmountClass.parse(payload.get("amount")),
                 file=payload.get("file"),
                 budget_date=payload.get("budget_date"),
                 added_date=datetime.utcnow(),
@@ -168,6 +170,7 @@ class BudgetClass:
             )
             self.db.add(b)
             self.db.commit()
+            CountCacheClass.invalidate(BudgetModel.__tablename__)
             self.db.refresh(b)
             return {
                 "status": "Presupuesto registrado exitosamente.",
@@ -190,6 +193,7 @@ class BudgetClass:
             b.budget_number = str(payload.get("budget_number") or "")
             b.company = str(payload.get("company") or "")
             b.amount = str(payload.get("amount") or "")
+            b.amount_numeric = AmountClass.parse(b.amount)
             if isinstance(payload, dict) and "file" in payload and payload.get("file") is not None:
                 b.file = payload.get("file")
             if isinstance(payload, dict) and "budget_date" in payload:
@@ -244,6 +248,7 @@ class BudgetClass:
 
             self.db.delete(b)
             self.db.commit()
+            CountCacheClass.invalidate(BudgetModel.__tablename__)
             return "success"
         except Exception as e:
             self.db.rollback()
@@ -1,11 +1,21 @@
 from app.backend.db.models import CategoryModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 from datetime import datetime
 
 class CategoryClass:
     def __init__(self, db):
         self.db = db
 
-    def get_all(self, page=0, items_per_page=10):
+    def _list_row(self, category):
+        return {
+            "id": category.id,
+            "category": category.category,
+            "public_name": category.public_name,
+            "color": category.color
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             query = (
                 self.db.query(
@@ -17,11 +27,16 @@ class CategoryClass:
                 .order_by(CategoryModel.id)
             )
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(query, CategoryModel.id).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = query.count()
-                total_pages = (total_items + items_per_page - 1)
+                total_items, exact = CountCacheClass(self.db).count(query, CategoryModel.__tablename__, estimate=not exact_count)
+                total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -29,15 +44,11 @@ class CategoryClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": category.id,
-                    "category": category.category,
-                    "public_name": category.public_name,
-                    "color": category.color
-                } for category in data]
+                serialized_data = [self._list_row(category) for category in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -47,12 +58,7 @@ class CategoryClass:
             else:
                 data = query.all()
 
-                serialized_data = [{
-                    "id": category.id,
-                    "category": category.category,
-                    "public_name": category.public_name,
-                    "color": category.color
-                } for category in data]
+                serialized_data = [self._list_row(category) for category in data]
 
                 return serialized_data
 
@@ -118,6 +124,7 @@ class CategoryClass:
 
             self.db.add(new_category)
             self.db.commit()
+            CountCacheClass.invalidate(CategoryModel.__tablename__)
             self.db.refresh(new_category)
 
             return {
@@ -162,6 +169,7 @@ class CategoryClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                CountCacheClass.invalidate(CategoryModel.__tablename__)
                 return 'success'
             else:
                 return "No data found"
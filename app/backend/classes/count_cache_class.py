@@ -0,0 +1,80 @@
+import os
+import threading
+
+from sqlalchemy import text
+
+from app.backend.classes.ttl_cache_class import TtlCacheClass
+
+# Conteos de los listados paginados por (tabla, SQL + parámetros de la query).
+# Se invalidan por tabla desde store/delete de cada clase; el TTL acota lo que
+# puede quedar desactualizado en otros procesos/workers.
+count_cache = TtlCacheClass(
+    maxsize=int(os.environ.get("COUNT_CACHE_SIZE") or 1024),
+    ttl=int(os.environ.get("COUNT_CACHE_TTL_SECONDS") or 300),
+)
+
+# Generación por tabla: invalidar es subirla, y las claves viejas quedan
+# inalcanzables hasta que las saque el LRU/TTL.
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+class CountCacheClass:
+    """
+    total_items de los get_all sin repetir el COUNT en cada página.
+
+    count() devuelve (total, exact). Con estimate=True y sin filtros, en MySQL
+    se usa TABLE_ROWS de information_schema (estadística de InnoDB, puede
+    diferir del real). Un conteo recién hecho es exacto; uno sacado de la
+    caché no: invalidate() solo llega a este proceso, así que las escrituras
+    de otros workers pueden no estar reflejadas hasta que venza el TTL.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def invalidate(*tables):
+        with _generations_lock:
+            for table in tables:
+                _generations[table] = _generations.get(table, 0) + 1
+
+    def _signature(self, query):
+        compiled = query.statement.compile(dialect=self.db.get_bind().dialect)
+        params = tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+        return str(compiled), params
+
+    def _estimate(self, table):
+        bind = self.db.get_bind()
+        if bind.dialect.name != "mysql":
+            return None
+        rows = self.db.execute(
+            text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+            ),
+            {"table": table},
+        ).scalar()
+        return int(rows) if rows is not None else None
+
+    def count(self, query, table, estimate=False):
+        query = query.order_by(None)
+        sql, params = self._signature(query)
+
+        if estimate and not params and query.whereclause is None:
+            key = (table, "estimate")
+            total = count_cache.get(key)
+            if total is None:
+                total = self._estimate(table)
+                if total is not None:
+                    count_cache.set(key, total)
+            if total is not None:
+                return total, False
+
+        key = (table, _generations.get(table, 0), sql, params)
+        total = count_cache.get(key)
+        if total is not None:
+            return total, False
+        total = query.count()
+        count_cache.set(key, total)
+        return total, True
@@ -1,6 +1,9 @@
 from app.backend.db.models import CustomerModel, RegionModel, CommuneModel, CustomerProductDiscountModel, SettingModel, UserModel
 from datetime import datetime
-from app.backend.auth.auth_user import generate_bcrypt_hash
+from app.backend.classes.password_hash_class import PasswordHashClass
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
+from app.backend.auth.auth_user import invalidate_principal
 
 class CustomerClass:
     def __init__(self, db):
@@ -36,7 +39,17 @@ class CustomerClass:
             error_message = str(e)
             return {"status": "error", "message": error_message}
 
-    def get_all(self, page=0, items_per_page=10, name=None, rut=None):
+    def _list_row(self, customer):
+        return {
+            "id": customer.id,
+            "social_reason": customer.social_reason,
+            "identification_number": customer.identification_number,
+            "address": customer.address,
+            "phone": customer.phone,
+            "email": customer.email if customer.email else None,
+        }
+
+    def get_all(self, page=0, items_per_page=10, name=None, rut=None, exact_count=True, cursor=None, limit=None):
         try:
             query = (
                 self.db.query(
@@ -57,11 +70,16 @@ class CustomerClass:
             if rut and rut.strip():
                 query = query.filter(CustomerModel.identification_number == rut.strip())
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(query, CustomerModel.id).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = query.count()
-                total_pages = (total_items + items_per_page - 1)
+                total_items, exact = CountCacheClass(self.db).count(query, CustomerModel.__tablename__, estimate=not exact_count)
+                total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -69,17 +87,11 @@ class CustomerClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": customer.id,
-                    "social_reason": customer.social_reason,
-                    "identification_number": customer.identification_number,
-                    "address": customer.address,
-                    "phone": customer.phone,
-                    "email": customer.email if customer.email else None,
-                } for customer in data]
+                serialized_data = [self._list_row(customer) for customer in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -89,14 +101,7 @@ class CustomerClass:
             else:
                 data = query.all()
 
-                serialized_data = [{
-                    "id": customer.id,
-                    "social_reason": customer.social_reason,
-                    "identification_number": customer.identification_number,
-                    "address": customer.address,
-                    "phone": customer.phone,
-                    "email": customer.email if customer.email else None,
-                } for customer in data]
+                serialized_data = [self._list_row(customer) for customer in data]
 
                 return serialized_data
 
@@ -122,6 +127,7 @@ class CustomerClass:
             existing_customer.updated_date = datetime.utcnow()
 
             self.db.commit()
+            CountCacheClass.invalidate(CustomerModel.__tablename__)
             self.db.refresh(existing_customer)
 
             # Manejar actualización de descuentos de productos
@@ -185,7 +191,7 @@ class CustomerClass:
                 new_user = UserModel(
                     rol_id=5,  # Rol de cliente público
                     full_name=customer_inputs.social_reason,
-                    hashed_password=generate_bcrypt_hash('123456'),  # Contraseña por defecto
+                    hashed_password=PasswordHashClass.default_hash('123456'),  # Contraseña por defecto
                     email=customer_inputs.email,
                     added_date=datetime.now(),
                     updated_date=datetime.now()
@@ -206,6 +212,7 @@ class CustomerClass:
                 self.db.commit()
             else:
                 self.db.commit()
+            CountCacheClass.invalidate(CustomerModel.__tablename__, UserModel.__tablename__)
 
             return {
                 "status": "Cliente registrado exitosamente.",
@@ -441,6 +448,9 @@ class CustomerClass:
                 self.db.delete(user)
             
             self.db.commit()
+            CountCacheClass.invalidate(CustomerModel.__tablename__, UserModel.__tablename__)
+            if user:
+                invalidate_principal(customer.email)
             return 'success'
             
         except Exception as e:
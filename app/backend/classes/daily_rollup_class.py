@@ -0,0 +1,295 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.backend.db.models import DailyRollupModel, ExpenseReportModel, InvoiceModel
+
+
+class DailyRollupClass:
+    """
+    Totales diarios pre-agregados de invoices y expense_reports (tabla daily_rollups).
+
+    Se mantienen incrementalmente desde InvoiceClass/ExpenseReportClass
+    (store/update/delete) dentro de la misma transacción con amount_numeric;
+    rebuild() los recalcula desde los documentos
+    (ver app/backend/commands/rebuild_daily_rollups.py).
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _day(self, value) -> date | None:
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return datetime.fromisoformat(str(value).strip()).date()
+        except Exception:
+            return None
+
+    # Upsert por motor: una sola sentencia, así dos primeras escrituras
+    # concurrentes del mismo día no chocan por la clave primaria.
+    UPSERTS = {
+        "mysql": mysql_insert,
+        "sqlite": sqlite_insert,
+        "postgresql": postgresql_insert,
+    }
+
+    def _apply(self, day, invoice_total=0, invoice_count=0, expense_total=0, expense_count=0):
+        """
+        Suma deltas al día indicado (crea la fila si no existe). No hace
+        commit: lo hace quien llama, junto con el cambio del documento.
+        """
+        if day is None:
+            return
+
+        table = DailyRollupModel.__table__
+        deltas = {
+            "invoice_total": invoice_total,
+            "invoice_count": invoice_count,
+            "expense_total": expense_total,
+            "expense_count": expense_count,
+        }
+        dialect = self.db.get_bind().dialect.name
+        stmt = self.UPSERTS[dialect](table).values(
+            rollup_date=day, updated_date=datetime.utcnow(), **deltas
+        )
+        if dialect == "mysql":
+            new = stmt.inserted
+            stmt = stmt.on_duplicate_key_update(
+                updated_date=new.updated_date,
+                **{name: table.c[name] + new[name] for name in deltas},
+            )
+        else:
+            new = stmt.excluded
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.rollup_date],
+                set_={"updated_date": new.updated_date, **{name: table.c[name] + new[name] for name in deltas}},
+            )
+        self.db.execute(stmt)
+
+    def add_invoice(self, invoice_date, amount_numeric, sign=1):
+        self._apply(
+            self._day(invoice_date),
+            invoice_total=sign * (amount_numeric or Decimal("0")),
+            invoice_count=sign,
+        )
+
+    def add_expense(self, document_date, amount_numeric, sign=1):
+        self._apply(
+            self._day(document_date),
+            expense_total=sign * (amount_numeric or Decimal("0")),
+            expense_count=sign,
+        )
+
+    def rebuild(self, since: date | None = None, until: date | None = None):
+        """
+        Recalcula los días del rango (o todos) con SUM(amount_numeric) agrupado por día.
+        """
+        days = {}
+
+        def bucket(day):
+            if day not in days:
+                days[day] = [Decimal("0"), 0, Decimal("0"), 0]
+            return days[day]
+
+        expense_day = func.date(ExpenseReportModel.document_date)
+        invoices = (
+            self.db.query(InvoiceModel.invoice_date, func.sum(InvoiceModel.amount_numeric), func.count(InvoiceModel.id))
+            .filter(InvoiceModel.invoice_date.isnot(None))
+        )
+        expenses = (
+            self.db.query(expense_day, func.sum(ExpenseReportModel.amount_numeric), func.count(ExpenseReportModel.id))
+            .filter(ExpenseReportModel.document_date.isnot(None))
+        )
+        rollups = self.db.query(DailyRollupModel)
+
+        if since is not None:
+            invoices = invoices.filter(InvoiceModel.invoice_date >= since)
+            expenses = expenses.filter(ExpenseReportModel.document_date >= datetime.combine(since, time.min))
+            rollups = rollups.filter(DailyRollupModel.rollup_date >= since)
+        if until is not None:
+            invoices = invoices.filter(InvoiceModel.invoice_date <= until)
+            expenses = expenses.filter(ExpenseReportModel.document_date < datetime.combine(until + timedelta(days=1), time.min))
+            rollups = rollups.filter(DailyRollupModel.rollup_date <= until)
+
+        for day, total, count in invoices.group_by(InvoiceModel.invoice_date):
+            b = bucket(self._day(day))
+            b[0] += Decimal(str(total or 0))
+            b[1] += count
+
+        for day, total, count in expenses.group_by(expense_day):
+            b = bucket(self._day(day))
+            b[2] += Decimal(str(total or 0))
+            b[3] += count
+
+        try:
+            rollups.delete(synchronize_session=False)
+            now = datetime.utcnow()
+            self.db.add_all([
+                DailyRollupModel(
+                    rollup_date=day,
+                    invoice_total=v[0],
+                    invoice_count=v[1],
+                    expense_total=v[2],
+                    expense_count=v[3],
+                    updated_date=now,
+                )
+                for day, v in days.items()
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {
+            "days": len(days),
+            "invoices": sum(v[1] for v in days.values()),
+            "expense_reports": sum(v[3] for v in days.values()),
+        }
+
+    def _expense_raw_total(self, since_dt: datetime, before_dt: datetime | None = None, end_dt: datetime | None = None) -> Decimal:
+        q = (
+            self.db.query(func.coalesce(func.sum(ExpenseReportModel.amount_numeric), 0))
+            .filter(ExpenseReportModel.document_date >= since_dt)
+        )
+        if before_dt is not None:
+            q = q.filter(ExpenseReportModel.document_date < before_dt)
+        if end_dt is not None:
+            q = q.filter(ExpenseReportModel.document_date <= end_dt)
+        return Decimal(str(q.scalar()))
+
+    def totals(self, since_dt: datetime, end_dt: datetime):
+        """
+        Totales del rango sumando filas diarias. invoice_date es DATE, así que
+        se usan los días completos; para expense_reports (DATETIME) los días
+        parciales de los extremos se suman desde los documentos.
+        """
+        invoices_total, = (
+            self.db.query(func.coalesce(func.sum(DailyRollupModel.invoice_total), 0))
+            .filter(DailyRollupModel.rollup_date >= since_dt.date())
+            .filter(DailyRollupModel.rollup_date <= end_dt.date())
+            .one()
+        )
+
+        first_full = since_dt.date() if since_dt.time() == time.min else since_dt.date() + timedelta(days=1)
+        last_full = end_dt.date() if end_dt.time() >= time(23, 59, 59) else end_dt.date() - timedelta(days=1)
+
+        if first_full > last_full:
+            expense_reports_total = self._expense_raw_total(since_dt, end_dt=end_dt)
+        else:
+            expense_reports_total, = (
+                self.db.query(func.coalesce(func.sum(DailyRollupModel.expense_total), 0))
+                .filter(DailyRollupModel.rollup_date >= first_full)
+                .filter(DailyRollupModel.rollup_date <= last_full)
+                .one()
+            )
+            expense_reports_total = Decimal(str(expense_reports_total))
+
+            first_full_dt = datetime.combine(first_full, time.min)
+            if since_dt < first_full_dt:
+                expense_reports_total += self._expense_raw_total(since_dt, before_dt=first_full_dt)
+
+            after_last_dt = datetime.combine(last_full + timedelta(days=1), time.min)
+            if end_dt >= after_last_dt:
+                expense_reports_total += self._expense_raw_total(after_last_dt, end_dt=end_dt)
+
+        return {
+            "invoices_total": Decimal(str(invoices_total)),
+            "expense_reports_total": expense_reports_total,
+        }
+
+    GRANULARITIES = ("day", "week", "month", "quarter", "year")
+
+    def _bucket_start(self, day: date, granularity: str) -> date:
+        if granularity == "week":
+            return day - timedelta(days=day.weekday())  # lunes (semana ISO)
+        if granularity == "month":
+            return day.replace(day=1)
+        if granularity == "quarter":
+            return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+        if granularity == "year":
+            return date(day.year, 1, 1)
+        return day
+
+    def _next_bucket(self, start: date, granularity: str) -> date:
+        if granularity == "week":
+            return start + timedelta(days=7)
+        if granularity in ("month", "quarter"):
+            months = 1 if granularity == "month" else 3
+            month_index = start.month - 1 + months
+            return date(start.year + month_index // 12, month_index % 12 + 1, 1)
+        if granularity == "year":
+            return date(start.year + 1, 1, 1)
+        return start + timedelta(days=1)
+
+    def series(self, since_dt: datetime, end_dt: datetime, granularity: str = "month"):
+        """
+        Lo mismo que totals(), pero por período (day/week/month/quarter/year)
+        con una sola consulta agrupada sobre daily_rollups; los días parciales
+        de los extremos se completan desde los documentos, igual que en totals().
+
+        Devuelve [{"period_start", "period_end", "invoices_total", "expense_reports_total"}]
+        con todos los períodos del rango, incluidos los vacíos.
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"invalid granularity: {granularity}")
+
+        first_day, last_day = since_dt.date(), end_dt.date()
+        first_full = first_day if since_dt.time() == time.min else first_day + timedelta(days=1)
+        last_full = last_day if end_dt.time() >= time(23, 59, 59) else last_day - timedelta(days=1)
+
+        buckets = {}
+        start = self._bucket_start(first_day, granularity)
+        while start <= last_day:
+            buckets[start] = [Decimal("0"), Decimal("0")]
+            start = self._next_bucket(start, granularity)
+
+        rows = (
+            self.db.query(DailyRollupModel.rollup_date, DailyRollupModel.invoice_total, DailyRollupModel.expense_total)
+            .filter(DailyRollupModel.rollup_date >= first_day)
+            .filter(DailyRollupModel.rollup_date <= last_day)
+        )
+        for day, invoice_total, expense_total in rows:
+            day = self._day(day)
+            b = buckets[self._bucket_start(day, granularity)]
+            b[0] += Decimal(str(invoice_total or 0))
+            if first_full <= day <= last_full:
+                b[1] += Decimal(str(expense_total or 0))
+
+        # Días parciales de expense_reports (DATETIME): desde los documentos.
+        if first_full > last_full:
+            # Sin días completos: a lo más dos días parciales, cada uno en su período.
+            day = first_day
+            while day <= last_day:
+                next_day_dt = datetime.combine(day + timedelta(days=1), time.min)
+                day_since = max(since_dt, datetime.combine(day, time.min))
+                buckets[self._bucket_start(day, granularity)][1] += self._expense_raw_total(
+                    day_since, before_dt=next_day_dt, end_dt=end_dt
+                )
+                day += timedelta(days=1)
+        else:
+            first_full_dt = datetime.combine(first_full, time.min)
+            if since_dt < first_full_dt:
+                buckets[self._bucket_start(first_day, granularity)][1] += self._expense_raw_total(since_dt, before_dt=first_full_dt)
+
+            after_last_dt = datetime.combine(last_full + timedelta(days=1), time.min)
+            if end_dt >= after_last_dt:
+                buckets[self._bucket_start(last_day, granularity)][1] += self._expense_raw_total(after_last_dt, end_dt=end_dt)
+
+        return [
+            {
+                "period_start": max(start, first_day),
+                "period_end": min(self._next_bucket(start, granularity) - timedelta(days=1), last_day),
+                "invoices_total": values[0],
+                "expense_reports_total": values[1],
+            }
+            for start, values in buckets.items()
+        ]
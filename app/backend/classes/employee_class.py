@@ -20,9 +20,9 @@ class EmployeeClass:
 
             if page > 0:
                 total_items = query.count()
-                total_pages = (total_items + items_per_page - 1)
+                total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -93,9 +93,9 @@ class EmployeeClass:
 
             if page > 0:
                 total_items = query.count()
-                total_pages = (total_items + items_per_page - 1)
+                total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
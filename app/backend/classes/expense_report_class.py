@@ -1,10 +1,17 @@
+import base64
+import json
 import os
 import platform
 
 from app.backend.db.models import ExpenseReportModel, SupplierModel
 from datetime import datetime
-from sqlalchemy import func, cast, String, func as sa_func
+from sqlalchemy import and_, func, cast, or_, String, func as sa_func
+from app.backend.classes.amount_class import AmountClass
 from app.backend.classes.file_class import FileClass
+from app.backend.classes.thumbnail_class import ThumbnailClass
+from app.backend.classes.daily_rollup_class import DailyRollupClass
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 
 class ExpenseReportClass:
     def __init__(self, db):
@@ -32,7 +39,7 @@ class ExpenseReportClass:
         except Exception:
             return None
 
-    def _file_url(self, remote_path: str | None):
+    def _file_url(self, remote_path: str | None, route: str = "view"):
         if not remote_path:
             return None
 
@@ -41,13 +48,18 @@ class ExpenseReportClass:
         # Si existe PUBLIC_BASE_URL, devolver URL absoluta (recomendado para front en otro dominio)
         public_base = (os.environ.get("PUBLIC_BASE_URL") or "").strip().rstrip("/")
         if public_base:
-            return f"{public_base}/api/files/view/{rp}"
+            return f"{public_base}/api/files/{route}/{rp}"
 
         # Fallback razonable por ambiente
         if platform.system() == "Linux":
-            return f"https://api.kcgeneralsolutions.ca/api/files/view/{rp}"
+            return f"https://api.kcgeneralsolutions.ca/api/files/{route}/{rp}"
 
-        return f"http://127.0.0.1:8000/api/files/view/{rp}"
+        return f"http://127.0.0.1:8000/api/files/{route}/{rp}"
+
+    def _thumb_url(self, remote_path: str | None):
+        if not ThumbnailClass.supports(remote_path):
+            return None
+        return self._file_url(remote_path, f"thumb/{ThumbnailClass.LIST_SIZE}")
 
     def _ensure_supplier_from_company(self, company_value):
         """
@@ -74,16 +86,38 @@ class ExpenseReportClass:
             )
         )
 
-    def get_all(self, page=0, session_user=None, items_per_page=10):
+    def _list_row(self, expense_report):
+        return {
+            "id": expense_report.id,
+            "user_id": expense_report.user_id,
+            "expense_type_id": expense_report.expense_type_id,
+            "document_number": expense_report.document_number,
+            "company": expense_report.company,
+            "amount": expense_report.amount,
+            "description": getattr(expense_report, "description", None),
+            "document_date": expense_report.document_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.document_date else None,
+            "file": expense_report.file,
+            "file_url": self._file_url(expense_report.file),
+            "thumb_url": self._thumb_url(expense_report.file),
+            "added_date": expense_report.added_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.added_date else None,
+            "updated_date": expense_report.updated_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.updated_date else None
+        }
+
+    def get_all(self, page=0, session_user=None, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             base_query = self.db.query(ExpenseReportModel).order_by(ExpenseReportModel.id.desc())
             base_query = self._apply_user_scope(base_query, session_user)
             
+            if cursor is not None or limit is not None:
+                return PaginationClass(base_query, ExpenseReportModel.id, descending=True).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = base_query.count()
+                total_items, exact = CountCacheClass(self.db).count(base_query, ExpenseReportModel.__tablename__, estimate=not exact_count)
                 total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or (total_pages > 0 and page > total_pages):
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = base_query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -91,23 +125,11 @@ class ExpenseReportClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": expense_report.id,
-                    "user_id": expense_report.user_id,
-                    "expense_type_id": expense_report.expense_type_id,
-                    "document_number": expense_report.document_number,
-                    "company": expense_report.company,
-                    "amount": expense_report.amount,
-                    "description": getattr(expense_report, "description", None),
-                    "document_date": expense_report.document_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.document_date else None,
-                    "file": expense_report.file,
-                    "file_url": self._file_url(expense_report.file),
-                    "added_date": expense_report.added_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.added_date else None,
-                    "updated_date": expense_report.updated_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.updated_date else None
-                } for expense_report in data]
+                serialized_data = [self._list_row(expense_report) for expense_report in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -117,20 +139,7 @@ class ExpenseReportClass:
             else:
                 data = base_query.all()
 
-                serialized_data = [{
-                    "id": expense_report.id,
-                    "user_id": expense_report.user_id,
-                    "expense_type_id": expense_report.expense_type_id,
-                    "document_number": expense_report.document_number,
-                    "company": expense_report.company,
-                    "amount": expense_report.amount,
-                    "description": getattr(expense_report, "description", None),
-                    "document_date": expense_report.document_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.document_date else None,
-                    "file": expense_report.file,
-                    "file_url": self._file_url(expense_report.file),
-                    "added_date": expense_report.added_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.added_date else None,
-                    "updated_date": expense_report.updated_date.strftime("%Y-%m-%d %H:%M:%S") if expense_report.updated_date else None
-                } for expense_report in data]
+                serialized_data = [self._list_row(expense_report) for expense_report in data]
 
                 return serialized_data
 
@@ -138,6 +147,135 @@ class ExpenseReportClass:
             error_message = str(e)
             return {"status": "error", "message": error_message}
     
+    def data_version(self, since_dt, end_dt):
+        """
+        (cantidad de filas, max(updated_date)) del rango: cambia con cualquier
+        alta, baja o edición que afecte al reporte.
+        """
+        total_rows, last_updated = (
+            self.db.query(func.count(ExpenseReportModel.id), func.max(ExpenseReportModel.updated_date))
+            .filter(ExpenseReportModel.document_date >= since_dt)
+            .filter(ExpenseReportModel.document_date <= end_dt)
+            .one()
+        )
+        return total_rows or 0, last_updated
+
+    def stream_range(self, since_dt, end_dt, chunk_size=500):
+        """
+        Filas del rango en orden de reporte, leídas con un cursor del lado servidor.
+        Devuelve tuplas (no entidades) para no llenar el identity map de la sesión.
+        """
+        return (
+            self.db.query(
+                ExpenseReportModel.id,
+                ExpenseReportModel.document_date,
+                ExpenseReportModel.document_number,
+                ExpenseReportModel.company,
+                ExpenseReportModel.description,
+                ExpenseReportModel.amount,
+                ExpenseReportModel.amount_numeric,
+                ExpenseReportModel.file,
+            )
+            .filter(ExpenseReportModel.document_date >= since_dt)
+            .filter(ExpenseReportModel.document_date <= end_dt)
+            # Orden ascendente por fecha de documento (NULL al final)
+            .order_by(
+                ExpenseReportModel.document_date.is_(None),
+                ExpenseReportModel.document_date.asc(),
+                ExpenseReportModel.id.asc(),
+            )
+            .execution_options(stream_results=True)
+            .yield_per(chunk_size)
+        )
+
+    def _encode_detail_cursor(self, document_date, id, index):
+        raw = json.dumps({"d": document_date.isoformat(), "i": id, "n": index}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _decode_detail_cursor(self, cursor):
+        """
+        Cursor opaco -> (document_date, id, index). ValueError si no es válido.
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            return datetime.fromisoformat(data["d"]), int(data["i"]), int(data["n"])
+        except Exception:
+            raise ValueError("invalid cursor")
+
+    def _detail_row(self, row, index):
+        return {
+            "index": index,
+            "id": row.id,
+            "date": row.document_date.strftime("%Y-%m-%d") if row.document_date else None,
+            "detail": (row.description or row.company or "").strip(),
+            "file": row.file,
+            "file_url": FileClass.view_url(row.file) if row.file else None,
+            "amount": str(row.amount) if row.amount is not None else "",
+        }
+
+    def _detail_query(self, since_dt, end_dt, after=None):
+        """
+        Filas de /reports/expense-details ordenadas por (document_date, id).
+        `after` = (document_date, id) de la última fila ya entregada (keyset).
+        """
+        q = (
+            self.db.query(
+                ExpenseReportModel.id,
+                ExpenseReportModel.document_date,
+                ExpenseReportModel.description,
+                ExpenseReportModel.company,
+                ExpenseReportModel.file,
+                ExpenseReportModel.amount,
+            )
+            .filter(ExpenseReportModel.document_date >= since_dt)
+            .filter(ExpenseReportModel.document_date <= end_dt)
+        )
+        if after is not None:
+            last_date, last_id = after
+            q = q.filter(
+                or_(
+                    ExpenseReportModel.document_date > last_date,
+                    and_(ExpenseReportModel.document_date == last_date, ExpenseReportModel.id > last_id),
+                )
+            )
+        # document_date nunca es NULL dentro del rango: (document_date, id) alcanza como orden total.
+        return q.order_by(ExpenseReportModel.document_date.asc(), ExpenseReportModel.id.asc())
+
+    def details_page(self, since_dt, end_dt, cursor=None, limit=100):
+        """
+        Una página del detalle y el cursor de la siguiente (None si no hay más).
+        """
+        after = None
+        index = 0
+        if cursor:
+            last_date, last_id, index = self._decode_detail_cursor(cursor)
+            after = (last_date, last_id)
+
+        # Una fila extra para saber si hay página siguiente sin hacer COUNT.
+        rows = self._detail_query(since_dt, end_dt, after).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        data = [self._detail_row(row, index + i) for i, row in enumerate(rows, start=1)]
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = self._encode_detail_cursor(last.document_date, last.id, index + len(rows))
+        return data, next_cursor
+
+    def details_stream(self, since_dt, end_dt, chunk_size=500):
+        """
+        Todo el detalle, fila a fila, desde un cursor del lado servidor.
+        """
+        rows = (
+            self._detail_query(since_dt, end_dt)
+            .execution_options(stream_results=True)
+            .yield_per(chunk_size)
+        )
+        for index, row in enumerate(rows, start=1):
+            yield self._detail_row(row, index)
+
     def get_list(self, session_user=None):
         try:
             query = self.db.query(ExpenseReportModel).order_by(ExpenseReportModel.id.desc())
@@ -248,12 +386,16 @@ class ExpenseReportClass:
             return "No data found"
 
         try:
+            rollup = DailyRollupClass(self.db)
+            rollup.add_expense(existing_expense_report.document_date, existing_expense_report.amount_numeric, sign=-1)
+
             existing_expense_report.expense_type_id = self._get_value(form_data, "expense_type_id")
             existing_expense_report.document_number = self._to_int_or_none(self._get_value(form_data, "document_number"))
             existing_expense_report.company = self._get_value(form_data, "company")
             # Guardar company en la tabla suppliers (si no existe)
             self._ensure_supplier_from_company(existing_expense_report.company)
             existing_expense_report.amount = self._get_value(form_data, "amount")
+            existing_expense_report.amount_numeric = AmountClass.parse(existing_expense_report.amount)
             existing_expense_report.description = self._get_value(form_data, "description")
             existing_expense_report.document_date = self._get_value(form_data, "document_date")
 
@@ -262,7 +404,10 @@ class ExpenseReportClass:
                 existing_expense_report.file = form_data.get("file")
             existing_expense_report.updated_date = datetime.utcnow()
 
+            rollup.add_expense(existing_expense_report.document_date, existing_expense_report.amount_numeric)
+
             self.db.commit()
+            CountCacheClass.invalidate(SupplierModel.__tablename__)
             self.db.refresh(existing_expense_report)
             return {
                 "status": "Expense report updated successfully",
@@ -291,6 +436,7 @@ class ExpenseReportClass:
                 document_number=self._to_int_or_none(self._get_value(expense_report_inputs, "document_number")),
                 company=company_value,
                 amount=self._get_value(expense_report_inputs, "amount"),
+                amount_numeric=AmountClass.parse(self._get_value(expense_report_inputs, "amount")),
                 description=self._get_value(expense_report_inputs, "description"),
                 document_date=self._get_value(expense_report_inputs, "document_date"),
                 file=self._get_value(expense_report_inputs, "file"),
@@ -299,7 +445,10 @@ class ExpenseReportClass:
             )
 
             self.db.add(new_expense_report)
+            DailyRollupClass(self.db).add_expense(new_expense_report.document_date, new_expense_report.amount_numeric)
             self.db.commit()
+            # _ensure_supplier_from_company pudo agregar un supplier.
+            CountCacheClass.invalidate(ExpenseReportModel.__tablename__, SupplierModel.__tablename__)
             self.db.refresh(new_expense_report)
 
             return {
@@ -356,8 +505,10 @@ class ExpenseReportClass:
                     except Exception as e:
                         return {"status": "error", "message": f"Error al eliminar archivo: {str(e)}"}
 
+                DailyRollupClass(self.db).add_expense(data.document_date, data.amount_numeric, sign=-1)
                 self.db.delete(data)
                 self.db.commit()
+                CountCacheClass.invalidate(ExpenseReportModel.__tablename__)
                 return 'success'
             else:
                 return "No data found"
@@ -0,0 +1,392 @@
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, List
+
+from app.backend.classes.amount_class import AmountClass
+
+
+def _pdf_escape(text: str) -> str:
+    return (text or "").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_text(text: str) -> str:
+    return _pdf_escape(text).encode("latin-1", errors="replace").decode("latin-1")
+
+
+def _approx_text_width(text: str, font_size: int) -> float:
+    # Aproximación para Helvetica: ~0.5 * font_size por caracter
+    return max(0.0, len(text or "") * font_size * 0.5)
+
+
+class ExpenseReportPdfClass:
+    """
+    PDF (sin libs externas) con título centrado + tabla, escrito en streaming.
+
+    Cada página se emite apenas se completa: los offsets del xref se llevan
+    incrementalmente y el árbol de páginas, xref y trailer se escriben al final.
+    La memoria queda acotada a una página de filas, sin importar el rango.
+    """
+
+    # Layout constants
+    page_width = 612
+    page_height = 792
+    margin_x = 40
+
+    # Subir título/fecha/tabla (sin logo)
+    title_y = 740
+    range_y = 715
+    table_top = 685
+    header_h = 22
+    row_h = 18
+    # dejar espacio para TOTAL + footer
+    table_bottom_min = 110
+
+    title = "Expense Report"
+    title_size = 18
+
+    compress_level = 6
+
+    def __init__(self, since_dt: datetime, end_dt: datetime, total_rows: int = 0, compress: bool = False):
+        self.since_dt = since_dt
+        self.end_dt = end_dt
+        self.total_rows = total_rows
+        # compress=True: streams con /FlateDecode, recursos compartidos y
+        # encabezado/grilla como Form XObjects.
+        self.compress = compress
+
+        self.table_width = self.page_width - (self.margin_x * 2)  # 532
+
+        # Columns
+        col_date = 90
+        col_doc = 110
+        col_company = 150
+        col_amount = 92
+        col_desc = self.table_width - (col_date + col_doc + col_company + col_amount)
+
+        self.x0 = self.margin_x
+        self.x1 = self.x0 + col_date
+        self.x2 = self.x1 + col_doc
+        self.x3 = self.x2 + col_company
+        self.x4 = self.x3 + col_desc
+        self.x5 = self.x0 + self.table_width
+
+        title_x = (self.page_width / 2.0) - (_approx_text_width(self.title, self.title_size) / 2.0)
+        self.title_x = max(self.margin_x, min(title_x, self.page_width - self.margin_x))
+
+        self.range_text = f"From: {since_dt.strftime('%Y-%m-%d %H:%M:%S')}    To: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}"
+
+        usable_h = (self.table_top - self.table_bottom_min) - self.header_h
+        self.rows_per_page = max(1, int(usable_h // self.row_h))
+
+        self.total_amount = Decimal("0")
+        self.total_amount_has_value = False
+
+        # Estado de escritura
+        self.offset = 0
+        self.xref_positions: List[int] = [0]
+        self.page_objs: List[int] = []
+        self.rows_written = 0
+
+    def _reserve(self) -> int:
+        self.xref_positions.append(0)
+        return len(self.xref_positions) - 1  # 1-based obj number
+
+    def _write(self, data: bytes) -> bytes:
+        self.offset += len(data)
+        return data
+
+    def _write_obj(self, objn: int, data: bytes) -> bytes:
+        self.xref_positions[objn] = self.offset
+        return self._write(f"{objn} 0 obj\n".encode("ascii") + data + b"\nendobj\n")
+
+    def _table_row(self, r) -> List[str]:
+        date_str = r.document_date.strftime("%Y-%m-%d") if r.document_date else ""
+        # En DB puede venir int (datos antiguos). Forzar a string siempre.
+        doc_str = str(r.document_number) if r.document_number is not None else ""
+        company = str(r.company) if r.company is not None else ""
+        desc = str(getattr(r, "description", "") or "")
+
+        # amount_numeric se llena al guardar; solo se parsea el string en filas sin migrar.
+        amount_value = getattr(r, "amount_numeric", None)
+        if amount_value is not None:
+            amount_value = AmountClass.normalize(amount_value)
+        else:
+            amount_value = AmountClass.parse(r.amount)
+        if amount_value is not None:
+            self.total_amount += amount_value
+            self.total_amount_has_value = True
+            amount = AmountClass.format_currency(amount_value)
+        else:
+            # fallback: mostrar con símbolo si viene texto
+            raw_amount = str(r.amount) if r.amount is not None else ""
+            raw_amount = raw_amount.strip()
+            amount = raw_amount
+            if amount and not amount.startswith("$"):
+                amount = f"$ {amount}"
+
+        # Truncar para la tabla
+        if len(doc_str) > 18:
+            doc_str = doc_str[:18] + "..."
+        if len(company) > 24:
+            company = company[:24] + "..."
+        if len(desc) > 28:
+            desc = desc[:28] + "..."
+        if len(amount) > 18:
+            amount = amount[:18] + "..."
+
+        return [date_str, doc_str, company, desc, amount]
+
+    def _title_cmds(self) -> List[str]:
+        cmds: List[str] = []
+
+        # Title (bold)
+        cmds.append("BT")
+        cmds.append(f"/F2 {self.title_size} Tf")
+        cmds.append(f"1 0 0 1 {self.title_x:.2f} {self.title_y} Tm")
+        cmds.append(f"({_pdf_text(self.title)}) Tj")
+        cmds.append("ET")
+
+        # Date range (bold)
+        cmds.append("BT")
+        cmds.append("/F2 11 Tf")
+        cmds.append(f"1 0 0 1 {self.margin_x} {self.range_y} Tm")
+        cmds.append(f"({_pdf_text(self.range_text)}) Tj")
+        cmds.append("ET")
+
+        # Header background
+        header_bottom = self.table_top - self.header_h
+        cmds.append("0.95 g")
+        cmds.append(f"{self.x0} {header_bottom} {self.table_width} {self.header_h} re f")
+        cmds.append("0 g")
+        return cmds
+
+    def _grid_cmds(self, row_count: int) -> List[str]:
+        x0, x1, x2, x3, x4, x5 = self.x0, self.x1, self.x2, self.x3, self.x4, self.x5
+        table_top = self.table_top
+        table_bottom = table_top - self.header_h - (row_count * self.row_h)
+        header_bottom = table_top - self.header_h
+
+        cmds: List[str] = []
+
+        # Grid lines
+        cmds.append("0 0 0 RG")
+        cmds.append("0.7 w")
+
+        # Outer border
+        cmds.append(f"{x0} {table_top} m {x5} {table_top} l S")
+        cmds.append(f"{x0} {table_bottom} m {x5} {table_bottom} l S")
+        cmds.append(f"{x0} {table_bottom} m {x0} {table_top} l S")
+        cmds.append(f"{x5} {table_bottom} m {x5} {table_top} l S")
+
+        # Vertical lines
+        cmds.append(f"{x1} {table_bottom} m {x1} {table_top} l S")
+        cmds.append(f"{x2} {table_bottom} m {x2} {table_top} l S")
+        cmds.append(f"{x3} {table_bottom} m {x3} {table_top} l S")
+        cmds.append(f"{x4} {table_bottom} m {x4} {table_top} l S")
+
+        # Header bottom line
+        cmds.append(f"{x0} {header_bottom} m {x5} {header_bottom} l S")
+
+        # Row lines
+        for i in range(1, row_count + 1):
+            y = header_bottom - (i * self.row_h)
+            cmds.append(f"{x0} {y} m {x5} {y} l S")
+        return cmds
+
+    def _header_label_cmds(self) -> List[str]:
+        table_top = self.table_top
+        cmds: List[str] = []
+
+        # Header labels (bold)
+        cmds.append("BT")
+        cmds.append("/F2 10 Tf")
+        cmds.append(f"1 0 0 1 {self.x0 + 6} {table_top - 15} Tm (Date) Tj")
+        cmds.append(f"1 0 0 1 {self.x1 + 6} {table_top - 15} Tm (Document #) Tj")
+        cmds.append(f"1 0 0 1 {self.x2 + 6} {table_top - 15} Tm (Company) Tj")
+        cmds.append(f"1 0 0 1 {self.x3 + 6} {table_top - 15} Tm (Description) Tj")
+        cmds.append(f"1 0 0 1 {self.x4 + 6} {table_top - 15} Tm (Amount) Tj")
+        cmds.append("ET")
+        return cmds
+
+    def _page_stream(self, chunk: List[List[str]], page_num: int, total_pages: int, is_last_page: bool) -> bytes:
+        x0, x1, x2, x3, x4, x5 = self.x0, self.x1, self.x2, self.x3, self.x4, self.x5
+        table_bottom = self.table_top - self.header_h - (len(chunk) * self.row_h)
+        header_bottom = self.table_top - self.header_h
+
+        cmds: List[str] = []
+
+        if self.compress:
+            # Encabezado compartido (Form XObject); la grilla completa también,
+            # salvo en la última página si queda con menos filas.
+            cmds.append("/Hd Do")
+            if len(chunk) == self.rows_per_page:
+                cmds.append("/Gr Do")
+            else:
+                cmds.extend(self._grid_cmds(len(chunk)))
+        else:
+            cmds.extend(self._title_cmds())
+            cmds.extend(self._grid_cmds(len(chunk)))
+            cmds.extend(self._header_label_cmds())
+
+        # Rows (regular)
+        cmds.append("BT")
+        cmds.append("/F1 10 Tf")
+        for i, (c_date, c_doc, c_company, c_desc, c_amount) in enumerate(chunk):
+            y_text = header_bottom - (i * self.row_h) - 13
+            cmds.append(f"1 0 0 1 {x0 + 6} {y_text} Tm ({_pdf_text(c_date)}) Tj")
+            cmds.append(f"1 0 0 1 {x1 + 6} {y_text} Tm ({_pdf_text(c_doc)}) Tj")
+            cmds.append(f"1 0 0 1 {x2 + 6} {y_text} Tm ({_pdf_text(c_company)}) Tj")
+            cmds.append(f"1 0 0 1 {x3 + 6} {y_text} Tm ({_pdf_text(c_desc)}) Tj")
+            cmds.append(f"1 0 0 1 {x4 + 6} {y_text} Tm ({_pdf_text(c_amount)}) Tj")
+        cmds.append("ET")
+
+        # TOTAL (solo en la última página)
+        if is_last_page and self.total_amount_has_value:
+            total_text = f"TOTAL: {AmountClass.format_currency(self.total_amount)}"
+            total_x = x5 - 6 - _approx_text_width(total_text, 12)
+            cmds.append("BT")
+            cmds.append("/F2 12 Tf")
+            cmds.append(f"1 0 0 1 {total_x:.2f} {table_bottom - 26} Tm ({_pdf_escape(total_text)}) Tj")
+            cmds.append("ET")
+
+        # Footer page number
+        footer = f"Página {page_num} de {total_pages}"
+        footer_x = self.page_width - self.margin_x - _approx_text_width(footer, 9)
+        cmds.append("BT")
+        cmds.append("/F1 9 Tf")
+        cmds.append(f"1 0 0 1 {footer_x:.2f} 40 Tm ({_pdf_escape(footer)}) Tj")
+        cmds.append("ET")
+
+        return ("\n".join(cmds)).encode("latin-1", errors="replace")
+
+    def _stream_obj(self, stream: bytes, extra: bytes = b"") -> bytes:
+        if self.compress:
+            stream = zlib.compress(stream, self.compress_level)
+            extra += b" /Filter /FlateDecode"
+        return b"<<" + extra + b" /Length " + str(len(stream)).encode("ascii") + b" >>\nstream\n" + stream + b"\nendstream"
+
+    def _write_shared_resources(self) -> Iterator[bytes]:
+        """
+        Modo comprimido: un único diccionario de recursos para todas las páginas
+        y el encabezado/grilla estáticos como Form XObjects.
+        """
+        fonts = f"/Font << /F1 {self.font_regular} 0 R /F2 {self.font_bold} 0 R >>"
+
+        font_resources = self._reserve()
+        yield self._write_obj(font_resources, f"<< {fonts} >>".encode("ascii"))
+
+        form = f" /Type /XObject /Subtype /Form /BBox [0 0 {self.page_width} {self.page_height}] /Resources {font_resources} 0 R".encode("ascii")
+
+        header_obj = self._reserve()
+        header = self._title_cmds() + self._header_label_cmds()
+        yield self._write_obj(header_obj, self._stream_obj(("\n".join(header)).encode("latin-1", errors="replace"), form))
+
+        grid_obj = self._reserve()
+        grid = self._grid_cmds(self.rows_per_page)
+        yield self._write_obj(grid_obj, self._stream_obj(("\n".join(grid)).encode("latin-1", errors="replace"), form))
+
+        self.resources_obj = self._reserve()
+        yield self._write_obj(
+            self.resources_obj,
+            f"<< {fonts} /XObject << /Hd {header_obj} 0 R /Gr {grid_obj} 0 R >> >>".encode("ascii"),
+        )
+
+    def _write_page(self, chunk: List[List[str]], is_last_page: bool) -> Iterator[bytes]:
+        page_num = len(self.page_objs) + 1
+        # total_rows viene de un COUNT previo; si el rango creció mientras se
+        # escribía, nunca mostrar un total menor a la página actual.
+        expected_pages = ((max(self.total_rows, 1) - 1) // self.rows_per_page) + 1
+        total_pages = page_num if is_last_page else max(expected_pages, page_num + 1)
+
+        stream = self._page_stream(chunk, page_num, total_pages, is_last_page)
+        content_obj = self._reserve()
+        yield self._write_obj(content_obj, self._stream_obj(stream))
+
+        if self.compress:
+            resources = f"{self.resources_obj} 0 R".encode("ascii")
+        else:
+            resources = (
+                b"<< /Font << /F1 "
+                + f"{self.font_regular} 0 R".encode("ascii")
+                + b" /F2 "
+                + f"{self.font_bold} 0 R".encode("ascii")
+                + b" >>"
+            )
+            resources += b" >>"
+
+        page_obj = self._reserve()
+        yield self._write_obj(
+            page_obj,
+            b"<< /Type /Page /Parent "
+            + f"{self.pages_obj} 0 R".encode("ascii")
+            + b" /MediaBox [0 0 612 792] "
+            + b"/Resources "
+            + resources
+            + b" /Contents "
+            + f"{content_obj} 0 R".encode("ascii")
+            + b" >>",
+        )
+        self.page_objs.append(page_obj)
+
+    def stream(self, rows: Iterable) -> Iterator[bytes]:
+        """
+        Genera el PDF por partes. `rows` puede ser un cursor del lado servidor
+        (yield_per); solo se retiene en memoria la página en curso.
+        """
+        yield self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+        # Fonts
+        self.font_regular = self._reserve()
+        yield self._write_obj(self.font_regular, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        self.font_bold = self._reserve()
+        yield self._write_obj(self.font_bold, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
+
+        # El árbol de páginas se reserva ahora (las páginas lo referencian como /Parent)
+        # y se escribe al final, cuando se conocen todos los /Kids.
+        self.pages_obj = self._reserve()
+
+        if self.compress:
+            yield from self._write_shared_resources()
+
+        chunk: List[List[str]] = []
+        for r in rows:
+            if len(chunk) == self.rows_per_page:
+                yield from self._write_page(chunk, is_last_page=False)
+                chunk = []
+            chunk.append(self._table_row(r))
+            self.rows_written += 1
+
+        if not chunk:
+            chunk = [["", "", "(Sin resultados en el rango)", "", ""]]
+        yield from self._write_page(chunk, is_last_page=True)
+
+        # Pages tree
+        kids = b" ".join([f"{n} 0 R".encode("ascii") for n in self.page_objs])
+        yield self._write_obj(
+            self.pages_obj,
+            b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(len(self.page_objs)).encode("ascii") + b" >>",
+        )
+
+        # Catalog
+        catalog_obj = self._reserve()
+        yield self._write_obj(catalog_obj, b"<< /Type /Catalog /Pages " + f"{self.pages_obj} 0 R".encode("ascii") + b" >>")
+
+        # xref + trailer
+        xref_start = self.offset
+        size = len(self.xref_positions)
+        xref = bytearray()
+        xref.extend(f"xref\n0 {size}\n".encode("ascii"))
+        xref.extend(b"0000000000 65535 f \n")
+        for pos in self.xref_positions[1:]:
+            xref.extend(f"{pos:010d} 00000 n \n".encode("ascii"))
+        xref.extend(
+            b"trailer\n<< /Size "
+            + str(size).encode("ascii")
+            + b" /Root "
+            + f"{catalog_obj} 0 R".encode("ascii")
+            + b" >>\nstartxref\n"
+            + str(xref_start).encode("ascii")
+            + b"\n%%EOF\n"
+        )
+        yield self._write(bytes(xref))
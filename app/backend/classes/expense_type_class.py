@@ -1,20 +1,34 @@
 from app.backend.db.models import ExpenseTypeModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 from datetime import datetime
-from sqlalchemy import func
 
 class ExpenseTypeClass:
     def __init__(self, db):
         self.db = db
 
-    def get_all(self, page=0, items_per_page=10):
+    def _list_row(self, expense_type):
+        return {
+            "id": expense_type.id,
+            "expense_type": expense_type.expense_type,
+            "added_date": expense_type.added_date.strftime("%Y-%m-%d %H:%M:%S") if expense_type.added_date else None,
+            "updated_date": expense_type.updated_date.strftime("%Y-%m-%d %H:%M:%S") if expense_type.updated_date else None
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             base_query = self.db.query(ExpenseTypeModel).order_by(ExpenseTypeModel.id.desc())
             
+            if cursor is not None or limit is not None:
+                return PaginationClass(base_query, ExpenseTypeModel.id, descending=True).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = self.db.query(func.count(ExpenseTypeModel.id)).scalar()
+                total_items, exact = CountCacheClass(self.db).count(base_query, ExpenseTypeModel.__tablename__, estimate=not exact_count)
                 total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or (total_pages > 0 and page > total_pages):
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = base_query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -22,15 +36,11 @@ class ExpenseTypeClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": expense_type.id,
-                    "expense_type": expense_type.expense_type,
-                    "added_date": expense_type.added_date.strftime("%Y-%m-%d %H:%M:%S") if expense_type.added_date else None,
-                    "updated_date": expense_type.updated_date.strftime("%Y-%m-%d %H:%M:%S") if expense_type.updated_date else None
-                } for expense_type in data]
+                serialized_data = [self._list_row(expense_type) for expense_type in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -40,12 +50,7 @@ class ExpenseTypeClass:
             else:
                 data = base_query.all()
 
-                serialized_data = [{
-                    "id": expense_type.id,
-                    "expense_type": expense_type.expense_type,
-                    "added_date": expense_type.added_date.strftime("%Y-%m-%d %H:%M:%S") if expense_type.added_date else None,
-                    "updated_date": expense_type.updated_date.strftime("%Y-%m-%d %H:%M:%S") if expense_type.updated_date else None
-                } for expense_type in data]
+                serialized_data = [self._list_row(expense_type) for expense_type in data]
 
                 return serialized_data
 
@@ -101,6 +106,7 @@ class ExpenseTypeClass:
 
             self.db.add(new_expense_type)
             self.db.commit()
+            CountCacheClass.invalidate(ExpenseTypeModel.__tablename__)
             self.db.refresh(new_expense_type)
 
             return {
@@ -138,6 +144,7 @@ class ExpenseTypeClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                CountCacheClass.invalidate(ExpenseTypeModel.__tablename__)
                 return 'success'
             else:
                 return "No data found"
@@ -1,8 +1,27 @@
+import hashlib
+import os
+import shutil
+import uuid
+from datetime import datetime
 from pathlib import Path
 
 from fastapi import HTTPException, UploadFile
+from sqlalchemy.exc import IntegrityError
+
+from app.backend.classes.thumbnail_class import ThumbnailClass
+from app.backend.db.models import FileBlobModel, FileRefModel
 
 class FileClass:
+    # Tamaño máximo por tipo de documento en MB; <TIPO>_UPLOAD_MAX_MB lo cambia
+    # (ej. TAX_RETURNS_UPLOAD_MAX_MB=80).
+    UPLOAD_LIMITS_MB = {
+        "invoices": 20,
+        "expense_reports": 20,
+        "budgets": 20,
+        "tax_returns": 50,
+    }
+    UPLOAD_CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, db):
         self.db = db
 
@@ -10,37 +29,280 @@ class FileClass:
         # Ej producción: /var/www/api.kcgeneralsolutions.ca/public_html/files
         self.base_dir = Path(__file__).resolve().parents[3] / "files"
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.blob_dir = self.base_dir / "blobs"
+        self.thumbnails = ThumbnailClass(self.base_dir)
 
     def _safe_full_path(self, remote_path: str) -> Path:
         """
         Evita path traversal: remote_path debe quedarse dentro de base_dir.
         """
-        rp = (remote_path or "").replace("\\", "/").lstrip("/")
-        full_path = (self.base_dir / rp).resolve(strict=False)
+        full_path = (self.base_dir / self._normalize(remote_path)).resolve(strict=False)
         base = self.base_dir.resolve(strict=False)
         if base != full_path and base not in full_path.parents:
             raise HTTPException(status_code=400, detail="Ruta de archivo inválida")
         return full_path
 
-    def upload(self, file: UploadFile, remote_path: str) -> str:
+    @classmethod
+    def upload_limit(cls, kind: str) -> int:
+        """
+        Límite en bytes para las subidas de `kind` (clave de UPLOAD_LIMITS_MB).
+        """
+        mb = os.environ.get(f"{kind.upper()}_UPLOAD_MAX_MB") or cls.UPLOAD_LIMITS_MB[kind]
+        return int(float(mb) * 1024 * 1024)
+
+    def upload_stream(self, file: UploadFile, remote_path: str, max_bytes: int | None = None) -> dict:
+        """
+        Copia el archivo por bloques a un temporal (atómico: nunca queda un
+        archivo a medio escribir) calculando SHA-256 y tamaño en la misma pasada,
+        y corta con 413 apenas se supera max_bytes. El contenido se guarda una
+        sola vez como blob y remote_path queda enlazado a él (ver _add_ref).
+        Las miniaturas se encolan al final, sin esperarlas.
+        """
+        full_path = self._safe_full_path(remote_path)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.blob_dir / f".{uuid.uuid4().hex}.tmp"
+        sha256 = hashlib.sha256()
+        size = 0
         try:
-            full_path = self._safe_full_path(remote_path)
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Leer el contenido del archivo
-            # Resetear la posición del stream al inicio si es necesario
             file.file.seek(0)
-            content = file.file.read()
-            file.file.seek(0)  # Resetear para posibles lecturas futuras
-            
-            with open(full_path, "wb") as f:
-                f.write(content)
-            return f"Archivo subido exitosamente a {remote_path}"
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = file.file.read(self.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"El archivo supera el máximo de {round(max_bytes / (1024 * 1024), 2):g} MB",
+                        )
+                    sha256.update(chunk)
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            digest = sha256.hexdigest()
+            if self.db is not None:
+                self._add_ref(self._normalize(remote_path), digest, size, tmp_path=tmp_path, full_path=full_path)
+            else:
+                self._store_blob(tmp_path, digest)
+                self._link(self._blob_path(digest), full_path)
         except HTTPException:
+            tmp_path.unlink(missing_ok=True)
             raise
         except Exception as e:
+            tmp_path.unlink(missing_ok=True)
             raise HTTPException(status_code=500, detail=f"Error al subir archivo: {str(e)}")
 
+        if ThumbnailClass.supports(full_path):
+            # Si remote_path se reemplazó, las miniaturas anteriores ya no corresponden.
+            self.thumbnails.delete(full_path)
+            self.thumbnails.schedule(full_path)
+
+        return {"remote_path": remote_path, "size": size, "sha256": digest}
+
+    # --- Blobs por contenido -------------------------------------------------
+    # Cada contenido distinto se guarda una vez en files/blobs/aa/bb/<sha256>
+    # y cada remote_path es un hard link a ese blob: los lectores (/files/view,
+    # /download/{id}) siguen abriendo remote_path sin pasar por la base.
+    # file_refs mapea remote_path -> blob y file_blobs lleva cuántos
+    # remote_path apuntan a cada uno; el blob se borra cuando llega a cero.
+    # Sumar/restar referencias y tocar el archivo del blob se hace con la fila
+    # bloqueada (_lock_blob) hasta el commit, así una subida y un delete del
+    # mismo contenido no se cruzan entre la verificación y el enlace.
+
+    @staticmethod
+    def _normalize(remote_path: str) -> str:
+        return (remote_path or "").replace("\\", "/").lstrip("/")
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest[2:4] / digest
+
+    def _store_blob(self, tmp_path: Path, digest: str):
+        """
+        Mueve el temporal a su blob, o lo descarta si ese contenido ya existe.
+        """
+        blob_path = self._blob_path(digest)
+        if blob_path.exists():
+            tmp_path.unlink()
+            return
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob_path)
+
+    def _link(self, blob_path: Path, full_path: Path):
+        """
+        remote_path -> blob como hard link (vía temporal + rename, así se puede
+        reemplazar un archivo existente). Si el sistema de archivos no admite
+        hard links se copia: el archivo queda bien, solo sin deduplicar.
+        """
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_link = full_path.with_name(f".{full_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            os.link(blob_path, tmp_link)
+        except OSError:
+            shutil.copyfile(blob_path, tmp_link)
+        os.replace(tmp_link, full_path)
+
+    def _lock_blob(self, digest: str) -> bool:
+        """
+        SELECT ... FOR UPDATE de la fila del blob (hasta el commit). Devuelve
+        True si existe. En SQLite no hay bloqueo de fila: las escrituras ya se
+        serializan a nivel de base.
+        """
+        return self.db.query(FileBlobModel.sha256).filter(FileBlobModel.sha256 == digest).with_for_update().scalar() is not None
+
+    def _add_ref(self, remote_path: str, digest: str, size: int, tmp_path: Path | None = None, full_path: Path | None = None):
+        """
+        Registra remote_path -> blob. En una subida (tmp_path/full_path), con la
+        fila del blob ya bloqueada y sumada, guarda el blob desde el temporal
+        si no está (un delete pudo borrarlo al quedar en cero) y enlaza
+        full_path, todo antes del commit.
+        """
+        for attempt in range(2):
+            now = datetime.utcnow()
+            linked = False
+            try:
+                exists = self._lock_blob(digest)
+                ref = self.db.get(FileRefModel, remote_path)
+                previous = ref.sha256 if ref is not None and ref.sha256 != digest else None
+
+                if ref is None or previous:
+                    if exists:
+                        self.db.query(FileBlobModel).filter(FileBlobModel.sha256 == digest).update(
+                            {FileBlobModel.ref_count: FileBlobModel.ref_count + 1, FileBlobModel.updated_date: now},
+                            synchronize_session=False,
+                        )
+                    else:
+                        self.db.add(FileBlobModel(sha256=digest, size=size, ref_count=1, added_date=now, updated_date=now))
+                    if ref is None:
+                        self.db.add(FileRefModel(remote_path=remote_path, sha256=digest, added_date=now))
+                    else:
+                        ref.sha256 = digest
+                    self.db.flush()
+
+                if tmp_path is not None:
+                    self._store_blob(tmp_path, digest)
+                    self._link(self._blob_path(digest), full_path)
+                    linked = True
+
+                if previous:
+                    self._release(previous)
+                self.db.commit()
+            except IntegrityError:
+                # Otro request creó la fila del mismo blob al mismo tiempo: reintentar sumando.
+                self.db.rollback()
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self.db.rollback()
+                if linked:
+                    full_path.unlink(missing_ok=True)
+                raise
+            return
+
+    def _release(self, digest: str) -> bool:
+        """
+        Descuenta una referencia al blob. Si queda en cero borra la fila y el
+        archivo antes del commit de quien llama, con la fila bloqueada: una
+        subida del mismo contenido que espera el bloqueo ya no lo encuentra y
+        lo repone desde su temporal. Devuelve True si lo borró.
+        """
+        if not self._lock_blob(digest):
+            return False
+        self.db.query(FileBlobModel).filter(FileBlobModel.sha256 == digest).update(
+            {FileBlobModel.ref_count: FileBlobModel.ref_count - 1, FileBlobModel.updated_date: datetime.utcnow()},
+            synchronize_session=False,
+        )
+        removed = (
+            self.db.query(FileBlobModel)
+            .filter(FileBlobModel.sha256 == digest, FileBlobModel.ref_count <= 0)
+            .delete(synchronize_session=False)
+        )
+        if removed:
+            self._blob_path(digest).unlink(missing_ok=True)
+        return bool(removed)
+
+    def upload(self, file: UploadFile, remote_path: str, max_bytes: int | None = None) -> str:
+        self.upload_stream(file, remote_path, max_bytes=max_bytes)
+        return f"Archivo subido exitosamente a {remote_path}"
+
+    @staticmethod
+    def _hash_file(path: Path):
+        sha256 = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(FileClass.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                sha256.update(chunk)
+        return sha256.hexdigest(), size
+
+    def _check_hard_links(self):
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        probe = self.blob_dir / f".{uuid.uuid4().hex}.probe"
+        probe.touch()
+        try:
+            os.link(probe, probe.with_suffix(".link"))
+            probe.with_suffix(".link").unlink()
+        except OSError as e:
+            raise RuntimeError(f"el sistema de archivos de {self.base_dir} no admite hard links: {e}")
+        finally:
+            probe.unlink()
+
+    def dedupe(self, dirs=None, dry_run: bool = False) -> dict:
+        """
+        Pasa los archivos existentes (carpetas de cada tipo de documento) al
+        esquema de blobs: registra su referencia y reemplaza los duplicados
+        por hard links al blob. Los remote_path ya registrados se saltan, así
+        que se puede correr de nuevo. Con dry_run solo calcula lo que liberaría.
+        """
+        if not dry_run:
+            self._check_hard_links()
+
+        stats = {"files": 0, "blobs": 0, "duplicates": 0, "bytes_total": 0, "bytes_reclaimed": 0}
+        registered = {remote_path for remote_path, in self.db.query(FileRefModel.remote_path)}
+        seen = set()
+
+        for kind in dirs or self.UPLOAD_LIMITS_MB:
+            root = self.base_dir / kind
+            if not root.is_dir():
+                continue
+            for path in sorted(root.rglob("*")):
+                if not path.is_file() or path.name.startswith("."):
+                    continue
+                remote_path = path.relative_to(self.base_dir).as_posix()
+                if remote_path in registered:
+                    continue
+
+                digest, size = self._hash_file(path)
+                blob_path = self._blob_path(digest)
+                stats["files"] += 1
+                stats["bytes_total"] += size
+
+                if blob_path.exists() and os.path.samefile(blob_path, path):
+                    pass
+                elif digest in seen or blob_path.exists():
+                    stats["duplicates"] += 1
+                    # Si el archivo ya tenía otro hard link, borrar este nombre no libera nada.
+                    if path.stat().st_nlink == 1:
+                        stats["bytes_reclaimed"] += size
+                else:
+                    stats["blobs"] += 1
+                seen.add(digest)
+
+                if dry_run:
+                    continue
+                if not blob_path.exists():
+                    blob_path.parent.mkdir(parents=True, exist_ok=True)
+                    os.link(path, blob_path)
+                elif not os.path.samefile(blob_path, path):
+                    self._link(blob_path, path)
+                self._add_ref(remote_path, digest, size)
+
+        return stats
+
     def temporal_upload(self, file_content: bytes, remote_path: str) -> str:
         try:
             full_path = self._safe_full_path(remote_path)
@@ -54,13 +316,29 @@ class FileClass:
             raise HTTPException(status_code=500, detail=f"Error al subir archivo: {str(e)}")
 
     def delete(self, remote_path: str) -> str:
+        """
+        Borra remote_path y descuenta su referencia; el blob solo se borra
+        cuando ya no lo usa ningún otro remote_path.
+        """
         try:
             full_path = self._safe_full_path(remote_path)
-            if full_path.exists():
-                full_path.unlink()
-                return "success"
-            else:
+            ref = self.db.get(FileRefModel, self._normalize(remote_path)) if self.db is not None else None
+            if not full_path.exists() and ref is None:
                 raise HTTPException(status_code=404, detail=f"Archivo no encontrado: {remote_path}")
+
+            full_path.unlink(missing_ok=True)
+            self.thumbnails.delete(full_path)
+            if ref is not None:
+                digest = ref.sha256
+                try:
+                    self.db.delete(ref)
+                    self.db.flush()
+                    self._release(digest)
+                    self.db.commit()
+                except Exception:
+                    self.db.rollback()
+                    raise
+            return "success"
         except HTTPException:
             raise
         except Exception as e:
@@ -79,10 +357,17 @@ class FileClass:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error al descargar archivo: {str(e)}")
 
+    @staticmethod
+    def view_url(remote_path: str) -> str:
+        """
+        URL relativa de /files/view. No toca el disco (no requiere instanciar FileClass).
+        """
+        # root_path del backend es /api
+        rp = (remote_path or "").replace("\\", "/").lstrip("/")
+        return f"/api/files/view/{rp}"
+
     def get(self, remote_path: str) -> str:
         try:
-            # root_path del backend es /api
-            rp = (remote_path or "").replace("\\", "/").lstrip("/")
-            return f"/api/files/view/{rp}"
+            return self.view_url(remote_path)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error al generar URL del archivo: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,103 @@
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+
+@lru_cache(maxsize=256)
+def media_type_for(suffix: str) -> str:
+    media_type, _ = mimetypes.guess_type(f"file{suffix}")
+    return media_type or "application/octet-stream"
+
+
+class FileServeClass:
+    """
+    Respuestas de archivos de files/ con validadores de caché: ETag fuerte,
+    Last-Modified, Cache-Control según la carpeta y 304 si el cliente ya tiene
+    la versión actual. Los pedidos con Range (e If-Range) los resuelve
+    FileResponse con estos mismos validadores.
+    """
+
+    # Política por prefijo de remote_path para las URLs que nombran el archivo
+    # (/files/view, /files/download). Los adjuntos se guardan con nombre único
+    # por subida (timestamp + uuid): el contenido de esa URL no cambia nunca.
+    CACHE_CONTROL = [
+        ("invoices/", "private, max-age=31536000, immutable"),
+        ("expense_reports/", "private, max-age=31536000, immutable"),
+        ("budgets/", "private, max-age=31536000, immutable"),
+        ("tax_returns/", "private, max-age=31536000, immutable"),
+    ]
+    DEFAULT_CACHE_CONTROL = "private, max-age=300"
+    # Para las URLs por id (/download/{id}): el documento puede cambiar de archivo.
+    REVALIDATE = "private, no-cache"
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir.resolve(strict=False)
+
+    @staticmethod
+    def etag(st: os.stat_result) -> str:
+        # inode + mtime + tamaño: con los blobs (hard links) el mismo contenido
+        # comparte inode, así que tiene el mismo ETag en cualquier remote_path.
+        return f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    def cache_control(self, full_path: Path) -> str:
+        try:
+            remote_path = full_path.relative_to(self.base_dir).as_posix()
+        except ValueError:
+            return self.DEFAULT_CACHE_CONTROL
+        for prefix, policy in self.CACHE_CONTROL:
+            if remote_path.startswith(prefix):
+                return policy
+        return self.DEFAULT_CACHE_CONTROL
+
+    @staticmethod
+    def not_modified(request: Request, etag: str, mtime: float) -> bool:
+        """
+        If-None-Match (comparación débil, como pide RFC 9110 para GET) y, si no
+        viene, If-Modified-Since.
+        """
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return any(
+                candidate.strip() == "*" or candidate.strip().removeprefix("W/") == etag
+                for candidate in if_none_match.split(",")
+            )
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def response(self, full_path: Path, request: Request, download: bool = False,
+                 media_type: str | None = None, cache_control: str | None = None) -> Response:
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+        headers = {
+            "ETag": self.etag(st),
+            "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+            "Cache-Control": cache_control or self.cache_control(full_path),
+        }
+        if self.not_modified(request, headers["ETag"], st.st_mtime):
+            return Response(status_code=304, headers=headers)
+
+        if download:
+            headers["Content-Disposition"] = f"attachment; filename={full_path.name}"
+        return FileResponse(
+            path=full_path,
+            media_type=media_type or media_type_for(full_path.suffix.lower()),
+            headers=headers,
+            stat_result=st,
+        )
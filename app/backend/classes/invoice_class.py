@@ -3,39 +3,69 @@ import platform
 from datetime import datetime
 
 from fastapi import HTTPException
-from sqlalchemy import func, cast, String
+from sqlalchemy import cast, String
 
+from app.backend.classes.amount_class import AmountClass
+from app.backend.classes.daily_rollup_class import DailyRollupClass
 from app.backend.classes.file_class import FileClass
+from app.backend.classes.thumbnail_class import ThumbnailClass
 from app.backend.db.models import InvoiceModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 
 
 class InvoiceClass:
     def __init__(self, db):
         self.db = db
 
-    def _file_url(self, remote_path: str | None):
+    def _file_url(self, remote_path: str | None, route: str = "view"):
         if not remote_path:
             return None
         rp = str(remote_path).replace("\\", "/").lstrip("/")
 
         public_base = (os.environ.get("PUBLIC_BASE_URL") or "").strip().rstrip("/")
         if public_base:
-            return f"{public_base}/api/files/view/{rp}"
+            return f"{public_base}/api/files/{route}/{rp}"
 
         if platform.system() == "Linux":
-            return f"https://api.kcgeneralsolutions.ca/api/files/view/{rp}"
+            return f"https://api.kcgeneralsolutions.ca/api/files/{route}/{rp}"
 
-        return f"http://127.0.0.1:8000/api/files/view/{rp}"
+        return f"http://127.0.0.1:8000/api/files/{route}/{rp}"
 
-    def get_all(self, page=0, items_per_page=10):
+    def _thumb_url(self, remote_path: str | None):
+        if not ThumbnailClass.supports(remote_path):
+            return None
+        return self._file_url(remote_path, f"thumb/{ThumbnailClass.LIST_SIZE}")
+
+    def _list_row(self, inv):
+        return {
+            "id": inv.id,
+            "declared_status_id": getattr(inv, "declared_status_id", None),
+            "invoice_number": inv.invoice_number,
+            "company": inv.company,
+            "amount": getattr(inv, "amount", None),
+            "file": inv.file,
+            "file_url": self._file_url(inv.file),
+            "thumb_url": self._thumb_url(inv.file),
+            "invoice_date": inv.invoice_date.strftime("%Y-%m-%d") if getattr(inv, "invoice_date", None) else None,
+            "added_date": inv.added_date.strftime("%Y-%m-%d %H:%M:%S") if inv.added_date else None,
+            "updated_date": inv.updated_date.strftime("%Y-%m-%d %H:%M:%S") if inv.updated_date else None,
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             base_query = self.db.query(InvoiceModel).order_by(InvoiceModel.id.desc())
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(base_query, InvoiceModel.id, descending=True).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = self.db.query(func.count(InvoiceModel.id)).scalar()
+                total_items, exact = CountCacheClass(self.db).count(base_query, InvoiceModel.__tablename__, estimate=not exact_count)
                 total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or (total_pages > 0 and page > total_pages):
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = base_query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -43,21 +73,11 @@ class InvoiceClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": inv.id,
-                    "declared_status_id": getattr(inv, "declared_status_id", None),
-                    "invoice_number": inv.invoice_number,
-                    "company": inv.company,
-                    "amount": getattr(inv, "amount", None),
-                    "file": inv.file,
-                    "file_url": self._file_url(inv.file),
-                    "invoice_date": inv.invoice_date.strftime("%Y-%m-%d") if getattr(inv, "invoice_date", None) else None,
-                    "added_date": inv.added_date.strftime("%Y-%m-%d %H:%M:%S") if inv.added_date else None,
-                    "updated_date": inv.updated_date.strftime("%Y-%m-%d %H:%M:%S") if inv.updated_date else None,
-                } for inv in data]
+                serialized_data = [self._list_row(inv) for inv in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -65,18 +85,7 @@ class InvoiceClass:
                 }
 
             data = base_query.all()
-            return [{
-                "id": inv.id,
-                "declared_status_id": getattr(inv, "declared_status_id", None),
-                "invoice_number": inv.invoice_number,
-                "company": inv.company,
-                "amount": getattr(inv, "amount", None),
-                "file": inv.file,
-                "file_url": self._file_url(inv.file),
-                "invoice_date": inv.invoice_date.strftime("%Y-%m-%d") if getattr(inv, "invoice_date", None) else None,
-                "added_date": inv.added_date.strftime("%Y-%m-%d %H:%M:%S") if inv.added_date else None,
-                "updated_date": inv.updated_date.strftime("%Y-%m-%d %H:%M:%S") if inv.updated_date else None,
-            } for inv in data]
+            return [self._list_row(inv) for inv in data]
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -184,13 +193,16 @@ class InvoiceClass:
                 invoice_number=inv_num,
                 company=str(payload.get("company") or ""),
                 amount=str(payload.get("amount") or ""),
+                amount_numeric=AmountClass.parse(payload.get("amount")),
                 file=payload.get("file"),
                 invoice_date=payload.get("invoice_date"),
                 added_date=datetime.utcnow(),
                 updated_date=datetime.utcnow(),
             )
             self.db.add(inv)
+            DailyRollupClass(self.db).add_invoice(inv.invoice_date, inv.amount_numeric)
             self.db.commit()
+            CountCacheClass.invalidate(InvoiceModel.__tablename__)
             self.db.refresh(inv)
             return {
                 "status": "Factura registrada exitosamente.",
@@ -227,13 +239,19 @@ class InvoiceClass:
             except Exception:
                 return {"status": "error", "message": "invoice_number inválido"}
 
+            rollup = DailyRollupClass(self.db)
+            rollup.add_invoice(inv.invoice_date, inv.amount_numeric, sign=-1)
+
             inv.company = str(payload.get("company") or "")
             inv.amount = str(payload.get("amount") or "")
+            inv.amount_numeric = AmountClass.parse(inv.amount)
             if isinstance(payload, dict) and "file" in payload and payload.get("file") is not None:
                 inv.file = payload.get("file")
             if isinstance(payload, dict) and "invoice_date" in payload:
                 inv.invoice_date = payload.get("invoice_date")
             inv.updated_date = datetime.utcnow()
+
+            rollup.add_invoice(inv.invoice_date, inv.amount_numeric)
             self.db.commit()
             self.db.refresh(inv)
             return {
@@ -283,8 +301,10 @@ class InvoiceClass:
                 except Exception as e:
                     return {"status": "error", "message": f"Error al eliminar archivo: {str(e)}"}
 
+            DailyRollupClass(self.db).add_invoice(inv.invoice_date, inv.amount_numeric, sign=-1)
             self.db.delete(inv)
             self.db.commit()
+            CountCacheClass.invalidate(InvoiceModel.__tablename__)
             return "success"
         except Exception as e:
             self.db.rollback()
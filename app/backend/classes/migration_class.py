@@ -0,0 +1,152 @@
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from app.backend.db.models import SchemaMigrationModel
+
+MIGRATIONS_PACKAGE = "app.backend.db.migrations"
+
+
+class MigrationClass:
+    """
+    Migraciones de esquema versionadas (app/backend/db/migrations/vNNNN_*.py).
+
+    Cada script define description, upgrade(conn) y downgrade(conn); las
+    versiones aplicadas quedan en schema_migrations. Cada migración corre en
+    su propia transacción, pero en MySQL el DDL hace commit implícito: por eso
+    las migraciones deben poder re-ejecutarse (ver create_index/drop_index y
+    add_column/drop_column).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    @staticmethod
+    def migrations():
+        """
+        [(version, nombre, módulo)] ordenadas por versión.
+        """
+        package = importlib.import_module(MIGRATIONS_PACKAGE)
+        found = []
+        for info in pkgutil.iter_modules(package.__path__):
+            match = re.match(r"v(\d+)_", info.name)
+            if not match:
+                continue
+            module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{info.name}")
+            found.append((int(match.group(1)), info.name, module))
+        found.sort(key=lambda m: m[0])
+
+        versions = [version for version, _, _ in found]
+        if len(versions) != len(set(versions)):
+            raise RuntimeError("versiones de migración repetidas")
+        return found
+
+    def applied(self):
+        """
+        {versión: fecha} de las migraciones aplicadas.
+        """
+        with self.engine.begin() as conn:
+            SchemaMigrationModel.__table__.create(conn, checkfirst=True)
+            rows = conn.execute(
+                SchemaMigrationModel.__table__.select().order_by(SchemaMigrationModel.version)
+            ).fetchall()
+        return {row.version: row.applied_date for row in rows}
+
+    def status(self):
+        applied = self.applied()
+        return [
+            {"version": version, "name": name, "description": getattr(module, "description", ""), "applied_date": applied.get(version)}
+            for version, name, module in self.migrations()
+        ]
+
+    def upgrade(self, target=None):
+        """
+        Aplica las pendientes hasta target (o todas). Devuelve las versiones aplicadas.
+        """
+        applied = self.applied()
+        done = []
+        for version, name, module in self.migrations():
+            if version in applied or (target is not None and version > target):
+                continue
+            with self.engine.begin() as conn:
+                module.upgrade(conn)
+                conn.execute(
+                    SchemaMigrationModel.__table__.insert().values(
+                        version=version, name=name, applied_date=datetime.utcnow()
+                    )
+                )
+            done.append(version)
+        return done
+
+    def downgrade(self, target=0):
+        """
+        Revierte, de la más nueva a la más vieja, las aplicadas con versión > target.
+        """
+        applied = self.applied()
+        done = []
+        for version, name, module in reversed(self.migrations()):
+            if version not in applied or version <= target:
+                continue
+            with self.engine.begin() as conn:
+                module.downgrade(conn)
+                conn.execute(
+                    SchemaMigrationModel.__table__.delete().where(SchemaMigrationModel.version == version)
+                )
+            done.append(version)
+        return done
+
+    @staticmethod
+    def _index_names(conn, table):
+        return {index["name"] for index in inspect(conn).get_indexes(table)}
+
+    @staticmethod
+    def create_index(conn, table, name, columns):
+        """
+        CREATE INDEX si la tabla existe y el índice no. Devuelve True si lo creó.
+        """
+        if not inspect(conn).has_table(table) or name in MigrationClass._index_names(conn, table):
+            return False
+        quote = conn.dialect.identifier_preparer.quote
+        conn.execute(text(f"CREATE INDEX {quote(name)} ON {quote(table)} ({', '.join(quote(c) for c in columns)})"))
+        return True
+
+    @staticmethod
+    def drop_index(conn, table, name):
+        if not inspect(conn).has_table(table) or name not in MigrationClass._index_names(conn, table):
+            return False
+        quote = conn.dialect.identifier_preparer.quote
+        if conn.dialect.name == "mysql":
+            conn.execute(text(f"DROP INDEX {quote(name)} ON {quote(table)}"))
+        else:
+            conn.execute(text(f"DROP INDEX {quote(name)}"))
+        return True
+
+    @staticmethod
+    def _column_names(conn, table):
+        return {column["name"] for column in inspect(conn).get_columns(table)}
+
+    @staticmethod
+    def add_column(conn, table, column):
+        """
+        ALTER TABLE ADD COLUMN si la tabla existe y la columna no. `column` es
+        la Column del modelo (ej. InvoiceModel.__table__.c.amount_numeric):
+        el tipo se compila para el dialecto de la conexión. Devuelve True si la agregó.
+        """
+        if not inspect(conn).has_table(table) or column.name in MigrationClass._column_names(conn, table):
+            return False
+        quote = conn.dialect.identifier_preparer.quote
+        column_type = column.type.compile(dialect=conn.dialect)
+        null = "NULL" if column.nullable else "NOT NULL"
+        conn.execute(text(f"ALTER TABLE {quote(table)} ADD COLUMN {quote(column.name)} {column_type} {null}"))
+        return True
+
+    @staticmethod
+    def drop_column(conn, table, name):
+        if not inspect(conn).has_table(table) or name not in MigrationClass._column_names(conn, table):
+            return False
+        quote = conn.dialect.identifier_preparer.quote
+        conn.execute(text(f"ALTER TABLE {quote(table)} DROP COLUMN {quote(name)}"))
+        return True
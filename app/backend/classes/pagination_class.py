@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+
+class PaginationClass:
+    """
+    Paginación por cursor (keyset/seek) sobre (sort_key, id).
+
+    En vez de OFFSET (que recorre y descarta todas las filas anteriores) filtra
+    por la clave de la última fila vista, así que cualquier página cuesta lo
+    mismo que la primera y no hace falta COUNT. Los cursores son opacos
+    (base64url de JSON) y sirven para avanzar (next) o retroceder (prev).
+
+    sort_column debe ser NOT NULL; con sort_column=None se ordena solo por id.
+    """
+
+    MAX_LIMIT = 1000
+
+    def __init__(self, query, id_column, sort_column=None, descending=False):
+        # El orden lo pone seek(): se descarta el order_by que traiga la query.
+        self.query = query.order_by(None)
+        self.id_column = id_column
+        self.sort_column = sort_column
+        self.descending = descending
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        if isinstance(value, date):
+            return {"d": value.isoformat()}
+        if isinstance(value, Decimal):
+            return {"n": str(value)}
+        return value
+
+    @staticmethod
+    def _load(value):
+        if isinstance(value, dict):
+            if "dt" in value:
+                return datetime.fromisoformat(value["dt"])
+            if "d" in value:
+                return date.fromisoformat(value["d"])
+            if "n" in value:
+                return Decimal(value["n"])
+            raise ValueError("invalid cursor value")
+        return value
+
+    @staticmethod
+    def encode_cursor(key, direction="next") -> str:
+        payload = {"k": [PaginationClass._dump(v) for v in key], "d": direction}
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """
+        (clave, dirección) de un cursor; ValueError si no es válido.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            key = [PaginationClass._load(v) for v in payload["k"]]
+            direction = payload["d"]
+        except Exception:
+            raise ValueError("invalid cursor")
+        if direction not in ("next", "prev"):
+            raise ValueError("invalid cursor")
+        return key, direction
+
+    def _columns(self):
+        if self.sort_column is None:
+            return [self.id_column]
+        return [self.sort_column, self.id_column]
+
+    def _key(self, row):
+        return [getattr(row, column.key) for column in self._columns()]
+
+    def _after(self, key, forward):
+        """
+        Filas que van después de key en el orden de la query (forward=True)
+        o antes (forward=False).
+        """
+        greater = forward != self.descending
+        columns = self._columns()
+        conditions = []
+        for i, column in enumerate(columns):
+            equal = [columns[j] == key[j] for j in range(i)]
+            step = column > key[i] if greater else column < key[i]
+            conditions.append(and_(*equal, step))
+        return or_(*conditions)
+
+    def _order(self, forward):
+        ascending = forward != self.descending
+        return [column.asc() if ascending else column.desc() for column in self._columns()]
+
+    def seek(self, cursor=None, limit=10):
+        """
+        Una página a partir del cursor (o la primera sin cursor).
+
+        Devuelve {"items", "next_cursor", "prev_cursor"}. Lee limit + 1 filas
+        para saber si hay más sin contar. ValueError si el cursor no es válido.
+        """
+        limit = max(1, min(int(limit), self.MAX_LIMIT))
+
+        key, direction = (None, "next") if cursor is None else self.decode_cursor(cursor)
+        if key is not None and len(key) != len(self._columns()):
+            raise ValueError("invalid cursor")
+        forward = direction == "next"
+
+        q = self.query
+        if key is not None:
+            q = q.filter(self._after(key, forward))
+        rows = q.order_by(*self._order(forward)).limit(limit + 1).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = prev_cursor = None
+        if rows:
+            # Avanzando, hay filas antes si se llegó con cursor; retrocediendo,
+            # hay filas después (las de la página desde la que se volvió).
+            has_next = has_more if forward else True
+            has_prev = (key is not None) if forward else has_more
+            if has_next:
+                next_cursor = self.encode_cursor(self._key(rows[-1]), "next")
+            if has_prev:
+                prev_cursor = self.encode_cursor(self._key(rows[0]), "prev")
+
+        return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+    def response(self, serialize, cursor=None, limit=10):
+        """
+        seek() con el formato de respuesta de los get_all: mismos errores
+        que el modo por página, sin total_items/total_pages.
+        """
+        try:
+            result = self.seek(cursor, limit)
+        except ValueError:
+            return {"status": "error", "message": "Invalid cursor"}
+
+        if not result["items"]:
+            return {"status": "error", "message": "No data found"}
+
+        return {
+            "items_per_page": max(1, min(int(limit), self.MAX_LIMIT)),
+            "next_cursor": result["next_cursor"],
+            "prev_cursor": result["prev_cursor"],
+            "data": [serialize(row) for row in result["items"]],
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+
+def _hashpw(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def _checkpw(password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # Hash vacío o con formato que no es bcrypt.
+        return False
+
+
+class PasswordHashClass:
+    """
+    bcrypt en un pool de threads acotado (bcrypt libera el GIL, así que los
+    threads corren en paralelo de verdad) para que los picos de login no ocupen
+    todos los workers de la API.
+
+    hash/verify bloquean al llamador (un thread del threadpool en las rutas
+    sync) mientras esperan lugar y resultado. hash_async/verify_async esperan
+    en el event loop y, si el pool está lleno, responden 503 de inmediato.
+
+    Configuración:
+        BCRYPT_ROUNDS                 costo (work factor) de los hashes nuevos (default 12)
+        BCRYPT_WORKERS                threads del pool (default: CPUs)
+        BCRYPT_QUEUE_SIZE             pedidos en espera además de los que corren (default 4 x workers)
+        BCRYPT_QUEUE_TIMEOUT_SECONDS  espera máxima por un lugar antes de responder 503 (default 5; solo hash/verify)
+    """
+
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+    _default_hashes = {}
+
+    @classmethod
+    def rounds(cls) -> int:
+        return int(os.environ.get("BCRYPT_ROUNDS") or 12)
+
+    @classmethod
+    def _pool(cls):
+        with cls._lock:
+            if cls._executor is None:
+                workers = int(os.environ.get("BCRYPT_WORKERS") or (os.cpu_count() or 2))
+                queue_size = int(os.environ.get("BCRYPT_QUEUE_SIZE") or workers * 4)
+                cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+                cls._slots = threading.BoundedSemaphore(workers + queue_size)
+            return cls._executor, cls._slots
+
+    @classmethod
+    def _submit(cls, fn, *args, wait=True):
+        """
+        Encola en el pool. Si ya hay workers + cola ocupados, espera un lugar
+        hasta el timeout (o nada, con wait=False) y luego rechaza con 503
+        (backpressure) en vez de acumular pedidos sin límite.
+        """
+        executor, slots = cls._pool()
+        if wait:
+            acquired = slots.acquire(timeout=float(os.environ.get("BCRYPT_QUEUE_TIMEOUT_SECONDS") or 5))
+        else:
+            acquired = slots.acquire(blocking=False)
+        if not acquired:
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado, intente nuevamente",
+                headers={"Retry-After": "1"},
+            )
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    @classmethod
+    def hash(cls, password: str, rounds: int | None = None) -> str:
+        return cls._submit(_hashpw, password, rounds or cls.rounds()).result()
+
+    @classmethod
+    def verify(cls, password: str, hashed_password: str) -> bool:
+        if not password or not hashed_password:
+            return False
+        return cls._submit(_checkpw, password, hashed_password).result()
+
+    @classmethod
+    async def hash_async(cls, password: str, rounds: int | None = None) -> str:
+        return await asyncio.wrap_future(cls._submit(_hashpw, password, rounds or cls.rounds(), wait=False))
+
+    @classmethod
+    async def verify_async(cls, password: str, hashed_password: str) -> bool:
+        if not password or not hashed_password:
+            return False
+        return await asyncio.wrap_future(cls._submit(_checkpw, password, hashed_password, wait=False))
+
+    @staticmethod
+    def cost(hashed_password: str) -> int | None:
+        """
+        Work factor de un hash bcrypt ("$2b$12$..." -> 12).
+        """
+        try:
+            return int(hashed_password.split("$")[2])
+        except (AttributeError, IndexError, ValueError):
+            return None
+
+    @classmethod
+    def needs_rehash(cls, hashed_password: str) -> bool:
+        return cls.cost(hashed_password) != cls.rounds()
+
+    @classmethod
+    def default_hash(cls, password: str) -> str:
+        """
+        Hash de una contraseña por defecto fija (alta de clientes, reseteo):
+        se calcula una vez por proceso y costo, no en cada insert.
+        """
+        key = (password, cls.rounds())
+        hashed = cls._default_hashes.get(key)
+        if hashed is None:
+            hashed = cls.hash(password)
+            cls._default_hashes[key] = hashed
+        return hashed
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetricsClass:
+    """
+    Métricas de un pool de conexiones: cuántas veces se pidió una conexión,
+    cuánto se esperó por ella, timeouts y conexiones abiertas/invalidadas.
+
+    Se identifican por el pool_logging_name del engine, que SQLAlchemy
+    conserva cuando recrea el pool (dispose()), así las métricas no se pierden.
+    """
+
+    registry = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidated = 0
+
+    @classmethod
+    def get(cls, name):
+        with cls._registry_lock:
+            metrics = cls.registry.get(name)
+            if metrics is None:
+                metrics = cls.registry[name] = cls(name)
+            return metrics
+
+    @classmethod
+    def register(cls, name, engine):
+        """
+        Asocia el engine (sync o async) para leer el estado actual de su pool
+        y contar conexiones nuevas e invalidadas (caídas o pre-ping fallido).
+        """
+        metrics = cls.get(name)
+        metrics.engine = engine
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "connect", lambda dbapi_conn, record: metrics.record_connect())
+        event.listen(sync_engine, "invalidate", lambda dbapi_conn, record, exception: metrics.record_invalidate())
+        return metrics
+
+    def record_wait(self, elapsed_ms, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_ms += elapsed_ms
+            self.max_wait_ms = max(self.max_wait_ms, elapsed_ms)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidate(self):
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self):
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            data = {
+                "name": self.name,
+                "checkouts": self.checkouts,
+                "avg_wait_ms": round(self.wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidated": self.invalidated,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            })
+        return data
+
+    @classmethod
+    def snapshot_all(cls):
+        with cls._registry_lock:
+            registered = [m for m in cls.registry.values() if m.engine is not None]
+        return [m.snapshot() for m in registered]
+
+    @classmethod
+    def reset_all(cls):
+        with cls._registry_lock:
+            registered = list(cls.registry.values())
+        for metrics in registered:
+            metrics.reset()
+
+
+class _MeteredPoolMixin:
+    """
+    Mide la espera de cada checkout (lo que tarda connect() en entregar una
+    conexión: cola del pool, apertura y pre-ping) y los timeouts del pool.
+    """
+
+    @property
+    def metrics(self):
+        return PoolMetricsClass.get(self._orig_logging_name or "default")
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.metrics.record_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
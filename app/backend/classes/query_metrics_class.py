@@ -0,0 +1,210 @@
+import contextvars
+import heapq
+import os
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+# Con QUERY_METRICS_DEBUG=1 cada respuesta lleva X-DB-* (cantidad, tiempo, N+1).
+DEBUG = (os.environ.get("QUERY_METRICS_DEBUG") or "").lower() in ("1", "true", "yes")
+# Veces que una misma sentencia (fingerprint) se repite en un request para marcarla como N+1.
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("QUERY_METRICS_N_PLUS_ONE") or 5)
+SLOWEST = 5
+STATEMENT_MAX_CHARS = 500
+
+# Métricas del request en curso (None fuera de un request: jobs, comandos).
+# El objeto es mutable, así que lo comparten el threadpool de los endpoints
+# sync y los generadores de StreamingResponse.
+_current = contextvars.ContextVar("query_metrics", default=None)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Sentencia normalizada: sin literales, listas IN colapsadas y espacios simples.
+    """
+    s = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    s = re.sub(r"\b\d+(?:\.\d+)?\b", "?", s)
+    s = re.sub(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)", "(?)", s)
+    s = re.sub(r"%\(\w+\)s|%s|:\w+", "?", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+class QueryMetricsClass:
+    """
+    Consultas SQL de un request: cantidad, tiempo total, las más lentas y las
+    sentencias repetidas (candidatas a N+1).
+
+    Los hooks de SQLAlchemy (install()) van sobre la clase Engine, así que
+    cubren cualquier engine; QueryMetricsMiddleware abre y cierra la medición
+    por request y la suma al agregado que expone /internal/metrics.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest = []  # heap de (ms, sentencia)
+        self.fingerprints = Counter()
+
+    def record(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.fingerprints[fingerprint(statement)] += 1
+        item = (elapsed_ms, statement[:STATEMENT_MAX_CHARS])
+        if len(self.slowest) < SLOWEST:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def n_plus_one(self):
+        return {fp: n for fp, n in self.fingerprints.items() if n >= N_PLUS_ONE_THRESHOLD}
+
+    @staticmethod
+    def current():
+        return _current.get()
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("query_metrics_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        starts = conn.info.get("query_metrics_start")
+        if metrics is None or not starts:
+            return
+        metrics.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+    @staticmethod
+    def _handle_error(exception_context):
+        # Si la sentencia falla no llega after_cursor_execute: descartar su inicio.
+        conn = exception_context.connection
+        starts = conn.info.get("query_metrics_start") if conn is not None else None
+        if starts:
+            starts.pop()
+
+    _installed = False
+
+    @classmethod
+    def install(cls):
+        if cls._installed:
+            return
+        event.listen(Engine, "before_cursor_execute", cls._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", cls._after_cursor_execute)
+        event.listen(Engine, "handle_error", cls._handle_error)
+        cls._installed = True
+
+
+class QueryMetricsAggregate:
+    """
+    Totales por ruta (método + template) desde que arrancó el proceso.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.slowest = []
+            self.n_plus_one = Counter()
+
+    def add(self, route, metrics: QueryMetricsClass):
+        with self._lock:
+            r = self.routes.get(route)
+            if r is None:
+                r = self.routes[route] = {"requests": 0, "queries": 0, "db_ms": 0.0, "max_queries": 0, "n_plus_one_requests": 0}
+            r["requests"] += 1
+            r["queries"] += metrics.count
+            r["db_ms"] += metrics.total_ms
+            r["max_queries"] = max(r["max_queries"], metrics.count)
+
+            repeated = metrics.n_plus_one()
+            if repeated:
+                r["n_plus_one_requests"] += 1
+                for fp in repeated:
+                    self.n_plus_one[(route, fp)] += 1
+
+            for ms, statement in metrics.slowest:
+                item = (ms, route, statement)
+                if len(self.slowest) < SLOWEST:
+                    heapq.heappush(self.slowest, item)
+                elif item > self.slowest[0]:
+                    heapq.heapreplace(self.slowest, item)
+
+    def snapshot(self):
+        with self._lock:
+            routes = [
+                {
+                    "route": route,
+                    "requests": r["requests"],
+                    "queries": r["queries"],
+                    "avg_queries": round(r["queries"] / r["requests"], 2),
+                    "max_queries": r["max_queries"],
+                    "db_ms": round(r["db_ms"], 3),
+                    "avg_db_ms": round(r["db_ms"] / r["requests"], 3),
+                    "n_plus_one_requests": r["n_plus_one_requests"],
+                }
+                for route, r in self.routes.items()
+            ]
+            routes.sort(key=lambda r: r["db_ms"], reverse=True)
+            return {
+                "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+                "routes": routes,
+                "slowest_statements": [
+                    {"ms": round(ms, 3), "route": route, "statement": statement}
+                    for ms, route, statement in sorted(self.slowest, reverse=True)
+                ],
+                "n_plus_one": [
+                    {"route": route, "fingerprint": fp, "requests": n}
+                    for (route, fp), n in self.n_plus_one.most_common(20)
+                ],
+            }
+
+
+query_metrics = QueryMetricsAggregate()
+
+
+class QueryMetricsMiddleware:
+    """
+    Middleware ASGI: mide las consultas de cada request HTTP. Con
+    QUERY_METRICS_DEBUG agrega X-DB-Query-Count, X-DB-Time-Ms y X-DB-N-Plus-One
+    (lo que se consultó hasta enviar los headers; en StreamingResponse el resto
+    del cuerpo queda solo en /internal/metrics).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        QueryMetricsClass.install()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = QueryMetricsClass()
+        token = _current.set(metrics)
+
+        async def send_with_headers(message):
+            if DEBUG and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(metrics.count)
+                headers["X-DB-Time-Ms"] = f"{metrics.total_ms:.3f}"
+                headers["X-DB-N-Plus-One"] = str(len(metrics.n_plus_one()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "(sin ruta)"
+            query_metrics.add(f"{scope.get('method', '')} {path}", metrics)
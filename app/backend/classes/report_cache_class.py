@@ -0,0 +1,104 @@
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+class ReportCacheClass:
+    """
+    Caché en disco de reportes ya generados (files/report_cache).
+
+    La clave es un hash de los parámetros del reporte y de la versión de los
+    datos, así que una entrada nunca queda desactualizada: si los datos cambian
+    cambia la clave. Las entradas que dejan de pedirse salen por LRU cuando el
+    total supera REPORT_CACHE_MAX_BYTES.
+    """
+
+    # Subir si cambia el formato de salida, para no servir PDFs con el layout anterior.
+    FORMAT_VERSION = "1"
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+    # Temporales de escrituras que no terminaron (proceso caído a mitad del stream).
+    STALE_TMP_SECONDS = 3600
+    # evict() no borra entradas usadas hace menos que esto: get() devuelve la
+    # ruta y el FileResponse la abre recién al enviar la respuesta.
+    IN_USE_SECONDS = 300
+
+    def __init__(self, max_bytes=None, suffix=".pdf"):
+        self.base_dir = Path(__file__).resolve().parents[3] / "files" / "report_cache"
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.suffix = suffix
+        if max_bytes is None:
+            max_bytes = int(os.environ.get("REPORT_CACHE_MAX_BYTES") or self.DEFAULT_MAX_BYTES)
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def key(cls, *parts) -> str:
+        raw = "|".join("" if p is None else str(p) for p in (cls.FORMAT_VERSION, *parts))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.base_dir / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Path | None:
+        path = self.path(key)
+        try:
+            # mtime = último uso, para el LRU
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store_stream(self, key: str, chunks, is_current=None):
+        """
+        Devuelve los chunks tal cual y, si el stream se completa, deja el archivo
+        en caché (rename atómico). Si el cliente corta, se descarta el temporal.
+
+        is_current(): se llama al terminar el stream; si devuelve False (los
+        datos cambiaron mientras se generaba y el contenido ya no corresponde a
+        key) tampoco se guarda.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.base_dir, suffix=".tmp")
+        stored = False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            if is_current is None or is_current():
+                os.replace(tmp, self.path(key))
+                stored = True
+        finally:
+            if not stored:
+                try:
+                    os.unlink(tmp)
+                except FileNotFoundError:
+                    pass
+        self.evict()
+
+    def evict(self):
+        """
+        Borra las entradas menos usadas hasta quedar bajo max_bytes, salvo las
+        usadas en los últimos IN_USE_SECONDS (pueden estar enviándose).
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        for path in self.base_dir.iterdir():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.suffix == ".tmp":
+                if now - st.st_mtime > self.STALE_TMP_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes or now - mtime < self.IN_USE_SECONDS:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
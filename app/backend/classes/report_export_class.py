@@ -0,0 +1,406 @@
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from fastapi import HTTPException
+
+from app.backend.classes.amount_class import AmountClass
+from app.backend.classes.file_class import FileClass
+from app.backend.db.models import BudgetModel, ExpenseReportModel, InvoiceModel, TaxReturnModel
+
+
+class _StreamBuffer(io.RawIOBase):
+    """
+    Destino no "seekable" para zipfile: acumula lo escrito hasta que se drena.
+    zipfile detecta que no puede hacer seek y escribe data descriptors.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# Caracteres de control que XML 1.0 no admite (el texto libre de description puede traerlos).
+_XML_INVALID = dict.fromkeys(c for c in range(32) if c not in (9, 10, 13))
+
+_XLSX_EPOCH = date(1899, 12, 30)
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilos: 0 = general, 1 = fecha (numFmt 14), 2 = fecha y hora, 3 = monto "#,##0.00" (numFmt 4), 4 = encabezado en negrita
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class ReportExportClass:
+    """
+    Exportación masiva (CSV / XLSX) de documentos por rango de fechas.
+
+    Todo es un pipeline de generadores: las filas salen de un cursor del lado
+    servidor (yield_per) y se escriben por bloques, así que la memoria no
+    depende del tamaño del rango.
+    """
+
+    # dataset -> (modelo, columna de fecha del rango, [(encabezado, atributo, tipo)])
+    # tipo: "text" | "int" | "date" | "datetime" | "amount"
+    DATASETS = {
+        "expenses": (
+            ExpenseReportModel,
+            "document_date",
+            [
+                ("ID", "id", "int"),
+                ("Date", "document_date", "datetime"),
+                ("Document #", "document_number", "int"),
+                ("Company", "company", "text"),
+                ("Description", "description", "text"),
+                ("Amount", "amount", "amount"),
+                ("File", "file", "text"),
+            ],
+        ),
+        "invoices": (
+            InvoiceModel,
+            "invoice_date",
+            [
+                ("ID", "id", "int"),
+                ("Date", "invoice_date", "date"),
+                ("Invoice #", "invoice_number", "int"),
+                ("Company", "company", "text"),
+                ("Declared status", "declared_status_id", "int"),
+                ("Amount", "amount", "amount"),
+                ("File", "file", "text"),
+            ],
+        ),
+        "budgets": (
+            BudgetModel,
+            "budget_date",
+            [
+                ("ID", "id", "int"),
+                ("Date", "budget_date", "date"),
+                ("Budget #", "budget_number", "text"),
+                ("Company", "company", "text"),
+                ("Amount", "amount", "amount"),
+                ("File", "file", "text"),
+            ],
+        ),
+        # tax_returns no tiene fecha de documento (period es texto libre): se filtra por added_date.
+        "tax_returns": (
+            TaxReturnModel,
+            "added_date",
+            [
+                ("ID", "id", "int"),
+                ("Date", "added_date", "datetime"),
+                ("Period", "period", "text"),
+                ("Amount", "amount", "amount"),
+                ("File", "file", "text"),
+            ],
+        ),
+    }
+
+    FORMATS = {
+        "csv": ("text/csv; charset=utf-8", "csv"),
+        "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    }
+
+    # Filas por bloque leído de la DB y por bloque escrito a la respuesta.
+    CHUNK_SIZE = 1000
+
+    # Adjuntos que ya vienen comprimidos: se guardan sin volver a comprimir.
+    STORED_SUFFIXES = {".pdf", ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".zip", ".docx", ".xlsx"}
+    FILE_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, db):
+        self.db = db
+
+    def columns(self, dataset: str):
+        return self.DATASETS[dataset][2]
+
+    def rows(self, dataset: str, since_dt: datetime, end_dt: datetime, chunk_size=None) -> Iterator[tuple]:
+        """
+        Tuplas (valores ya normalizados, en el orden de columns()) del rango, ordenadas por fecha e id.
+        """
+        model, date_attr, columns = self.DATASETS[dataset]
+        date_col = getattr(model, date_attr)
+        date_kind = next(kind for _, attr, kind in columns if attr == date_attr)
+        if date_kind == "date":
+            # Columna DATE: el rango se compara por día.
+            since_value, end_value = since_dt.date(), end_dt.date()
+        else:
+            since_value, end_value = since_dt, end_dt
+
+        # amount_numeric se lee al lado de amount: las filas aún sin migrar se parsean acá.
+        attrs = [attr for _, attr, _ in columns]
+        query = (
+            self.db.query(*[getattr(model, attr) for attr in attrs], model.amount_numeric)
+            .filter(date_col >= since_value)
+            .filter(date_col <= end_value)
+            .order_by(date_col.asc(), model.id.asc())
+            .execution_options(stream_results=True)
+            .yield_per(chunk_size or self.CHUNK_SIZE)
+        )
+
+        amount_index = attrs.index("amount")
+        for row in query:
+            values = list(row[:-1])
+            amount = row[-1]
+            if amount is not None:
+                amount = AmountClass.normalize(amount)
+            else:
+                amount = AmountClass.parse(values[amount_index])
+            if amount is not None:
+                values[amount_index] = amount
+            # Si no se puede parsear queda el texto original, como en el PDF.
+            yield tuple(values)
+
+    def stream(self, dataset: str, fmt: str, since_dt: datetime, end_dt: datetime) -> Iterator[bytes]:
+        columns = self.columns(dataset)
+        rows = self.rows(dataset, since_dt, end_dt)
+        if fmt == "xlsx":
+            return self.xlsx_chunks(columns, rows)
+        return self.csv_chunks(columns, rows)
+
+    @classmethod
+    def _csv_value(cls, value, kind):
+        if value is None:
+            return ""
+        if kind == "datetime" and isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if kind == "date" and isinstance(value, (date, datetime)):
+            return value.strftime("%Y-%m-%d")
+        if kind == "amount" and isinstance(value, Decimal):
+            return format(value, "f")
+        return value
+
+    @classmethod
+    def csv_chunks(cls, columns, rows: Iterable[tuple]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        kinds = [kind for _, _, kind in columns]
+
+        # BOM: Excel abre el CSV como UTF-8 (tildes en company/description).
+        buffer.write("\ufeff")
+        writer.writerow([header for header, _, _ in columns])
+
+        pending = 0
+        for row in rows:
+            writer.writerow([cls._csv_value(v, k) for v, k in zip(row, kinds)])
+            pending += 1
+            if pending == cls.CHUNK_SIZE:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        yield buffer.getvalue().encode("utf-8")
+
+    @classmethod
+    def _xlsx_cell(cls, ref, value, kind):
+        if value is None or value == "":
+            return ""
+        if kind in ("int", "amount"):
+            style = ' s="3"' if kind == "amount" else ""
+            try:
+                number = Decimal(value)
+            except Exception:
+                number = None
+            if number is not None and number.is_finite():
+                return f'<c r="{ref}"{style}><v>{format(number, "f")}</v></c>'
+        elif kind in ("date", "datetime") and isinstance(value, (date, datetime)):
+            if isinstance(value, datetime):
+                delta = value - datetime.combine(_XLSX_EPOCH, datetime.min.time())
+                serial = delta.days + delta.seconds / 86400
+                return f'<c r="{ref}" s="2"><v>{serial!r}</v></c>'
+            return f'<c r="{ref}" s="1"><v>{(value - _XLSX_EPOCH).days}</v></c>'
+
+        text = escape(str(value).translate(_XML_INVALID))
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    @classmethod
+    def xlsx_chunks(cls, columns, rows: Iterable[tuple]) -> Iterator[bytes]:
+        """
+        XLSX mínimo (una hoja, strings inline) escrito como ZIP en streaming:
+        sin tabla de shared strings, nada se acumula en memoria.
+        """
+        out = _StreamBuffer()
+        letters = [_column_letter(i) for i in range(len(columns))]
+        kinds = [kind for _, _, kind in columns]
+
+        with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+            zf.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+            zf.writestr(
+                "xl/workbook.xml",
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets></workbook>',
+            )
+            zf.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+            zf.writestr("xl/styles.xml", _XLSX_STYLES)
+            yield out.drain()
+
+            with zf.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True) as sheet:
+                header = "".join(
+                    f'<c r="{letter}1" t="inlineStr" s="4"><is><t>{escape(title)}</t></is></c>'
+                    for letter, (title, _, _) in zip(letters, columns)
+                )
+                sheet.write(
+                    (
+                        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        f'<sheetData><row r="1">{header}</row>'
+                    ).encode("utf-8")
+                )
+
+                parts = []
+                for row_num, row in enumerate(rows, start=2):
+                    cells = "".join(
+                        cls._xlsx_cell(f"{letter}{row_num}", value, kind)
+                        for letter, value, kind in zip(letters, row, kinds)
+                    )
+                    parts.append(f'<row r="{row_num}">{cells}</row>')
+                    if len(parts) == cls.CHUNK_SIZE:
+                        sheet.write("".join(parts).encode("utf-8"))
+                        parts.clear()
+                        yield out.drain()
+
+                parts.append("</sheetData></worksheet>")
+                sheet.write("".join(parts).encode("utf-8"))
+
+        yield out.drain()
+
+    def attachments_zip(self, datasets, since_dt: datetime, end_dt: datetime) -> Iterator[bytes]:
+        """
+        ZIP con los adjuntos de los documentos del rango, armado mientras se
+        envía: cada archivo se lee del disco por bloques y cada bloque sale a
+        la respuesta antes de leer el siguiente. Por dataset queda una carpeta
+        <dataset>/ con los archivos (<fecha>_<id>_<nombre>) y su manifest.csv:
+        las columnas de la exportación CSV más la ruta dentro del ZIP y el
+        estado del archivo (included / missing / no_file).
+
+        El manifest se escribe a un temporal en disco mientras se recorren las
+        filas y se agrega al final de cada carpeta, así la consulta se recorre
+        una sola vez. En memoria solo queda el índice central del ZIP (un
+        registro chico por archivo).
+        """
+        files = FileClass(None)
+        out = _StreamBuffer()
+
+        with zipfile.ZipFile(out, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for dataset in datasets:
+                columns = self.columns(dataset)
+                kinds = [kind for _, _, kind in columns]
+                date_index = [attr for _, attr, _ in columns].index(self.DATASETS[dataset][1])
+                file_index = [attr for _, attr, _ in columns].index("file")
+
+                with tempfile.TemporaryFile(mode="w+", encoding="utf-8", newline="") as manifest:
+                    writer = csv.writer(manifest)
+                    manifest.write("\ufeff")
+                    writer.writerow([header for header, _, _ in columns] + ["Archive path", "Status"])
+
+                    for row in self.rows(dataset, since_dt, end_dt):
+                        archive_path, status = "", "no_file"
+                        remote_path = row[file_index]
+                        if remote_path:
+                            full_path = None
+                            try:
+                                full_path = files._safe_full_path(remote_path)
+                            except HTTPException:
+                                pass
+                            status = "missing"
+                            if full_path is not None and full_path.is_file():
+                                day = row[date_index].strftime("%Y-%m-%d") if row[date_index] else "sin-fecha"
+                                archive_path = f"{dataset}/{day}_{row[0]}_{full_path.name}"
+                                yield from self._zip_file(zf, out, full_path, archive_path)
+                                status = "included"
+
+                        writer.writerow([self._csv_value(v, k) for v, k in zip(row, kinds)] + [archive_path, status])
+
+                    manifest.seek(0)
+                    with zf.open(f"{dataset}/manifest.csv", mode="w", force_zip64=True) as entry:
+                        while True:
+                            chunk = manifest.read(self.FILE_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            entry.write(chunk.encode("utf-8"))
+                            yield out.drain()
+
+        yield out.drain()
+
+    def _zip_file(self, zf, out, full_path, archive_path) -> Iterator[bytes]:
+        info = zipfile.ZipInfo.from_file(full_path, archive_path, strict_timestamps=False)
+        if full_path.suffix.lower() in self.STORED_SUFFIXES:
+            info.compress_type = zipfile.ZIP_STORED
+        else:
+            info.compress_type = zipfile.ZIP_DEFLATED
+        with open(full_path, "rb") as src, zf.open(info, mode="w") as entry:
+            while True:
+                chunk = src.read(self.FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                entry.write(chunk)
+                yield out.drain()
@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.backend.classes.expense_report_class import ExpenseReportClass
+from app.backend.classes.expense_report_pdf_class import ExpenseReportPdfClass
+from app.backend.db import database
+from app.backend.db.models import ReportJobModel
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Configuración del pool local (sin broker externo):
+#   REPORT_JOB_WORKERS   cantidad de workers (default 2)
+#   REPORT_JOB_EXECUTOR  "thread" (default) o "process"
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_process_worker():
+    # El hijo hereda (fork) las conexiones del padre: no reutilizarlas.
+    database.engine.dispose(close=False)
+    database.report_engine.dispose(close=False)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get("REPORT_JOB_WORKERS") or 2)
+            if (os.environ.get("REPORT_JOB_EXECUTOR") or "thread").lower() == "process":
+                _executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        return _executor
+
+
+def run_job(job_id: int):
+    """
+    Punto de entrada del worker (función de módulo para poder usarse con procesos).
+    """
+    db = database.SessionLocal()
+    try:
+        ReportJobClass(db).run(job_id)
+    finally:
+        db.close()
+
+
+class ReportJobClass:
+    """
+    Reportes generados en segundo plano. El estado vive en la tabla report_jobs,
+    así que sobrevive a reinicios: resume() re-encola lo que quedó pendiente.
+    """
+
+    # Cada cuánto se persiste el progreso mientras se renderiza.
+    PROGRESS_INTERVAL_SECONDS = 1.0
+    # Un job "running" sin progreso por más de esto se considera abandonado.
+    STALE_SECONDS = 300
+
+    def __init__(self, db):
+        self.db = db
+        self.base_dir = Path(__file__).resolve().parents[3] / "files" / "report_jobs"
+
+    def _is_admin(self, session_user) -> bool:
+        return getattr(session_user, "rol_id", None) == 1
+
+    def _serialize(self, job):
+        return {
+            "id": job.id,
+            "report_type": job.report_type,
+            "params": json.loads(job.params or "{}"),
+            "status": job.status,
+            "total_rows": job.total_rows,
+            "rows_processed": job.rows_processed,
+            "pages_written": job.pages_written,
+            "error": job.error,
+            "added_date": job.added_date.strftime("%Y-%m-%d %H:%M:%S") if job.added_date else None,
+            "started_date": job.started_date.strftime("%Y-%m-%d %H:%M:%S") if job.started_date else None,
+            "finished_date": job.finished_date.strftime("%Y-%m-%d %H:%M:%S") if job.finished_date else None,
+        }
+
+    def submit(self, job_id: int):
+        _get_executor().submit(run_job, job_id)
+
+    def store(self, user_id, since_dt: datetime, end_dt: datetime, compress=True):
+        now = datetime.utcnow()
+        job = ReportJobModel(
+            user_id=user_id,
+            report_type="expense_reports",
+            params=json.dumps({
+                "since_date": since_dt.isoformat(),
+                "end_date": end_dt.isoformat(),
+                "compress": bool(compress),
+            }),
+            status=QUEUED,
+            total_rows=0,
+            rows_processed=0,
+            pages_written=0,
+            added_date=now,
+            updated_date=now,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+
+        self.submit(job.id)
+        return self._serialize(job)
+
+    def _find(self, id, session_user=None):
+        q = self.db.query(ReportJobModel).filter(ReportJobModel.id == id)
+        if session_user is not None and not self._is_admin(session_user):
+            q = q.filter(ReportJobModel.user_id == session_user.id)
+        return q.first()
+
+    def get(self, id, session_user=None):
+        job = self._find(id, session_user)
+        if job is None:
+            return None
+        return self._serialize(job)
+
+    def file_path(self, id, session_user=None):
+        """
+        (job, ruta del PDF) o (job, None) si todavía no está listo.
+        """
+        job = self._find(id, session_user)
+        if job is None:
+            return None, None
+        if job.status != DONE or not job.file:
+            return self._serialize(job), None
+        return self._serialize(job), self.base_dir.parent / job.file
+
+    def _claim(self, job_id: int) -> bool:
+        # UPDATE condicional: si dos workers (o dos procesos de la API) toman el
+        # mismo job, solo uno lo pasa a running.
+        now = datetime.utcnow()
+        claimed = (
+            self.db.query(ReportJobModel)
+            .filter(ReportJobModel.id == job_id, ReportJobModel.status == QUEUED)
+            .update(
+                {
+                    ReportJobModel.status: RUNNING,
+                    ReportJobModel.started_date: now,
+                    ReportJobModel.updated_date: now,
+                },
+                synchronize_session=False,
+            )
+        )
+        self.db.commit()
+        return claimed == 1
+
+    def _progress(self, job_id: int, **values):
+        values["updated_date"] = datetime.utcnow()
+        self.db.query(ReportJobModel).filter(ReportJobModel.id == job_id).update(
+            {getattr(ReportJobModel, k): v for k, v in values.items()},
+            synchronize_session=False,
+        )
+        self.db.commit()
+
+    def run(self, job_id: int):
+        if not self._claim(job_id):
+            return
+
+        job = self.db.query(ReportJobModel).filter(ReportJobModel.id == job_id).first()
+        params = json.loads(job.params or "{}")
+        since_dt = datetime.fromisoformat(params["since_date"])
+        end_dt = datetime.fromisoformat(params["end_date"])
+
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        remote_path = f"report_jobs/report_job_{job_id}.pdf"
+        full_path = self.base_dir.parent / remote_path
+        tmp_path = full_path.with_suffix(".pdf.tmp")
+
+        try:
+            total_rows, _ = ExpenseReportClass(self.db).data_version(since_dt, end_dt)
+            self._progress(job_id, total_rows=total_rows)
+
+            # Las filas se leen con una sesión aparte: los commits de progreso
+            # no deben cerrar el cursor del lado servidor.
+            rows_db = database.ReportSessionLocal()
+            try:
+                rows = ExpenseReportClass(rows_db).stream_range(since_dt, end_dt)
+                writer = ExpenseReportPdfClass(since_dt, end_dt, total_rows, compress=params.get("compress", True))
+                last_progress = time.monotonic()
+                with open(tmp_path, "wb") as f:
+                    for chunk in writer.stream(rows):
+                        f.write(chunk)
+                        if time.monotonic() - last_progress >= self.PROGRESS_INTERVAL_SECONDS:
+                            self._progress(job_id, rows_processed=writer.rows_written, pages_written=len(writer.page_objs))
+                            last_progress = time.monotonic()
+            finally:
+                rows_db.close()
+
+            os.replace(tmp_path, full_path)
+            self._progress(
+                job_id,
+                status=DONE,
+                rows_processed=writer.rows_written,
+                pages_written=len(writer.page_objs),
+                file=remote_path,
+                finished_date=datetime.utcnow(),
+            )
+        except Exception as e:
+            self.db.rollback()
+            tmp_path.unlink(missing_ok=True)
+            traceback.print_exc()
+            self._progress(job_id, status=FAILED, error=str(e), finished_date=datetime.utcnow())
+
+    def resume(self):
+        """
+        Al iniciar la API: re-encola los running abandonados (sin progreso
+        reciente) y envía al pool todos los queued. La tabla la crea la migración v0005.
+        """
+        stale_before = datetime.utcnow() - timedelta(seconds=self.STALE_SECONDS)
+        self.db.query(ReportJobModel).filter(
+            ReportJobModel.status == RUNNING,
+            ReportJobModel.updated_date < stale_before,
+        ).update({ReportJobModel.status: QUEUED}, synchronize_session=False)
+        self.db.commit()
+
+        queued = [
+            job_id
+            for job_id, in self.db.query(ReportJobModel.id)
+            .filter(ReportJobModel.status == QUEUED)
+            .order_by(ReportJobModel.id.asc())
+        ]
+        for job_id in queued:
+            self.submit(job_id)
+        return len(queued)
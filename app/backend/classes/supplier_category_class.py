@@ -1,11 +1,22 @@
 from app.backend.db.models import SupplierCategoryModel, SupplierModel, CategoryModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 from datetime import datetime
 
 class SupplierCategoryClass:
     def __init__(self, db):
         self.db = db
 
-    def get_all(self, page=0, items_per_page=10):
+    def _list_row(self, supplier_category):
+        return {
+            "id": supplier_category.id,
+            "supplier_id": supplier_category.supplier_id,
+            "category_id": supplier_category.category_id,
+            "added_date": supplier_category.added_date.strftime("%Y-%m-%d %H:%M:%S") if supplier_category.added_date else None,
+            "updated_date": supplier_category.updated_date.strftime("%Y-%m-%d %H:%M:%S") if supplier_category.updated_date else None
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             query = (
                 self.db.query(
@@ -18,11 +29,16 @@ class SupplierCategoryClass:
                 .order_by(SupplierCategoryModel.id)
             )
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(query, SupplierCategoryModel.id).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = query.count()
-                total_pages = (total_items + items_per_page - 1)
+                total_items, exact = CountCacheClass(self.db).count(query, SupplierCategoryModel.__tablename__, estimate=not exact_count)
+                total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -30,16 +46,11 @@ class SupplierCategoryClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": supplier_category.id,
-                    "supplier_id": supplier_category.supplier_id,
-                    "category_id": supplier_category.category_id,
-                    "added_date": supplier_category.added_date.strftime("%Y-%m-%d %H:%M:%S") if supplier_category.added_date else None,
-                    "updated_date": supplier_category.updated_date.strftime("%Y-%m-%d %H:%M:%S") if supplier_category.updated_date else None
-                } for supplier_category in data]
+                serialized_data = [self._list_row(supplier_category) for supplier_category in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -49,13 +60,7 @@ class SupplierCategoryClass:
             else:
                 data = query.all()
 
-                serialized_data = [{
-                    "id": supplier_category.id,
-                    "supplier_id": supplier_category.supplier_id,
-                    "category_id": supplier_category.category_id,
-                    "added_date": supplier_category.added_date.strftime("%Y-%m-%d %H:%M:%S") if supplier_category.added_date else None,
-                    "updated_date": supplier_category.updated_date.strftime("%Y-%m-%d %H:%M:%S") if supplier_category.updated_date else None
-                } for supplier_category in data]
+                serialized_data = [self._list_row(supplier_category) for supplier_category in data]
 
                 return serialized_data
 
@@ -217,6 +222,7 @@ class SupplierCategoryClass:
 
             self.db.add(new_supplier_category)
             self.db.commit()
+            CountCacheClass.invalidate(SupplierCategoryModel.__tablename__)
             self.db.refresh(new_supplier_category)
 
             return {
@@ -261,6 +267,7 @@ class SupplierCategoryClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                CountCacheClass.invalidate(SupplierCategoryModel.__tablename__)
                 return 'success'
             else:
                 return "No data found"
@@ -272,6 +279,7 @@ class SupplierCategoryClass:
         try:
             deleted_count = self.db.query(SupplierCategoryModel).filter(SupplierCategoryModel.supplier_id == supplier_id).delete()
             self.db.commit()
+            CountCacheClass.invalidate(SupplierCategoryModel.__tablename__)
             return f"Se eliminaron {deleted_count} categorías del supplier {supplier_id}"
         except Exception as e:
             self.db.rollback()
@@ -282,6 +290,7 @@ class SupplierCategoryClass:
         try:
             deleted_count = self.db.query(SupplierCategoryModel).filter(SupplierCategoryModel.category_id == category_id).delete()
             self.db.commit()
+            CountCacheClass.invalidate(SupplierCategoryModel.__tablename__)
             return f"Se eliminaron {deleted_count} suppliers de la categoría {category_id}"
         except Exception as e:
             self.db.rollback()
@@ -1,4 +1,6 @@
 from app.backend.db.models import SupplierModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 from datetime import datetime
 from fastapi import HTTPException
 
@@ -30,7 +32,15 @@ class SupplierClass:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    def get_all(self, page=0, items_per_page=10):
+    def _list_row(self, supplier):
+        return {
+            "id": supplier.id,
+            "supplier": supplier.supplier,
+            "added_date": supplier.added_date.strftime("%Y-%m-%d %H:%M:%S") if supplier.added_date else None,
+            "updated_date": supplier.updated_date.strftime("%Y-%m-%d %H:%M:%S") if supplier.updated_date else None,
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             query = (
                 self.db.query(
@@ -42,11 +52,16 @@ class SupplierClass:
                 .order_by(SupplierModel.id)
             )
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(query, SupplierModel.id).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = query.count()
+                total_items, exact = CountCacheClass(self.db).count(query, SupplierModel.__tablename__, estimate=not exact_count)
                 total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -54,15 +69,11 @@ class SupplierClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": supplier.id,
-                    "supplier": supplier.supplier,
-                    "added_date": supplier.added_date.strftime("%Y-%m-%d %H:%M:%S") if supplier.added_date else None,
-                    "updated_date": supplier.updated_date.strftime("%Y-%m-%d %H:%M:%S") if supplier.updated_date else None,
-                } for supplier in data]
+                serialized_data = [self._list_row(supplier) for supplier in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -72,12 +83,7 @@ class SupplierClass:
             else:
                 data = query.all()
 
-                serialized_data = [{
-                    "id": supplier.id,
-                    "supplier": supplier.supplier,
-                    "added_date": supplier.added_date.strftime("%Y-%m-%d %H:%M:%S") if supplier.added_date else None,
-                    "updated_date": supplier.updated_date.strftime("%Y-%m-%d %H:%M:%S") if supplier.updated_date else None,
-                } for supplier in data]
+                serialized_data = [self._list_row(supplier) for supplier in data]
 
                 return serialized_data
 
@@ -122,6 +128,7 @@ class SupplierClass:
     
             self.db.add(new_supplier)
             self.db.commit()
+            CountCacheClass.invalidate(SupplierModel.__tablename__)
             self.db.refresh(new_supplier)
 
             return {
@@ -182,6 +189,7 @@ class SupplierClass:
             if data:
                 self.db.delete(data)
                 self.db.commit()
+                CountCacheClass.invalidate(SupplierModel.__tablename__)
                 return 'success'
             else:
                 return "No data found"
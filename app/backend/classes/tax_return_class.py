@@ -3,10 +3,12 @@ import platform
 from datetime import datetime
 
 from fastapi import HTTPException
-from sqlalchemy import func
 
+from app.backend.classes.amount_class import AmountClass
 from app.backend.classes.file_class import FileClass
 from app.backend.db.models import TaxReturnModel
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 
 
 class TaxReturnClass:
@@ -27,15 +29,31 @@ class TaxReturnClass:
 
         return f"http://127.0.0.1:8000/api/files/view/{rp}"
 
-    def get_all(self, page=0, items_per_page=10):
+    def _list_row(self, r):
+        return {
+            "id": r.id,
+            "period": r.period,
+            "amount": getattr(r, "amount", None),
+            "file": r.file,
+            "file_url": self._file_url(r.file),
+            "added_date": r.added_date.strftime("%Y-%m-%d %H:%M:%S") if r.added_date else None,
+            "updated_date": r.updated_date.strftime("%Y-%m-%d %H:%M:%S") if r.updated_date else None,
+        }
+
+    def get_all(self, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             base_query = self.db.query(TaxReturnModel).order_by(TaxReturnModel.id.desc())
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(base_query, TaxReturnModel.id, descending=True).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = self.db.query(func.count(TaxReturnModel.id)).scalar()
+                total_items, exact = CountCacheClass(self.db).count(base_query, TaxReturnModel.__tablename__, estimate=not exact_count)
                 total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or (total_pages > 0 and page > total_pages):
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = base_query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -43,18 +61,11 @@ class TaxReturnClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": r.id,
-                    "period": r.period,
-                    "amount": getattr(r, "amount", None),
-                    "file": r.file,
-                    "file_url": self._file_url(r.file),
-                    "added_date": r.added_date.strftime("%Y-%m-%d %H:%M:%S") if r.added_date else None,
-                    "updated_date": r.updated_date.strftime("%Y-%m-%d %H:%M:%S") if r.updated_date else None,
-                } for r in data]
+                serialized_data = [self._list_row(r) for r in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -62,15 +73,7 @@ class TaxReturnClass:
                 }
 
             data = base_query.all()
-            return [{
-                "id": r.id,
-                "period": r.period,
-                "amount": getattr(r, "amount", None),
-                "file": r.file,
-                "file_url": self._file_url(r.file),
-                "added_date": r.added_date.strftime("%Y-%m-%d %H:%M:%S") if r.added_date else None,
-                "updated_date": r.updated_date.strftime("%Y-%m-%d %H:%M:%S") if r.updated_date else None,
-            } for r in data]
+            return [self._list_row(r) for r in data]
 
         except Exception as e:
             return {"status": "error", "message": str(e)}
@@ -147,12 +150,14 @@ class TaxReturnClass:
             r = TaxReturnModel(
                 period=str(payload.get("period") or ""),
                 amount=str(payload.get("amount") or ""),
+                amount_numeric=AmountClass.parse(payload.get("amount")),
                 file=payload.get("file"),
                 added_date=datetime.utcnow(),
                 updated_date=datetime.utcnow(),
             )
             self.db.add(r)
             self.db.commit()
+            CountCacheClass.invalidate(TaxReturnModel.__tablename__)
             self.db.refresh(r)
             return {
                 "status": "Declaración de impuestos registrada exitosamente.",
@@ -174,6 +179,7 @@ class TaxReturnClass:
         try:
             r.period = str(payload.get("period") or "")
             r.amount = str(payload.get("amount") or "")
+            r.amount_numeric = AmountClass.parse(r.amount)
             if isinstance(payload, dict) and "file" in payload and payload.get("file") is not None:
                 r.file = payload.get("file")
             r.updated_date = datetime.utcnow()
@@ -224,6 +230,7 @@ class TaxReturnClass:
 
             self.db.delete(r)
             self.db.commit()
+            CountCacheClass.invalidate(TaxReturnModel.__tablename__)
             return "success"
         except Exception as e:
             self.db.rollback()
@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pypdfium2 as pdfium
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Pool local para generar miniaturas fuera del request:
+#   THUMBNAIL_WORKERS   cantidad de workers (default 2)
+# Pillow suelta el GIL al decodificar y redimensionar, así que los threads
+# trabajan en paralelo sin frenar a los requests.
+_executor = None
+_executor_lock = threading.Lock()
+
+# Miniaturas en curso por archivo original: un request que llega mientras la
+# subida todavía la está generando espera esa misma tarea en vez de repetirla.
+_pending = {}
+_pending_lock = threading.Lock()
+
+# PDFium no es thread-safe: un solo render a la vez dentro del proceso.
+_pdfium_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get("THUMBNAIL_WORKERS") or 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        return _executor
+
+
+class ThumbnailClass:
+    """
+    Miniaturas WebP de los adjuntos: las imágenes se reducen a cada tamaño de
+    SIZES y de los PDF se rasteriza la primera página. Se guardan junto al
+    original como .<nombre>.<tamaño>.webp (con punto: dedupe y los listados
+    de archivos las ignoran) y se generan al subir, en segundo plano, o en el
+    primer pedido a /files/thumb/{size}/{path} si todavía no existen.
+    """
+
+    SIZES = (128, 320, 640)
+    # Tamaño que exponen los listados como thumb_url.
+    LIST_SIZE = 320
+    QUALITY = 80
+    IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff"}
+    PDF_SUFFIXES = {".pdf"}
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+
+    @classmethod
+    def supports(cls, path) -> bool:
+        suffix = Path(str(path or "")).suffix.lower()
+        return suffix in cls.IMAGE_SUFFIXES or suffix in cls.PDF_SUFFIXES
+
+    @staticmethod
+    def thumb_path(full_path: Path, size: int) -> Path:
+        return full_path.with_name(f".{full_path.name}.{size}.webp")
+
+    def _is_fresh(self, full_path: Path, thumb: Path) -> bool:
+        try:
+            return thumb.stat().st_mtime_ns >= full_path.stat().st_mtime_ns
+        except OSError:
+            return False
+
+    def _open(self, full_path: Path) -> Image.Image:
+        """
+        Imagen fuente al tamaño más grande de SIZES (o menor, si el original
+        es más chico). Levanta ValueError si el archivo no se puede leer.
+        """
+        largest = max(self.SIZES)
+        if full_path.suffix.lower() in self.PDF_SUFFIXES:
+            try:
+                with _pdfium_lock:
+                    pdf = pdfium.PdfDocument(str(full_path))
+                    try:
+                        page = pdf[0]
+                        width, height = page.get_size()
+                        bitmap = page.render(scale=largest / max(width, height, 1))
+                        image = bitmap.to_pil()
+                    finally:
+                        pdf.close()
+            except (pdfium.PdfiumError, IndexError) as e:
+                raise ValueError("PDF ilegible") from e
+            return image.convert("RGB")
+
+        try:
+            image = Image.open(full_path)
+            # JPEG: decodifica directamente a escala reducida (1/2, 1/4, 1/8).
+            image.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(image)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            raise ValueError("imagen ilegible") from e
+        return image.convert("RGBA" if image.mode in ("RGBA", "LA", "P", "PA") else "RGB")
+
+    def generate(self, full_path: Path) -> list:
+        """
+        Genera las miniaturas que falten o estén viejas (más antiguas que el
+        original). Decodifica una sola vez y reduce de la más grande a la más
+        chica. Devuelve las rutas de todas las miniaturas.
+        """
+        thumbs = [self.thumb_path(full_path, size) for size in self.SIZES]
+        if all(self._is_fresh(full_path, thumb) for thumb in thumbs):
+            return thumbs
+
+        image = self._open(full_path)
+        try:
+            for size, thumb in sorted(zip(self.SIZES, thumbs), reverse=True):
+                image.thumbnail((size, size), Image.LANCZOS, reducing_gap=3.0)
+                tmp_path = thumb.with_name(f"{thumb.name}.{uuid.uuid4().hex[:8]}.tmp")
+                try:
+                    image.save(tmp_path, "WEBP", quality=self.QUALITY, method=4)
+                    os.replace(tmp_path, thumb)
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+        finally:
+            image.close()
+        return thumbs
+
+    def schedule(self, full_path: Path):
+        """
+        Encola la generación en el pool; si ya hay una en curso para el mismo
+        archivo devuelve esa misma Future.
+        """
+        key = str(full_path)
+        with _pending_lock:
+            future = _pending.get(key)
+            if future is not None:
+                return future
+            future = _get_executor().submit(self.generate, full_path)
+            _pending[key] = future
+        # Fuera del lock: si ya terminó, el callback corre aquí mismo y lo toma.
+        future.add_done_callback(lambda f: self._done(key, f))
+        return future
+
+    @staticmethod
+    def _done(key, future):
+        with _pending_lock:
+            if _pending.get(key) is future:
+                del _pending[key]
+
+    async def get(self, full_path: Path, size: int, timeout: float = 30) -> Path:
+        """
+        Ruta de la miniatura de `size`, generándola (en el pool) si hace falta.
+        Se espera en el event loop, sin ocupar un thread del threadpool de la
+        API. Levanta ValueError si el original no se puede leer y
+        asyncio.TimeoutError si el pool no la entrega a tiempo.
+        """
+        thumb = self.thumb_path(full_path, size)
+        if self._is_fresh(full_path, thumb):
+            return thumb
+        # shield: si este request se cancela o vence, la tarea compartida sigue.
+        await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.schedule(full_path))), timeout)
+        return thumb
+
+    def delete(self, full_path: Path):
+        for size in self.SIZES:
+            self.thumb_path(full_path, size).unlink(missing_ok=True)
@@ -0,0 +1,66 @@
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+# Margen sobre el límite del archivo para los demás campos del formulario y
+# los separadores multipart.
+FORM_OVERHEAD_BYTES = 256 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Middleware ASGI: limita el tamaño del cuerpo por prefijo de ruta antes de
+    que Starlette lo lea. FastAPI parsea el multipart completo (a un temporal)
+    antes de llamar al endpoint, así que FileClass.upload_stream solo podría
+    cortar cuando ya se recibió todo.
+
+    - Con Content-Length mayor al límite responde 413 sin leer el cuerpo.
+    - Sin Content-Length (chunked) cuenta los bytes a medida que llegan y
+      corta con 413 al superarlo.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        # Prefijos más largos primero, por si alguno contiene a otro.
+        self.limits = sorted(
+            ((prefix.rstrip("/"), max_bytes + FORM_OVERHEAD_BYTES) for prefix, max_bytes in limits.items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    def _limit_for(self, scope):
+        path = scope.get("path", "")
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        for prefix, max_bytes in self.limits:
+            if path == prefix or path.startswith(prefix + "/"):
+                return max_bytes
+        return None
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self._limit_for(scope) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"El cuerpo de la solicitud supera el máximo de {round(max_bytes / (1024 * 1024), 2):g} MB"
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # FastAPI re-lanza las HTTPException que salen de leer el cuerpo.
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,15 +1,47 @@
 import json
-from app.backend.db.models import UserModel
-from app.backend.auth.auth_user import generate_bcrypt_hash
+from typing import NamedTuple, Optional
+from app.backend.db.models import RolModel, UserModel
+from app.backend.auth.auth_user import generate_bcrypt_hash, invalidate_principal
+from app.backend.classes.password_hash_class import PasswordHashClass
 from datetime import datetime
 from app.backend.classes.helper_class import HelperClass
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.classes.count_cache_class import CountCacheClass
 from werkzeug.security import generate_password_hash
 
+class LoginUser(NamedTuple):
+    """
+    Lo mínimo que necesita el login: usuario + nombre del rol.
+    """
+    id: int
+    rol_id: Optional[int]
+    rol: Optional[str]
+    full_name: Optional[str]
+    email: str
+    hashed_password: Optional[str]
+
+class LoginLookup(NamedTuple):
+    """
+    Resultado de UserClass.get_for_login(): user o error
+    ("not_found" / mensaje de la excepción), nunca ambos.
+    """
+    user: Optional[LoginUser] = None
+    error: Optional[str] = None
+
 class UserClass:
     def __init__(self, db):
         self.db = db
 
-    def get_all(self, email=None, page=0, items_per_page=10):
+    def _list_row(self, user):
+        return {
+            "id": user.id,
+            "full_name": user.full_name,
+            "rol_id": user.rol_id,
+            "email": user.email,
+            "added_date": user.added_date
+        }
+
+    def get_all(self, email=None, page=0, items_per_page=10, exact_count=True, cursor=None, limit=None):
         try:
             filters = []
             if email is not None:
@@ -27,11 +59,16 @@ class UserClass:
                 UserModel.id.desc()
             )
 
+            if cursor is not None or limit is not None:
+                return PaginationClass(query, UserModel.id, descending=True).response(
+                    self._list_row, cursor, limit or items_per_page
+                )
+
             if page > 0:
-                total_items = query.count()
-                total_pages = (total_items + items_per_page - 1)
+                total_items, exact = CountCacheClass(self.db).count(query, UserModel.__tablename__, estimate=not exact_count)
+                total_pages = (total_items + items_per_page - 1) // items_per_page
 
-                if page < 1 or page > total_pages:
+                if page < 1 or (exact and total_pages > 0 and page > total_pages):
                     return {"status": "error", "message": "Invalid page number"}
 
                 data = query.offset((page - 1) * items_per_page).limit(items_per_page).all()
@@ -39,16 +76,11 @@ class UserClass:
                 if not data:
                     return {"status": "error", "message": "No data found"}
 
-                serialized_data = [{
-                    "id": user.id,
-                    "full_name": user.full_name,
-                    "rol_id": user.rol_id,
-                    "email": user.email,
-                    "added_date": user.added_date
-                } for user in data]
+                serialized_data = [self._list_row(user) for user in data]
 
                 return {
                     "total_items": total_items,
+                    "total_items_exact": exact,
                     "total_pages": total_pages,
                     "current_page": page,
                     "items_per_page": items_per_page,
@@ -58,13 +90,7 @@ class UserClass:
             else:
                 data = query.all()
 
-                serialized_data = [{
-                    "id": user.id,
-                    "full_name": user.full_name,
-                    "rol_id": user.rol_id,
-                    "email": user.email,
-                    "added_date": user.added_date
-                } for user in data]
+                serialized_data = [self._list_row(user) for user in data]
 
                 return serialized_data
 
@@ -100,6 +126,32 @@ class UserClass:
             error_message = str(e)
             return f"Error: {error_message}"
         
+    def get_for_login(self, email) -> LoginLookup:
+        """
+        Usuario y nombre de su rol en una sola consulta (join con rols),
+        sin pasar por JSON como get().
+        """
+        try:
+            row = (
+                self.db.query(
+                    UserModel.id,
+                    UserModel.rol_id,
+                    RolModel.rol,
+                    UserModel.full_name,
+                    UserModel.email,
+                    UserModel.hashed_password,
+                )
+                .outerjoin(RolModel, RolModel.id == UserModel.rol_id)
+                .filter(UserModel.email == email)
+                .first()
+            )
+        except Exception as e:
+            return LoginLookup(error=str(e))
+
+        if row is None:
+            return LoginLookup(error="not_found")
+        return LoginLookup(user=LoginUser(*row))
+
     def get_supervisors(self):
         try:
             data = self.db.query(UserModel).order_by(UserModel.nickname).filter(UserModel.rol_id == 3).all()
@@ -120,6 +172,7 @@ class UserClass:
         self.db.add(user)
         try:
             self.db.commit()
+            CountCacheClass.invalidate(UserModel.__tablename__)
             self.db.refresh(user)
             return {"status": "success", "user_id": user.id}
         except Exception as e:
@@ -130,7 +183,7 @@ class UserClass:
         user = UserModel()
         user.rol_id = 5
         user.full_name = user_inputs.social_reason
-        user.hashed_password = generate_bcrypt_hash('123456')
+        user.hashed_password = PasswordHashClass.default_hash('123456')
         user.email = user_inputs.email
         user.added_date = datetime.now()
         user.updated_date = datetime.now()
@@ -138,6 +191,7 @@ class UserClass:
         self.db.add(user)
         try:
             self.db.commit()
+            CountCacheClass.invalidate(UserModel.__tablename__)
 
             return 1
         except Exception as e:
@@ -147,8 +201,11 @@ class UserClass:
         try:
             data = self.db.query(UserModel).filter(UserModel.id == id).first()
             if data:
+                email = data.email
                 self.db.delete(data)
                 self.db.commit()
+                CountCacheClass.invalidate(UserModel.__tablename__)
+                invalidate_principal(email)
                 return 'success'
             else:
                 return "No data found"
@@ -164,12 +221,13 @@ class UserClass:
         if not user:
             return 0
 
-        user.hashed_password = generate_bcrypt_hash('123456')
+        user.hashed_password = PasswordHashClass.default_hash('123456')
         user.updated_date = datetime.now()
         self.db.add(user)
 
         try:
             self.db.commit()
+            invalidate_principal(email)
             return 1
         except Exception:
             self.db.rollback()
@@ -177,6 +235,7 @@ class UserClass:
 
     def update(self, id, form_data):
         user = self.db.query(UserModel).filter(UserModel.id == id).first()
+        previous_email = user.email
 
         # Solo actualizar campos presentes (no None)
         if form_data.get('rol_id') is not None:
@@ -192,6 +251,8 @@ class UserClass:
 
         try:
             self.db.commit()
+            CountCacheClass.invalidate(UserModel.__tablename__)
+            invalidate_principal(previous_email, user.email)
 
             return 1
         except Exception as e:
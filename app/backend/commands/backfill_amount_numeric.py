@@ -0,0 +1,75 @@
+"""
+Llena amount_numeric (DECIMAL) en expense_reports, invoices, budgets y
+tax_returns parseando amount (VARCHAR) con AmountClass.parse_many. Solo datos:
+la columna la crea la migración v0003 (python -m app.backend.commands.migrate upgrade),
+que además corre este mismo backfill una vez.
+
+Uso (desde la raíz del proyecto):
+    python -m app.backend.commands.backfill_amount_numeric
+    python -m app.backend.commands.backfill_amount_numeric --all   # re-parsear también filas ya migradas
+
+Informa las filas cuyo amount no se pudo parsear (quedan con amount_numeric NULL
+y no suman en los totales). Después correr rebuild_daily_rollups.
+"""
+import argparse
+
+from app.backend.classes.amount_class import AmountClass
+from app.backend.db.models import BudgetModel, ExpenseReportModel, InvoiceModel, TaxReturnModel
+
+MODELS = [ExpenseReportModel, InvoiceModel, BudgetModel, TaxReturnModel]
+
+
+def backfill(db, model, reparse_all=False, chunk_size=1000):
+    updated = 0
+    failed = []
+    last_id = 0
+
+    while True:
+        q = db.query(model.id, model.amount).filter(model.id > last_id)
+        if not reparse_all:
+            q = q.filter(model.amount_numeric.is_(None))
+        rows = q.order_by(model.id.asc()).limit(chunk_size).all()
+        if not rows:
+            break
+
+        mappings = []
+        values = AmountClass.parse_many([amount for _, amount in rows])
+        for (row_id, amount), value in zip(rows, values):
+            if value is None:
+                # Vacío no es error; texto no numérico sí.
+                if amount is not None and str(amount).strip():
+                    failed.append((row_id, amount))
+                continue
+            mappings.append({"id": row_id, "amount_numeric": value})
+
+        if mappings:
+            db.bulk_update_mappings(model, mappings)
+            db.commit()
+            updated += len(mappings)
+        last_id = rows[-1][0]
+
+    return updated, failed
+
+
+def main():
+    # Import diferido: la migración v0003 importa backfill() con su propia conexión.
+    from app.backend.db.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Llena amount_numeric")
+    parser.add_argument("--all", action="store_true", help="re-parsear todas las filas, no solo las NULL")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for model in MODELS:
+            table = model.__tablename__
+            updated, failed = backfill(db, model, reparse_all=args.all)
+            print(f"{table}: {updated} filas actualizadas, {len(failed)} sin parsear")
+            for row_id, amount in failed:
+                print(f"  {table}.id={row_id} amount={amount!r}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Deduplica los adjuntos de files/ (invoices, expense_reports, budgets,
+tax_returns) contra los blobs por contenido. Lo mismo que hace la migración
+v0002 al aplicarse; sirve para ver antes cuánto espacio se libera o para
+repasar archivos copiados a mano.
+
+Uso (desde la raíz del proyecto):
+    python -m app.backend.commands.dedupe_files --dry-run
+    python -m app.backend.commands.dedupe_files
+"""
+import argparse
+
+from app.backend.classes.file_class import FileClass
+from app.backend.db.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplica files/ en blobs por contenido")
+    parser.add_argument("--dry-run", action="store_true", help="solo informar, sin tocar archivos ni la base")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        stats = FileClass(db).dedupe(dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    mb = 1024 * 1024
+    print(f"archivos revisados: {stats['files']} ({stats['bytes_total'] / mb:.1f} MB)")
+    print(f"blobs nuevos:       {stats['blobs']}")
+    print(f"duplicados:         {stats['duplicates']}")
+    print(f"{'se liberarían' if args.dry_run else 'liberados'}:  {stats['bytes_reclaimed'] / mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Aplica o revierte las migraciones de esquema (app/backend/db/migrations).
+
+Uso (desde la raíz del proyecto):
+    python -m app.backend.commands.migrate status
+    python -m app.backend.commands.migrate upgrade              # todas las pendientes
+    python -m app.backend.commands.migrate upgrade --to 1
+    python -m app.backend.commands.migrate downgrade --to 0     # revertir todas
+    python -m app.backend.commands.migrate upgrade --url sqlite:///local.db
+
+Sin --url usa la base de datos de la app (app/backend/db/database.py).
+"""
+import argparse
+
+from sqlalchemy import create_engine
+
+from app.backend.classes.migration_class import MigrationClass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones de esquema")
+    parser.add_argument("action", choices=["status", "upgrade", "downgrade"])
+    parser.add_argument("--to", type=int, default=None, help="versión destino")
+    parser.add_argument("--url", default=None, help="URL de SQLAlchemy (por defecto la de la app)")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from app.backend.db.database import engine
+
+    migrations = MigrationClass(engine)
+
+    if args.action == "upgrade":
+        done = migrations.upgrade(args.to)
+        print(f"aplicadas: {', '.join(map(str, done)) or 'ninguna'}")
+    elif args.action == "downgrade":
+        if args.to is None:
+            parser.error("downgrade requiere --to (0 revierte todas)")
+        done = migrations.downgrade(args.to)
+        print(f"revertidas: {', '.join(map(str, done)) or 'ninguna'}")
+
+    for m in migrations.status():
+        state = m["applied_date"].strftime("%Y-%m-%d %H:%M:%S") if m["applied_date"] else "pendiente"
+        print(f"  v{m['version']:04d} {state:<19} {m['description']}")
+
+
+if __name__ == "__main__":
+    main()
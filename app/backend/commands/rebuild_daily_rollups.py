@@ -0,0 +1,35 @@
+"""
+Recalcula la tabla daily_rollups desde invoices y expense_reports. Solo datos:
+la tabla la crea (y la llena por primera vez) la migración v0004.
+
+Uso (desde la raíz del proyecto):
+    python -m app.backend.commands.rebuild_daily_rollups
+    python -m app.backend.commands.rebuild_daily_rollups --since 2024-01-01 --until 2024-12-31
+
+Correrlo cuando se sospeche que los totales diarios quedaron desalineados
+(ej. cambios hechos directo en la base de datos o un --all de backfill_amount_numeric).
+"""
+import argparse
+from datetime import date
+
+from app.backend.classes.daily_rollup_class import DailyRollupClass
+from app.backend.db.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalcula daily_rollups")
+    parser.add_argument("--since", type=date.fromisoformat, default=None, help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--until", type=date.fromisoformat, default=None, help="YYYY-MM-DD (inclusive)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = DailyRollupClass(db).rebuild(args.since, args.until)
+    finally:
+        db.close()
+
+    print(f"daily_rollups: {result['days']} días, {result['invoices']} invoices, {result['expense_reports']} expense_reports")
+
+
+if __name__ == "__main__":
+    main()
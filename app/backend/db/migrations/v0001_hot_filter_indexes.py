@@ -0,0 +1,31 @@
+"""
+Índices secundarios para las columnas por las que filtran los endpoints.
+
+Los compuestos (fecha, id) sirven además el orden y el cursor de los reportes
+y exportaciones por rango (ORDER BY fecha, id).
+"""
+from app.backend.classes.migration_class import MigrationClass
+
+description = "Índices de columnas filtradas (fechas, email, RUT, product_id, customer_id)"
+
+INDEXES = [
+    ("expense_reports", "ix_expense_reports_document_date_id", ["document_date", "id"]),
+    ("invoices", "ix_invoices_invoice_date_id", ["invoice_date", "id"]),
+    ("budgets", "ix_budgets_budget_date_id", ["budget_date", "id"]),
+    ("tax_returns", "ix_tax_returns_added_date_id", ["added_date", "id"]),
+    ("customers", "ix_customers_identification_number", ["identification_number"]),
+    ("users", "ix_users_email", ["email"]),
+    ("lot_items", "ix_lot_items_product_id", ["product_id"]),
+    ("inventories", "ix_inventories_product_id", ["product_id"]),
+    ("customers_products_discounts", "ix_customers_products_discounts_customer_id_product_id", ["customer_id", "product_id"]),
+]
+
+
+def upgrade(conn):
+    for table, name, columns in INDEXES:
+        MigrationClass.create_index(conn, table, name, columns)
+
+
+def downgrade(conn):
+    for table, name, _ in reversed(INDEXES):
+        MigrationClass.drop_index(conn, table, name)
@@ -0,0 +1,40 @@
+"""
+Blobs por contenido para los adjuntos (file_blobs + file_refs) y
+deduplicación de los archivos que ya están en files/.
+
+La deduplicación reemplaza cada copia repetida por un hard link al blob, así
+que los remote_path guardados en invoices / expense_reports / budgets /
+tax_returns siguen siendo válidos. Para ver antes cuánto se liberaría:
+    python -m app.backend.commands.dedupe_files --dry-run
+"""
+import shutil
+
+from sqlalchemy.orm import Session
+
+from app.backend.classes.file_class import FileClass
+from app.backend.db.models import FileBlobModel, FileRefModel
+
+description = "Blobs por contenido con conteo de referencias y deduplicación de files/"
+
+
+def upgrade(conn):
+    FileBlobModel.__table__.create(conn, checkfirst=True)
+    FileRefModel.__table__.create(conn, checkfirst=True)
+
+    db = Session(bind=conn)
+    try:
+        stats = FileClass(db).dedupe()
+    finally:
+        db.close()
+
+    print(
+        f"files/: {stats['files']} archivos, {stats['blobs']} blobs nuevos, {stats['duplicates']} duplicados, "
+        f"{stats['bytes_reclaimed'] / (1024 * 1024):.1f} MB liberados de {stats['bytes_total'] / (1024 * 1024):.1f} MB"
+    )
+
+
+def downgrade(conn):
+    # Los remote_path son hard links: siguen funcionando sin los blobs.
+    FileRefModel.__table__.drop(conn, checkfirst=True)
+    FileBlobModel.__table__.drop(conn, checkfirst=True)
+    shutil.rmtree(FileClass(None).blob_dir, ignore_errors=True)
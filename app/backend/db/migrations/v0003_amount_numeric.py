@@ -0,0 +1,32 @@
+"""
+amount_numeric (DECIMAL(20, 6)) en expense_reports, invoices, budgets y
+tax_returns, llenada parseando amount (VARCHAR) con AmountClass.parse_many.
+
+Las filas cuyo amount no se puede parsear quedan con amount_numeric NULL y no
+suman en los totales; para listarlas o re-parsear después:
+    python -m app.backend.commands.backfill_amount_numeric [--all]
+"""
+from sqlalchemy.orm import Session
+
+from app.backend.classes.migration_class import MigrationClass
+from app.backend.commands.backfill_amount_numeric import MODELS, backfill
+
+description = "Columna amount_numeric (DECIMAL) en expense_reports, invoices, budgets y tax_returns"
+
+
+def upgrade(conn):
+    for model in MODELS:
+        MigrationClass.add_column(conn, model.__tablename__, model.__table__.c.amount_numeric)
+
+    db = Session(bind=conn)
+    try:
+        for model in MODELS:
+            updated, failed = backfill(db, model)
+            print(f"{model.__tablename__}: {updated} filas con amount_numeric, {len(failed)} sin parsear")
+    finally:
+        db.close()
+
+
+def downgrade(conn):
+    for model in MODELS:
+        MigrationClass.drop_column(conn, model.__tablename__, "amount_numeric")
@@ -0,0 +1,27 @@
+"""
+Totales diarios pre-agregados (daily_rollups) de invoices y expense_reports,
+calculados desde amount_numeric (v0003). Para recalcularlos después:
+    python -m app.backend.commands.rebuild_daily_rollups
+"""
+from sqlalchemy.orm import Session
+
+from app.backend.classes.daily_rollup_class import DailyRollupClass
+from app.backend.db.models import DailyRollupModel
+
+description = "Tabla daily_rollups con los totales diarios de invoices y expense_reports"
+
+
+def upgrade(conn):
+    DailyRollupModel.__table__.create(conn, checkfirst=True)
+
+    db = Session(bind=conn)
+    try:
+        result = DailyRollupClass(db).rebuild()
+    finally:
+        db.close()
+
+    print(f"daily_rollups: {result['days']} días, {result['invoices']} invoices, {result['expense_reports']} expense_reports")
+
+
+def downgrade(conn):
+    DailyRollupModel.__table__.drop(conn, checkfirst=True)
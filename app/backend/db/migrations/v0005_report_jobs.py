@@ -0,0 +1,15 @@
+"""
+Jobs de reportes PDF en segundo plano (report_jobs); los archivos generados
+quedan en files/report_jobs.
+"""
+from app.backend.db.models import ReportJobModel
+
+description = "Tabla report_jobs para los reportes PDF generados en segundo plano"
+
+
+def upgrade(conn):
+    ReportJobModel.__table__.create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    ReportJobModel.__table__.drop(conn, checkfirst=True)
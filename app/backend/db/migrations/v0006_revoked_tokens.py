@@ -0,0 +1,15 @@
+"""
+Tokens revocados por logout (hash sha256 del token), compartidos por todos
+los workers; ver revoke_token / is_revoked en app/backend/auth/auth_user.py.
+"""
+from app.backend.db.models import RevokedTokenModel
+
+description = "Tabla revoked_tokens para revocar JWT en todos los workers"
+
+
+def upgrade(conn):
+    RevokedTokenModel.__table__.create(conn, checkfirst=True)
+
+
+def downgrade(conn):
+    RevokedTokenModel.__table__.drop(conn, checkfirst=True)
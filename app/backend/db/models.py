@@ -1,5 +1,5 @@
 from app.backend.db.database import Base
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Float, Boolean, Text, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Float, Boolean, Text, Numeric, Index
 from datetime import datetime
 
 class AccountTypeModel(Base):
@@ -39,6 +39,7 @@ class SupplierModel(Base):
 
 class CustomerModel(Base):
     __tablename__ = 'customers'
+    __table_args__ = (Index('ix_customers_identification_number', 'identification_number'),)
 
     id = Column(Integer, primary_key=True)
     region_id = Column(Integer)
@@ -129,6 +130,7 @@ class ProductModel(Base):
 
 class UserModel(Base):
     __tablename__ = 'users'
+    __table_args__ = (Index('ix_users_email', 'email'),)
 
     id = Column(Integer, primary_key=True)
     rol_id = Column(Integer, ForeignKey('rols.id'))
@@ -157,6 +159,7 @@ class CommuneModel(Base):
 
 class CustomerProductDiscountModel(Base):
     __tablename__ = 'customers_products_discounts'
+    __table_args__ = (Index('ix_customers_products_discounts_customer_id_product_id', 'customer_id', 'product_id'),)
 
     id = Column(Integer, primary_key=True)
     customer_id = Column(Integer)
@@ -165,6 +168,7 @@ class CustomerProductDiscountModel(Base):
 
 class InventoryModel(Base):
     __tablename__ = 'inventories'  # Cambia el nombre si es otro
+    __table_args__ = (Index('ix_inventories_product_id', 'product_id'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     product_id = Column(Integer)
@@ -186,6 +190,7 @@ class LotModel(Base):
 
 class LotItemModel(Base):
     __tablename__ = 'lot_items'
+    __table_args__ = (Index('ix_lot_items_product_id', 'product_id'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     lot_id = Column(Integer)
@@ -267,6 +272,7 @@ class ExpenseTypeModel(Base):
 
 class ExpenseReportModel(Base):
     __tablename__ = 'expense_reports'
+    __table_args__ = (Index('ix_expense_reports_document_date_id', 'document_date', 'id'),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'))
@@ -274,6 +280,7 @@ class ExpenseReportModel(Base):
     document_number = Column(Integer)
     company = Column(String(255))
     amount = Column(String(255))
+    amount_numeric = Column(Numeric(20, 6))
     description = Column(Text())
     document_date = Column(DateTime())
     file = Column(Text())
@@ -282,12 +289,14 @@ class ExpenseReportModel(Base):
 
 class InvoiceModel(Base):
     __tablename__ = 'invoices'
+    __table_args__ = (Index('ix_invoices_invoice_date_id', 'invoice_date', 'id'),)
 
     id = Column(Integer, primary_key=True)
     declared_status_id = Column(Integer)
     invoice_number = Column(Integer)
     company = Column(String(255))
     amount = Column(String(255))
+    amount_numeric = Column(Numeric(20, 6))
     file = Column(Text())
     invoice_date = Column(Date())
     added_date = Column(DateTime())
@@ -295,11 +304,13 @@ class InvoiceModel(Base):
 
 class BudgetModel(Base):
     __tablename__ = 'budgets'
+    __table_args__ = (Index('ix_budgets_budget_date_id', 'budget_date', 'id'),)
 
     id = Column(Integer, primary_key=True)
     budget_number = Column(String(255))
     company = Column(String(255))
     amount = Column(String(255))
+    amount_numeric = Column(Numeric(20, 6))
     file = Column(Text())
     budget_date = Column(Date())
     added_date = Column(DateTime())
@@ -308,10 +319,70 @@ class BudgetModel(Base):
 
 class TaxReturnModel(Base):
     __tablename__ = 'tax_returns'
+    __table_args__ = (Index('ix_tax_returns_added_date_id', 'added_date', 'id'),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     period = Column(String(255))
     amount = Column(String(255))
+    amount_numeric = Column(Numeric(20, 6))
     file = Column(String(255))
     added_date = Column(DateTime())
-    updated_date = Column(DateTime())
\ No newline at end of file
+    updated_date = Column(DateTime())
+
+class DailyRollupModel(Base):
+    __tablename__ = 'daily_rollups'
+
+    rollup_date = Column(Date(), primary_key=True)
+    invoice_total = Column(Numeric(20, 6), default=0)
+    invoice_count = Column(Integer, default=0)
+    expense_total = Column(Numeric(20, 6), default=0)
+    expense_count = Column(Integer, default=0)
+    updated_date = Column(DateTime())
+
+class ReportJobModel(Base):
+    __tablename__ = 'report_jobs'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'))
+    report_type = Column(String(50))
+    params = Column(Text())
+    status = Column(String(20), index=True)
+    total_rows = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    pages_written = Column(Integer, default=0)
+    file = Column(String(255))
+    error = Column(Text())
+    started_date = Column(DateTime())
+    finished_date = Column(DateTime())
+    added_date = Column(DateTime())
+    updated_date = Column(DateTime())
+
+class SchemaMigrationModel(Base):
+    __tablename__ = 'schema_migrations'
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(255))
+    applied_date = Column(DateTime())
+
+class FileBlobModel(Base):
+    __tablename__ = 'file_blobs'
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer)
+    ref_count = Column(Integer, default=0)
+    added_date = Column(DateTime())
+    updated_date = Column(DateTime())
+
+class FileRefModel(Base):
+    __tablename__ = 'file_refs'
+
+    remote_path = Column(String(255), primary_key=True)
+    sha256 = Column(String(64), ForeignKey('file_blobs.sha256'), index=True)
+    added_date = Column(DateTime())
+
+class RevokedTokenModel(Base):
+    __tablename__ = 'revoked_tokens'
+
+    token_hash = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(), index=True)
+    added_date = Column(DateTime())
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, Form, HTTPException, Query
 from fastapi.security import OAuth2PasswordRequestForm
-from app.backend.db.database import get_db
+from app.backend.db.database import get_async_db, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.backend.classes.authentication_class import AuthenticationClass
 from app.backend.classes.rol_class import RolClass
 from datetime import timedelta
-from app.backend.auth.auth_user import get_current_active_user
+from app.backend.auth.auth_user import decode_token, get_current_active_user, oauth2_scheme, revoke_token
 from app.backend.schemas import UserLogin
 from pydantic import BaseModel
 import json
@@ -20,39 +21,34 @@ class ShoppingLoginRequest(BaseModel):
     rut: str
 
 @authentications.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = AuthenticationClass(db).authenticate_user(form_data.username, form_data.password)
-    print(user)
-    rol = RolClass(db).get('id', user["user_data"]["rol_id"])
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # async: bcrypt se espera en el event loop y no retiene un thread del threadpool.
+    user = await AuthenticationClass(db).authenticate_user_async(form_data.username, form_data.password)
     token_expires = timedelta(minutes=9999999)
-    token = AuthenticationClass(db).create_token({'sub': str(user["user_data"]["email"])}, token_expires)
+    token = AuthenticationClass(db).create_token({'sub': str(user.email)}, token_expires)
     expires_in_seconds = token_expires.total_seconds()
 
     return {
         "access_token": token,
-        "user_id": user["user_data"]["id"],
-        "rol_id": user["user_data"]["rol_id"],
-        "rol": rol.rol,
-        "full_name": user["user_data"]["full_name"],
-        "email": user["user_data"]["email"],
+        "user_id": user.id,
+        "rol_id": user.rol_id,
+        "rol": user.rol,
+        "full_name": user.full_name,
+        "email": user.email,
         "token_type": "bearer",
         "expires_in": expires_in_seconds
     }
 
 @authentications.post("/logout")
-def logout(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = AuthenticationClass(db).authenticate_user(form_data.username, form_data.password)
-    access_token_expires = timedelta(minutes=9999999)
-    access_token_jwt = AuthenticationClass(db).create_token({'sub': str(user["user_data"]["email"])}, access_token_expires)
+def logout(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Revoca el token presentado (header Authorization: Bearer): deja de
+    autenticar en todos los workers aunque no haya vencido.
+    """
+    decode_token(token)
+    revoke_token(token, db)
 
-    return {
-        "access_token": access_token_jwt, 
-        "user_id": user["user_data"]["id"],
-        "rol_id": user["user_data"]["rol_id"],
-        "full_name": user["user_data"]["full_name"],
-        "email": user["user_data"]["email"],
-        "token_type": "bearer"
-    }
+    return {"message": "success"}
 
 @authentications.post("/shopping_login")
 def shopping_login(
@@ -75,18 +71,17 @@ def shopping_login(
         )
     
     user = AuthenticationClass(db).authenticate_shopping_login(user_rut)
-    rol = RolClass(db).get('id', user["user_data"]["rol_id"])
     token_expires = timedelta(minutes=120)
-    token = AuthenticationClass(db).create_token({'sub': str(user["user_data"]["email"])}, token_expires)
+    token = AuthenticationClass(db).create_token({'sub': str(user.email)}, token_expires)
     expires_in_seconds = token_expires.total_seconds()
 
     return {
         "access_token": token,
-        "user_id": user["user_data"]["id"],
-        "rol_id": user["user_data"]["rol_id"],
-        "rol": rol.rol,
-        "full_name": user["user_data"]["full_name"],
-        "email": user["user_data"]["email"],
+        "user_id": user.id,
+        "rol_id": user.rol_id,
+        "rol": user.rol,
+        "full_name": user.full_name,
+        "email": user.email,
         "token_type": "bearer",
         "expires_in": expires_in_seconds
     }
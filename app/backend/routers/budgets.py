@@ -1,15 +1,14 @@
 from datetime import datetime
 import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request
 from pathlib import Path
-import mimetypes
 from sqlalchemy.orm import Session
 
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.classes.budget_class import BudgetClass
 from app.backend.classes.file_class import FileClass
+from app.backend.classes.file_serve_class import FileServeClass
 from app.backend.db.database import get_db
 from app.backend.db.models import BudgetModel
 from app.backend.schemas import UserLogin, BudgetList, BudgetSearch, StoreBudget, UpdateBudget
@@ -22,6 +21,7 @@ budgets = APIRouter(
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 FILES_DIR = BASE_DIR / "files"
+file_serve = FileServeClass(FILES_DIR)
 
 def _safe_full_path(file_path: str) -> Path:
     rp = (file_path or "").replace("\\", "/").lstrip("/")
@@ -33,7 +33,7 @@ def _safe_full_path(file_path: str) -> Path:
 
 @budgets.post("/")
 def index(inputs: BudgetList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = BudgetClass(db).get_all(inputs.page)
+    data = BudgetClass(db).get_all(inputs.page, exact_count=inputs.exact_count, cursor=inputs.cursor, limit=inputs.limit)
     return {"message": data}
 
 
@@ -65,7 +65,7 @@ def store(
         extension = f.filename.rsplit('.', 1)[-1].lower() if f.filename and '.' in f.filename else ''
         filename = f"budget_{timestamp}_{unique_id}"
         remote_path = f"budgets/{filename}.{extension}" if extension else f"budgets/{filename}"
-        FileClass(db).upload(f, remote_path)
+        FileClass(db).upload_stream(f, remote_path, max_bytes=FileClass.upload_limit("budgets"))
         payload["file"] = remote_path
 
     data = BudgetClass(db).store(payload)
@@ -95,7 +95,7 @@ def update(
         extension = f.filename.rsplit('.', 1)[-1].lower() if f.filename and '.' in f.filename else ''
         filename = f"budget_{timestamp}_{unique_id}"
         remote_path = f"budgets/{filename}.{extension}" if extension else f"budgets/{filename}"
-        FileClass(db).upload(f, remote_path)
+        FileClass(db).upload_stream(f, remote_path, max_bytes=FileClass.upload_limit("budgets"))
         payload["file"] = remote_path
 
     data = BudgetClass(db).update(id, payload)
@@ -124,20 +124,11 @@ def edit(id: int, session_user: UserLogin = Depends(get_current_active_user), db
 
 
 @budgets.get("/download/{id}")
-def download(id: int, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def download(id: int, request: Request, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
     b = db.query(BudgetModel).filter(BudgetModel.id == id).first()
     if not b or not b.file:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
 
     full_path = _safe_full_path(b.file)
-    if not full_path.exists() or not full_path.is_file():
-        raise HTTPException(status_code=404, detail="Archivo no encontrado")
-
-    media_type, _ = mimetypes.guess_type(str(full_path))
-    return FileResponse(
-        path=full_path,
-        filename=full_path.name,
-        media_type=media_type or "application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={full_path.name}"},
-    )
+    return file_serve.response(full_path, request, download=True, cache_control=FileServeClass.REVALIDATE)
 
@@ -12,7 +12,12 @@ categories = APIRouter(
 
 @categories.post("/")
 def index(category_inputs: CategoryList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = CategoryClass(db).get_all(category_inputs.page)
+    data = CategoryClass(db).get_all(
+        category_inputs.page,
+        exact_count=category_inputs.exact_count,
+        cursor=category_inputs.cursor,
+        limit=category_inputs.limit,
+    )
 
     return {"message": data}
 
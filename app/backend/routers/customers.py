@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
-from app.backend.db.database import get_db
+from app.backend.db.database import get_async_db, get_db, run_sync_session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.backend.schemas import UserLogin, StoreCustomer, UpdateCustomer, CustomerList, UpdateCustomerProfile
 from app.backend.classes.customer_class import CustomerClass
 from app.backend.classes.user_class import UserClass
-from app.backend.auth.auth_user import get_current_active_user
+from app.backend.auth.auth_user import get_current_active_user, get_current_active_user_async
 
 customers = APIRouter(
     prefix="/customers",
@@ -12,18 +13,28 @@ customers = APIRouter(
 )
 
 @customers.post("/")
-def index(customer_inputs: CustomerList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = CustomerClass(db).get_all(
-        page=customer_inputs.page,
-        name=customer_inputs.name,
-        rut=customer_inputs.rut
-    )
+async def index(customer_inputs: CustomerList, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    def read(session):
+        return CustomerClass(session).get_all(
+            page=customer_inputs.page,
+            name=customer_inputs.name,
+            rut=customer_inputs.rut,
+            exact_count=customer_inputs.exact_count,
+            cursor=customer_inputs.cursor,
+            limit=customer_inputs.limit,
+        )
+
+    if customer_inputs.page > 0 or customer_inputs.cursor is not None or customer_inputs.limit is not None:
+        data = await db.run_sync(read)
+    else:
+        # Sin paginar devuelve todas las filas: fuera del event loop.
+        data = await run_sync_session(read)
 
     return {"message": data}
 
 @customers.get("/discounts/{identification_number}")
-def discounts(identification_number:str, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = CustomerClass(db).discounts(identification_number)
+async def discounts(identification_number:str, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    data = await db.run_sync(lambda session: CustomerClass(session).discounts(identification_number))
 
     return {"message": data}
 
@@ -86,11 +97,11 @@ def edit(id: int, db: Session = Depends(get_db)):
     return {"message": data}
 
 @customers.get("/show/{rut}")
-def show(rut: str, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
+async def show(rut: str, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
     """
     Obtiene información completa del cliente y usuario asociado por RUT
     """
-    data = CustomerClass(db).show(rut)
+    data = await db.run_sync(lambda session: CustomerClass(session).show(rut))
     
     if data.get("status") == "error":
         raise HTTPException(status_code=404, detail=data["message"])
@@ -1,15 +1,15 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
-from app.backend.db.database import get_db
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request
+from app.backend.db.database import get_async_db, get_db, run_sync_session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.backend.schemas import UserLogin, StoreExpenseReport, ExpenseReportList, UpdateExpenseReport, ExpenseReportSearch
 from app.backend.classes.expense_report_class import ExpenseReportClass
-from app.backend.auth.auth_user import get_current_active_user
+from app.backend.auth.auth_user import get_current_active_user, get_current_active_user_async
 from app.backend.classes.file_class import FileClass
+from app.backend.classes.file_serve_class import FileServeClass
 from app.backend.db.models import ExpenseReportModel
 from datetime import datetime
 from pathlib import Path
-import mimetypes
 import uuid
 
 expense_reports = APIRouter(
@@ -19,6 +19,7 @@ expense_reports = APIRouter(
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 FILES_DIR = BASE_DIR / "files"
+file_serve = FileServeClass(FILES_DIR)
 
 
 def _safe_full_path(file_path: str) -> Path:
@@ -30,11 +31,26 @@ def _safe_full_path(file_path: str) -> Path:
     return full_path
 
 @expense_reports.post("/")
-def index(expense_report_inputs: ExpenseReportList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = ExpenseReportClass(db).get_all(expense_report_inputs.page, session_user=session_user)
+async def index(expense_report_inputs: ExpenseReportList, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    def read(session):
+        return ExpenseReportClass(session).get_all(
+            expense_report_inputs.page,
+            session_user=session_user,
+            exact_count=expense_report_inputs.exact_count,
+            cursor=expense_report_inputs.cursor,
+            limit=expense_report_inputs.limit,
+        )
+
+    if expense_report_inputs.page > 0 or expense_report_inputs.cursor is not None or expense_report_inputs.limit is not None:
+        data = await db.run_sync(read)
+    else:
+        # Sin paginar devuelve todas las filas: fuera del event loop.
+        data = await run_sync_session(read)
 
     return {"message": data}
 
+# Listado completo y búsqueda sin paginar: sync (threadpool). Con run_sync
+# armarían y serializarían todo el resultado en el thread del event loop.
 @expense_reports.get("/list")
 def list_all(session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
     data = ExpenseReportClass(db).get_list(session_user=session_user)
@@ -68,7 +84,7 @@ def store(
         filename = f"expense_{timestamp}_{unique_id}"
         remote_path = f"expense_reports/{filename}.{extension}" if extension else f"expense_reports/{filename}"
 
-        FileClass(db).upload(file, remote_path)
+        FileClass(db).upload_stream(file, remote_path, max_bytes=FileClass.upload_limit("expense_reports"))
         payload["file"] = remote_path
 
     data = ExpenseReportClass(db).store(payload)
@@ -98,7 +114,7 @@ def update(
         filename = f"expense_{timestamp}_{unique_id}"
         remote_path = f"expense_reports/{filename}.{extension}" if extension else f"expense_reports/{filename}"
 
-        FileClass(db).upload(file, remote_path)
+        FileClass(db).upload_stream(file, remote_path, max_bytes=FileClass.upload_limit("expense_reports"))
         payload["file"] = remote_path
 
     data = ExpenseReportClass(db).update(id, payload, session_user=session_user)
@@ -121,26 +137,17 @@ def delete(id: int, session_user: UserLogin = Depends(get_current_active_user),
     return {"message": data}
 
 @expense_reports.get("/edit/{id}")
-def edit(id: int, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = ExpenseReportClass(db).get(id, session_user=session_user)
+async def edit(id: int, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    data = await db.run_sync(lambda session: ExpenseReportClass(session).get(id, session_user=session_user))
 
     return {"message": data}
 
 
 @expense_reports.get("/download/{id}")
-def download(id: int, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def download(id: int, request: Request, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
     r = db.query(ExpenseReportModel).filter(ExpenseReportModel.id == id).first()
     if not r or not r.file:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
 
     full_path = _safe_full_path(r.file)
-    if not full_path.exists() or not full_path.is_file():
-        raise HTTPException(status_code=404, detail="Archivo no encontrado")
-
-    media_type, _ = mimetypes.guess_type(str(full_path))
-    return FileResponse(
-        path=full_path,
-        filename=full_path.name,
-        media_type=media_type or "application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={full_path.name}"},
-    )
+    return file_serve.response(full_path, request, download=True, cache_control=FileServeClass.REVALIDATE)
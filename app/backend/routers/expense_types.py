@@ -12,7 +12,12 @@ expense_types = APIRouter(
 
 @expense_types.post("/")
 def index(expense_type_inputs: ExpenseTypeList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = ExpenseTypeClass(db).get_all(expense_type_inputs.page)
+    data = ExpenseTypeClass(db).get_all(
+        expense_type_inputs.page,
+        exact_count=expense_type_inputs.exact_count,
+        cursor=expense_type_inputs.cursor,
+        limit=expense_type_inputs.limit,
+    )
 
     return {"message": data}
 
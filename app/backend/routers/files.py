@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
 from pathlib import Path
-import mimetypes
+
+from app.backend.classes.file_serve_class import FileServeClass
+from app.backend.classes.thumbnail_class import ThumbnailClass
 
 files = APIRouter(
     prefix="/files",
@@ -11,6 +13,12 @@ files = APIRouter(
 BASE_DIR = Path(__file__).resolve().parents[3]
 FILES_DIR = BASE_DIR / "files"
 FILES_DIR.mkdir(parents=True, exist_ok=True)
+file_serve = FileServeClass(FILES_DIR)
+thumbnails = ThumbnailClass(FILES_DIR)
+
+# Carpetas de files/ que no son adjuntos: los PDF de /reports/jobs (con su
+# propio control de dueño), la caché de reportes y los blobs.
+PRIVATE_DIRS = ("report_jobs", "report_cache", "blobs")
 
 def _safe_full_path(file_path: str) -> Path:
     rp = (file_path or "").replace("\\", "/").lstrip("/")
@@ -18,34 +26,43 @@ def _safe_full_path(file_path: str) -> Path:
     base = FILES_DIR.resolve(strict=False)
     if base != full_path and base not in full_path.parents:
         raise HTTPException(status_code=400, detail="Ruta de archivo inválida")
+    if full_path != base and full_path.relative_to(base).parts[0] in PRIVATE_DIRS:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
     return full_path
 
 @files.get("/download/{file_path:path}")
-def download_file(file_path: str):
+def download_file(file_path: str, request: Request):
     full_path = _safe_full_path(file_path)
-
-    if not full_path.exists() or not full_path.is_file():
-        raise HTTPException(status_code=404, detail="Archivo no encontrado")
-
-    return FileResponse(
-        path=full_path,
-        filename=full_path.name,
-        media_type="application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={full_path.name}"}
-    )
+    return file_serve.response(full_path, request, download=True, media_type="application/octet-stream")
 
 @files.get("/view/{file_path:path}")
-def view_file(file_path: str):
+def view_file(file_path: str, request: Request):
     """
-    Devuelve el archivo inline (útil para <img src="...">).
+    Devuelve el archivo inline (útil para <img src="...">). Con ETag /
+    Last-Modified el navegador revalida con un 304 en vez de bajarlo de nuevo.
     """
     full_path = _safe_full_path(file_path)
+    return file_serve.response(full_path, request)
 
-    if not full_path.exists() or not full_path.is_file():
+@files.get("/thumb/{size}/{file_path:path}")
+async def thumb_file(size: int, file_path: str, request: Request):
+    """
+    Miniatura WebP de una imagen o de la primera página de un PDF. Si la
+    subida todavía no la generó, se espera al pool de miniaturas sin ocupar
+    un thread de la API.
+    """
+    if size not in ThumbnailClass.SIZES:
+        raise HTTPException(status_code=400, detail=f"Tamaño inválido; usar uno de {', '.join(map(str, ThumbnailClass.SIZES))}")
+    full_path = _safe_full_path(file_path)
+    if not ThumbnailClass.supports(full_path):
+        raise HTTPException(status_code=404, detail="No hay miniatura para este tipo de archivo")
+    if not full_path.is_file():
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
 
-    media_type, _ = mimetypes.guess_type(str(full_path))
-    return FileResponse(
-        path=full_path,
-        media_type=media_type or "application/octet-stream",
-    )
+    try:
+        thumb = await thumbnails.get(full_path, size)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=f"No se pudo generar la miniatura: {e}")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Miniatura en proceso, reintentar", headers={"Retry-After": "5"})
+    return file_serve.response(thumb, request, media_type="image/webp")
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.backend.auth.auth_user import get_current_active_user
+from app.backend.classes.pool_metrics_class import PoolMetricsClass
+from app.backend.classes.query_metrics_class import query_metrics
+from app.backend.schemas import UserLogin
+
+internal = APIRouter(
+    prefix="/internal",
+    tags=["Internal"]
+)
+
+def get_admin_user(session_user: UserLogin = Depends(get_current_active_user)):
+    # SQL por ruta y estado de los pools: solo administradores (rol 1).
+    if getattr(session_user, "rol_id", None) != 1:
+        raise HTTPException(status_code=403, detail="Solo administradores")
+    return session_user
+
+@internal.get("/metrics")
+def metrics(reset: bool = False, session_user: UserLogin = Depends(get_admin_user)):
+    # Consultas SQL por ruta desde que arrancó este proceso (cada worker lleva las suyas).
+    data = query_metrics.snapshot()
+    if reset:
+        query_metrics.reset()
+
+    return {"message": data}
+
+@internal.get("/pools")
+def pools(reset: bool = False, session_user: UserLogin = Depends(get_admin_user)):
+    # Estado de los pools de conexiones de este worker (sync, reports y async si ya se usó).
+    data = PoolMetricsClass.snapshot_all()
+    if reset:
+        PoolMetricsClass.reset_all()
+
+    return {"message": data}
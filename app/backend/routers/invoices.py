@@ -1,16 +1,16 @@
 from datetime import datetime
 import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request
 from pathlib import Path
-import mimetypes
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.backend.auth.auth_user import get_current_active_user
+from app.backend.auth.auth_user import get_current_active_user, get_current_active_user_async
 from app.backend.classes.file_class import FileClass
+from app.backend.classes.file_serve_class import FileServeClass
 from app.backend.classes.invoice_class import InvoiceClass
-from app.backend.db.database import get_db
+from app.backend.db.database import get_async_db, get_db, run_sync_session
 from app.backend.db.models import InvoiceModel
 from app.backend.schemas import UserLogin, InvoiceList, InvoiceSearch, StoreInvoice, UpdateInvoice
 
@@ -22,6 +22,7 @@ invoices = APIRouter(
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 FILES_DIR = BASE_DIR / "files"
+file_serve = FileServeClass(FILES_DIR)
 
 def _safe_full_path(file_path: str) -> Path:
     rp = (file_path or "").replace("\\", "/").lstrip("/")
@@ -32,11 +33,20 @@ def _safe_full_path(file_path: str) -> Path:
     return full_path
 
 @invoices.post("/")
-def index(inputs: InvoiceList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = InvoiceClass(db).get_all(inputs.page)
+async def index(inputs: InvoiceList, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    def read(session):
+        return InvoiceClass(session).get_all(inputs.page, exact_count=inputs.exact_count, cursor=inputs.cursor, limit=inputs.limit)
+
+    if inputs.page > 0 or inputs.cursor is not None or inputs.limit is not None:
+        data = await db.run_sync(read)
+    else:
+        # Sin paginar devuelve todas las filas: fuera del event loop.
+        data = await run_sync_session(read)
     return {"message": data}
 
 
+# Listado completo y búsqueda sin paginar: sync (threadpool). Con run_sync
+# armarían y serializarían todo el resultado en el thread del event loop.
 @invoices.get("/list")
 def list_all(session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
     data = InvoiceClass(db).get_list()
@@ -65,7 +75,7 @@ def store(
         extension = f.filename.rsplit('.', 1)[-1].lower() if f.filename and '.' in f.filename else ''
         filename = f"invoice_{timestamp}_{unique_id}"
         remote_path = f"invoices/{filename}.{extension}" if extension else f"invoices/{filename}"
-        FileClass(db).upload(f, remote_path)
+        FileClass(db).upload_stream(f, remote_path, max_bytes=FileClass.upload_limit("invoices"))
         payload["file"] = remote_path
 
     data = InvoiceClass(db).store(payload)
@@ -95,7 +105,7 @@ def update(
         extension = f.filename.rsplit('.', 1)[-1].lower() if f.filename and '.' in f.filename else ''
         filename = f"invoice_{timestamp}_{unique_id}"
         remote_path = f"invoices/{filename}.{extension}" if extension else f"invoices/{filename}"
-        FileClass(db).upload(f, remote_path)
+        FileClass(db).upload_stream(f, remote_path, max_bytes=FileClass.upload_limit("invoices"))
         payload["file"] = remote_path
 
     data = InvoiceClass(db).update(id, payload)
@@ -118,26 +128,17 @@ def delete(id: int, session_user: UserLogin = Depends(get_current_active_user),
 
 
 @invoices.get("/edit/{id}")
-def edit(id: int, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = InvoiceClass(db).get(id)
+async def edit(id: int, session_user: UserLogin = Depends(get_current_active_user_async), db: AsyncSession = Depends(get_async_db)):
+    data = await db.run_sync(lambda session: InvoiceClass(session).get(id))
     return {"message": data}
 
 
 @invoices.get("/download/{id}")
-def download(id: int, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def download(id: int, request: Request, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
     inv = db.query(InvoiceModel).filter(InvoiceModel.id == id).first()
     if not inv or not inv.file:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
 
     full_path = _safe_full_path(inv.file)
-    if not full_path.exists() or not full_path.is_file():
-        raise HTTPException(status_code=404, detail="Archivo no encontrado")
-
-    media_type, _ = mimetypes.guess_type(str(full_path))
-    return FileResponse(
-        path=full_path,
-        filename=full_path.name,
-        media_type=media_type or "application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={full_path.name}"},
-    )
+    return file_serve.response(full_path, request, download=True, cache_control=FileServeClass.REVALIDATE)
 
@@ -1,18 +1,23 @@
+import json
 from datetime import datetime, time
-from typing import List
-
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import Response
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import re
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 
 
-from app.backend.auth.auth_user import get_current_active_user
-from app.backend.classes.file_class import FileClass
-from app.backend.db.database import get_db
-from app.backend.db.models import ExpenseReportModel, InvoiceModel, UserModel
-from app.backend.schemas import ReportGenerate
+from app.backend.auth.auth_user import get_current_active_user, get_current_active_user_async
+from app.backend.classes.daily_rollup_class import DailyRollupClass
+from app.backend.classes.expense_report_class import ExpenseReportClass
+from app.backend.classes.expense_report_pdf_class import ExpenseReportPdfClass
+from app.backend.classes.report_cache_class import ReportCacheClass
+from app.backend.classes.report_export_class import ReportExportClass
+from app.backend.classes.report_job_class import ReportJobClass
+from app.backend.db.database import get_async_db, get_db, ReportSessionLocal, run_sync_session
+from app.backend.db.models import UserModel
+from app.backend.schemas import ReportAttachments, ReportExpenseDetails, ReportExport, ReportGenerate, ReportTotalsSeries
 
 
 reports = APIRouter(
@@ -51,323 +56,45 @@ def _parse_date(value: str) -> datetime:
     raise ValueError("invalid date format")
 
 
-def _pdf_escape(text: str) -> str:
-    return (text or "").replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+def _range_from_filters(filters):
+    try:
+        since_dt = _parse_date(filters.since_date)
+        until_raw = filters.until_date or filters.end_date
+        end_dt = _parse_date(until_raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato inválido. Use YYYY-MM-DD o YYYY-MM-DD HH:MM:SS")
+
+    # end_date inclusivo (fin del día si viene sin hora)
+    if end_dt.time() == time.min and (until_raw or "").strip().count(":") == 0:
+        end_dt = datetime.combine(end_dt.date(), time.max)
 
+    if since_dt > end_dt:
+        raise HTTPException(status_code=400, detail="since_date no puede ser mayor que until_date")
 
-def _approx_text_width(text: str, font_size: int) -> float:
-    # Aproximación para Helvetica: ~0.5 * font_size por caracter
-    return max(0.0, len(text or "") * font_size * 0.5)
+    return since_dt, end_dt
 
 
-def _parse_amount(value) -> Decimal | None:
+def _stream_with_own_session(fn):
     """
-    Convierte montos guardados como string a número.
-
-    Soporta:
-    - "1234"
-    - "1,234.56"  (en-US)
-    - "1.234,56"  (es-CL)
-    - "$ 1.234" / "USD 1,234"
+    Chunks de fn(session) con una sesión propia del pool de reportes, cerrada
+    al terminar o si el cliente corta. La de Depends(get_db) no sirve para
+    StreamingResponse: se cierra antes de que termine el streaming.
     """
-    if value is None:
-        return None
-    s = str(value).strip()
-    if not s:
-        return None
-
-    # Dejar solo dígitos y separadores comunes
-    cleaned = re.sub(r"[^0-9\.,\-]", "", s)
-    if not cleaned or cleaned == "-" or cleaned == "," or cleaned == ".":
-        return None
-
-    # Si tiene ambos separadores, asumir miles/decimales según orden
-    if "," in cleaned and "." in cleaned:
-        if cleaned.rfind(",") > cleaned.rfind("."):
-            # "1.234,56" -> miles '.' y decimal ','
-            cleaned = cleaned.replace(".", "").replace(",", ".")
-        else:
-            # "1,234.56" -> miles ',' y decimal '.'
-            cleaned = cleaned.replace(",", "")
-    elif "," in cleaned:
-        # "1234,56" -> decimal ','
-        cleaned = cleaned.replace(",", ".")
-
+    db = ReportSessionLocal()
     try:
-        return Decimal(cleaned)
-    except (InvalidOperation, Exception):
-        return None
-
+        yield from fn(db)
+    finally:
+        db.close()
 
-def _format_currency(amount: Decimal) -> str:
-    # Sin redondeo: se imprime con todos los decimales que traiga el valor.
-    return f"$ {format(amount, ',f')}"
 
-
-def _build_expense_report_pdf(
-    since_dt: datetime,
-    end_dt: datetime,
-    rows: List[ExpenseReportModel],
-) -> bytes:
-    """
-    PDF (sin libs externas) con título centrado + tabla.
-    """
-    objects: List[bytes] = []
-
-    def add_obj(data: bytes) -> int:
-        objects.append(data)
-        return len(objects)  # 1-based obj number
-
-    # Fonts
-    font_regular = add_obj(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
-    font_bold = add_obj(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>")
-
-    # Layout constants
-    page_width = 612
-    page_height = 792
-    margin_x = 40
-
-    # Subir título/fecha/tabla (sin logo)
-    title_y = 740
-    range_y = 715
-    table_top = 685
-    header_h = 22
-    row_h = 18
-    table_width = page_width - (margin_x * 2)  # 532
-
-    # Columns
-    # Agregar columna Description en el PDF
-    col_date = 90
-    col_doc = 110
-    col_company = 150
-    col_amount = 92
-    col_desc = table_width - (col_date + col_doc + col_company + col_amount)
-
-    x0 = margin_x
-    x1 = x0 + col_date
-    x2 = x1 + col_doc
-    x3 = x2 + col_company
-    x4 = x3 + col_desc
-    x5 = x0 + table_width
-
-    title = "Expense Report"
-    title_size = 18
-    title_x = (page_width / 2.0) - (_approx_text_width(title, title_size) / 2.0)
-    title_x = max(margin_x, min(title_x, page_width - margin_x))
-
-    range_text = f"From: {since_dt.strftime('%Y-%m-%d %H:%M:%S')}    To: {end_dt.strftime('%Y-%m-%d %H:%M:%S')}"
-
-    # Prepare line strings
-    table_rows: List[List[str]] = []
-    total_amount = Decimal("0")
-    total_amount_has_value = False
-    for r in rows:
-        date_str = r.document_date.strftime("%Y-%m-%d") if r.document_date else ""
-        # En DB puede venir int (datos antiguos). Forzar a string siempre.
-        doc_str = str(r.document_number) if r.document_number is not None else ""
-        company = str(r.company) if r.company is not None else ""
-        desc = str(getattr(r, "description", "") or "")
-
-        amount_value = _parse_amount(r.amount)
-        if amount_value is not None:
-            total_amount += amount_value
-            total_amount_has_value = True
-            amount = _format_currency(amount_value)
-        else:
-            # fallback: mostrar con símbolo si viene texto
-            raw_amount = str(r.amount) if r.amount is not None else ""
-            raw_amount = raw_amount.strip()
-            amount = raw_amount
-            if amount and not amount.startswith("$"):
-                amount = f"$ {amount}"
-
-        # Truncar para la tabla
-        if len(doc_str) > 18:
-            doc_str = doc_str[:18] + "..."
-        if len(company) > 24:
-            company = company[:24] + "..."
-        if len(desc) > 28:
-            desc = desc[:28] + "..."
-        if len(amount) > 18:
-            amount = amount[:18] + "..."
-
-        table_rows.append([date_str, doc_str, company, desc, amount])
-
-    if not table_rows:
-        table_rows = [["", "", "(Sin resultados en el rango)", "", ""]]
-
-    # Pagination by rows available
-    # Compute rows per page (leave footer area)
-    # dejar espacio para TOTAL + footer
-    table_bottom_min = 110
-    usable_h = (table_top - table_bottom_min) - header_h
-    rows_per_page = max(1, int(usable_h // row_h))
-
-    page_objs: List[int] = []
-
-    for page_index in range(0, len(table_rows), rows_per_page):
-        chunk = table_rows[page_index : page_index + rows_per_page]
-        table_bottom = table_top - header_h - (len(chunk) * row_h)
-        is_last_page = (page_index + rows_per_page) >= len(table_rows)
-
-        cmds: List[str] = []
-
-        # Title (bold)
-        cmds.append("BT")
-        cmds.append(f"/F2 {title_size} Tf")
-        cmds.append(f"1 0 0 1 {title_x:.2f} {title_y} Tm")
-        t = _pdf_escape(title).encode("latin-1", errors="replace").decode("latin-1")
-        cmds.append(f"({t}) Tj")
-        cmds.append("ET")
-
-        # Date range (bold)
-        cmds.append("BT")
-        cmds.append("/F2 11 Tf")
-        cmds.append(f"1 0 0 1 {margin_x} {range_y} Tm")
-        rt = _pdf_escape(range_text).encode("latin-1", errors="replace").decode("latin-1")
-        cmds.append(f"({rt}) Tj")
-        cmds.append("ET")
-
-        # Header background
-        header_bottom = table_top - header_h
-        cmds.append("0.95 g")
-        cmds.append(f"{x0} {header_bottom} {table_width} {header_h} re f")
-        cmds.append("0 g")
-
-        # Grid lines
-        cmds.append("0 0 0 RG")
-        cmds.append("0.7 w")
-
-        # Outer border
-        cmds.append(f"{x0} {table_top} m {x5} {table_top} l S")
-        cmds.append(f"{x0} {table_bottom} m {x5} {table_bottom} l S")
-        cmds.append(f"{x0} {table_bottom} m {x0} {table_top} l S")
-        cmds.append(f"{x5} {table_bottom} m {x5} {table_top} l S")
-
-        # Vertical lines
-        cmds.append(f"{x1} {table_bottom} m {x1} {table_top} l S")
-        cmds.append(f"{x2} {table_bottom} m {x2} {table_top} l S")
-        cmds.append(f"{x3} {table_bottom} m {x3} {table_top} l S")
-        cmds.append(f"{x4} {table_bottom} m {x4} {table_top} l S")
-
-        # Header bottom line
-        cmds.append(f"{x0} {header_bottom} m {x5} {header_bottom} l S")
-
-        # Row lines
-        for i in range(1, len(chunk) + 1):
-            y = header_bottom - (i * row_h)
-            cmds.append(f"{x0} {y} m {x5} {y} l S")
-
-        # Header labels (bold)
-        cmds.append("BT")
-        cmds.append("/F2 10 Tf")
-        cmds.append(f"1 0 0 1 {x0 + 6} {table_top - 15} Tm (Date) Tj")
-        cmds.append(f"1 0 0 1 {x1 + 6} {table_top - 15} Tm (Document #) Tj")
-        cmds.append(f"1 0 0 1 {x2 + 6} {table_top - 15} Tm (Company) Tj")
-        cmds.append(f"1 0 0 1 {x3 + 6} {table_top - 15} Tm (Description) Tj")
-        cmds.append(f"1 0 0 1 {x4 + 6} {table_top - 15} Tm (Amount) Tj")
-        cmds.append("ET")
-
-        # Rows (regular)
-        cmds.append("BT")
-        cmds.append("/F1 10 Tf")
-        for i, (c_date, c_doc, c_company, c_desc, c_amount) in enumerate(chunk):
-            y_text = header_bottom - (i * row_h) - 13
-            c_date = _pdf_escape(c_date).encode("latin-1", errors="replace").decode("latin-1")
-            c_doc = _pdf_escape(c_doc).encode("latin-1", errors="replace").decode("latin-1")
-            c_company = _pdf_escape(c_company).encode("latin-1", errors="replace").decode("latin-1")
-            c_desc = _pdf_escape(c_desc).encode("latin-1", errors="replace").decode("latin-1")
-            c_amount = _pdf_escape(c_amount).encode("latin-1", errors="replace").decode("latin-1")
-
-            cmds.append(f"1 0 0 1 {x0 + 6} {y_text} Tm ({c_date}) Tj")
-            cmds.append(f"1 0 0 1 {x1 + 6} {y_text} Tm ({c_doc}) Tj")
-            cmds.append(f"1 0 0 1 {x2 + 6} {y_text} Tm ({c_company}) Tj")
-            cmds.append(f"1 0 0 1 {x3 + 6} {y_text} Tm ({c_desc}) Tj")
-            cmds.append(f"1 0 0 1 {x4 + 6} {y_text} Tm ({c_amount}) Tj")
-        cmds.append("ET")
-
-        # TOTAL (solo en la última página)
-        if is_last_page and total_amount_has_value:
-            total_text = f"TOTAL: {_format_currency(total_amount)}"
-            total_x = x5 - 6 - _approx_text_width(total_text, 12)
-            cmds.append("BT")
-            cmds.append("/F2 12 Tf")
-            cmds.append(f"1 0 0 1 {total_x:.2f} {table_bottom - 26} Tm ({_pdf_escape(total_text)}) Tj")
-            cmds.append("ET")
-
-        # Footer page number
-        page_num = (page_index // rows_per_page) + 1
-        total_pages = ((len(table_rows) - 1) // rows_per_page) + 1
-        footer = f"Página {page_num} de {total_pages}"
-        footer_x = page_width - margin_x - _approx_text_width(footer, 9)
-        cmds.append("BT")
-        cmds.append("/F1 9 Tf")
-        cmds.append(f"1 0 0 1 {footer_x:.2f} 40 Tm ({_pdf_escape(footer)}) Tj")
-        cmds.append("ET")
-
-        stream = ("\n".join(cmds)).encode("latin-1", errors="replace")
-        content_obj = add_obj(
-            b"<< /Length " + str(len(stream)).encode("ascii") + b" >>\nstream\n" + stream + b"\nendstream"
-        )
-
-        resources = (
-            b"<< /Font << /F1 "
-            + f"{font_regular} 0 R".encode("ascii")
-            + b" /F2 "
-            + f"{font_bold} 0 R".encode("ascii")
-            + b" >>"
-        )
-        resources += b" >>"
-
-        page_obj = add_obj(
-            b"<< /Type /Page /Parent 0 0 R /MediaBox [0 0 612 792] "
-            + b"/Resources "
-            + resources
-            + b" /Contents "
-            + f"{content_obj} 0 R".encode("ascii")
-            + b" >>"
-        )
-        page_objs.append(page_obj)
-
-    # Pages tree
-    kids = b" ".join([f"{n} 0 R".encode("ascii") for n in page_objs])
-    pages_obj = add_obj(b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(len(page_objs)).encode("ascii") + b" >>")
-
-    # Patch each page object to point to pages_obj as parent
-    for i, objn in enumerate(page_objs):
-        raw = objects[objn - 1]
-        objects[objn - 1] = raw.replace(b"/Parent 0 0 R", f"/Parent {pages_obj} 0 R".encode("ascii"))
-
-    # Catalog
-    catalog_obj = add_obj(b"<< /Type /Catalog /Pages " + f"{pages_obj} 0 R".encode("ascii") + b" >>")
-
-    # Write file
-    out = bytearray()
-    out.extend(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
-
-    xref_positions: List[int] = [0]
-    for idx, obj in enumerate(objects, start=1):
-        xref_positions.append(len(out))
-        out.extend(f"{idx} 0 obj\n".encode("ascii"))
-        out.extend(obj)
-        out.extend(b"\nendobj\n")
-
-    xref_start = len(out)
-    out.extend(f"xref\n0 {len(objects)+1}\n".encode("ascii"))
-    out.extend(b"0000000000 65535 f \n")
-    for pos in xref_positions[1:]:
-        out.extend(f"{pos:010d} 00000 n \n".encode("ascii"))
-
-    out.extend(
-        b"trailer\n<< /Size "
-        + str(len(objects) + 1).encode("ascii")
-        + b" /Root "
-        + f"{catalog_obj} 0 R".encode("ascii")
-        + b" >>\nstartxref\n"
-        + str(xref_start).encode("ascii")
-        + b"\n%%EOF\n"
-    )
-    return bytes(out)
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
 
 
 @reports.post("/generate")
@@ -375,105 +102,103 @@ def generate(
     filters: ReportGenerate,
     session_user: UserModel = Depends(get_current_active_user),
     db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
 ):
-    try:
-        since_dt = _parse_date(filters.since_date)
-        until_raw = filters.until_date or filters.end_date
-        end_dt = _parse_date(until_raw)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Formato inválido. Use YYYY-MM-DD o YYYY-MM-DD HH:MM:SS")
+    since_dt, end_dt = _range_from_filters(filters)
 
-    # end_date inclusivo (fin del día si viene sin hora)
-    if end_dt.time() == time.min and (until_raw or "").strip().count(":") == 0:
-        end_dt = datetime.combine(end_dt.date(), time.max)
+    compress = bool(filters.compress)
+    total_rows, last_updated = ExpenseReportClass(db).data_version(since_dt, end_dt)
+    filename = f"expense_reports_{since_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.pdf"
 
-    if since_dt > end_dt:
-        raise HTTPException(status_code=400, detail="since_date no puede ser mayor que until_date")
+    # Mismo rango + mismos datos => mismo PDF: la clave de caché sirve de ETag.
+    cache = ReportCacheClass()
+    key = cache.key("expense_reports", since_dt.isoformat(), end_dt.isoformat(), compress, total_rows, last_updated)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "ETag": f'"{key}"',
+        "Cache-Control": "private, no-cache",
+    }
 
-    rows = (
-        db.query(ExpenseReportModel)
-        .filter(ExpenseReportModel.document_date >= since_dt)
-        .filter(ExpenseReportModel.document_date <= end_dt)
-        # Orden ascendente por fecha de documento (NULL al final)
-        .order_by(
-            ExpenseReportModel.document_date.is_(None),
-            ExpenseReportModel.document_date.asc(),
-            ExpenseReportModel.id.asc(),
-        )
-        .all()
-    )
+    if _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers={k: headers[k] for k in ("ETag", "Cache-Control")})
 
-    pdf_bytes = _build_expense_report_pdf(since_dt, end_dt, rows)
-    filename = f"expense_reports_{since_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.pdf"
+    cached_path = cache.get(key)
+    if cached_path is not None:
+        return FileResponse(path=cached_path, media_type="application/pdf", headers=headers)
 
-    return Response(
-        content=pdf_bytes,
+    def _pdf(report_db):
+        rows = ExpenseReportClass(report_db).stream_range(since_dt, end_dt)
+        pdf = ExpenseReportPdfClass(since_dt, end_dt, total_rows, compress=compress).stream(rows)
+
+        def _is_current():
+            # Transacción nueva para ver lo escrito durante el streaming: si
+            # el rango cambió, el PDF no corresponde a key y no se guarda.
+            report_db.rollback()
+            return ExpenseReportClass(report_db).data_version(since_dt, end_dt) == (total_rows, last_updated)
+
+        return cache.store_stream(key, pdf, is_current=_is_current)
+
+    return StreamingResponse(
+        _stream_with_own_session(_pdf),
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        headers=headers,
     )
 
 
-@reports.post("/totals")
-def totals(
+@reports.post("/jobs")
+def store_job(
     filters: ReportGenerate,
     session_user: UserModel = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """
-    Totales por rango de fechas:
-    - invoices: filtra por invoice_date (DATE)
-    - expense_reports: filtra por document_date (DATETIME)
+    Encola la generación del PDF de /generate en el pool de workers.
+    Consultar el avance en GET /reports/jobs/{id}.
     """
-    try:
-        since_dt = _parse_date(filters.since_date)
-        until_raw = filters.until_date or filters.end_date
-        end_dt = _parse_date(until_raw)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Formato inválido. Use YYYY-MM-DD o YYYY-MM-DD HH:MM:SS")
+    since_dt, end_dt = _range_from_filters(filters)
 
-    # end_date inclusivo (fin del día si viene sin hora)
-    if end_dt.time() == time.min and (until_raw or "").strip().count(":") == 0:
-        end_dt = datetime.combine(end_dt.date(), time.max)
+    job = ReportJobClass(db).store(session_user.id, since_dt, end_dt, compress=bool(filters.compress))
+    return {"message": job}
 
-    if since_dt > end_dt:
-        raise HTTPException(status_code=400, detail="since_date no puede ser mayor que until_date")
 
-    def _sum_amounts(values) -> Decimal:
-        total = Decimal("0")
-        for v in values:
-            amt = _parse_amount(v)
-            if amt is not None:
-                total += amt
-        return total
-
-    # Invoices: invoice_date es DATE, filtrar por fechas (date <= date)
-    since_date_only = since_dt.date()
-    end_date_only = end_dt.date()
-    invoice_amounts = [
-        row[0]
-        for row in (
-            db.query(InvoiceModel.amount)
-            .filter(InvoiceModel.invoice_date.isnot(None))
-            .filter(InvoiceModel.invoice_date >= since_date_only)
-            .filter(InvoiceModel.invoice_date <= end_date_only)
-            .all()
-        )
-    ]
-
-    # Expense reports: document_date es DATETIME
-    expense_amounts = [
-        row[0]
-        for row in (
-            db.query(ExpenseReportModel.amount)
-            .filter(ExpenseReportModel.document_date >= since_dt)
-            .filter(ExpenseReportModel.document_date <= end_dt)
-            .all()
-        )
-    ]
+@reports.get("/jobs/{id}")
+async def show_job(
+    id: int,
+    session_user: UserModel = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    job = await db.run_sync(lambda session: ReportJobClass(session).get(id, session_user))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return {"message": job}
+
+
+@reports.get("/jobs/{id}/file")
+def download_job_file(
+    id: int,
+    session_user: UserModel = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    job, full_path = ReportJobClass(db).file_path(id, session_user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    if full_path is None:
+        raise HTTPException(status_code=409, detail=f"El reporte aún no está listo (estado: {job['status']})")
+    if not full_path.exists():
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    params = job["params"]
+    since_dt = datetime.fromisoformat(params["since_date"])
+    end_dt = datetime.fromisoformat(params["end_date"])
+    filename = f"expense_reports_{since_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.pdf"
+    return FileResponse(
+        path=full_path,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
-    invoices_total = _sum_amounts(invoice_amounts)
-    expense_reports_total = _sum_amounts(expense_amounts)
 
+def _totals_payload(invoices_total: Decimal, expense_reports_total: Decimal) -> dict:
     # Business rules (según definición actual):
     # - invoices_total se interpreta como monto con impuesto incluido.
     # - Net Total Invoice: invoices_total / 1.13
@@ -508,53 +233,157 @@ def totals(
     }
 
 
-@reports.post("/expense-details")
-def expense_details(
+@reports.post("/totals")
+async def totals(
     filters: ReportGenerate,
-    session_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    session_user: UserModel = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Detalle de gastos (expense_reports) por rango de fechas, sin paginación.
+    Totales por rango de fechas (desde daily_rollups):
+    - invoices: filtra por invoice_date (DATE)
+    - expense_reports: filtra por document_date (DATETIME)
     """
-    try:
-        since_dt = _parse_date(filters.since_date)
-        until_raw = filters.until_date or filters.end_date
-        end_dt = _parse_date(until_raw)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Formato inválido. Use YYYY-MM-DD o YYYY-MM-DD HH:MM:SS")
+    since_dt, end_dt = _range_from_filters(filters)
 
-    if end_dt.time() == time.min and (until_raw or "").strip().count(":") == 0:
-        end_dt = datetime.combine(end_dt.date(), time.max)
+    # Suma sobre daily_rollups (un registro por día) en vez de parsear cada documento.
+    rollup_totals = await db.run_sync(lambda session: DailyRollupClass(session).totals(since_dt, end_dt))
+    invoices_total = rollup_totals["invoices_total"]
+    expense_reports_total = rollup_totals["expense_reports_total"]
+
+    return _totals_payload(invoices_total, expense_reports_total)
+
+
+@reports.post("/totals/series")
+async def totals_series(
+    filters: ReportTotalsSeries,
+    session_user: UserModel = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Los mismos campos de /totals para cada período del rango (day/week/month/quarter/year),
+    con una sola consulta agrupada en vez de un /totals por período.
+    """
+    since_dt, end_dt = _range_from_filters(filters)
+    granularity = (filters.granularity or "").strip().lower()
+    if granularity not in DailyRollupClass.GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity inválida. Use: {', '.join(DailyRollupClass.GRANULARITIES)}")
+
+    buckets = await db.run_sync(lambda session: DailyRollupClass(session).series(since_dt, end_dt, granularity))
+    series = []
+    for bucket in buckets:
+        series.append({
+            "period_start": bucket["period_start"].strftime("%Y-%m-%d"),
+            "period_end": bucket["period_end"].strftime("%Y-%m-%d"),
+            **_totals_payload(bucket["invoices_total"], bucket["expense_reports_total"]),
+        })
+
+    return {"granularity": granularity, "series": series}
+
+
+EXPENSE_DETAILS_MAX_LIMIT = 1000
 
-    if since_dt > end_dt:
-        raise HTTPException(status_code=400, detail="since_date no puede ser mayor que until_date")
 
-    rows = (
-        db.query(ExpenseReportModel)
-        .filter(ExpenseReportModel.document_date >= since_dt)
-        .filter(ExpenseReportModel.document_date <= end_dt)
-        .order_by(
-            ExpenseReportModel.document_date.is_(None),
-            ExpenseReportModel.document_date.asc(),
-            ExpenseReportModel.id.asc(),
+@reports.post("/expense-details")
+async def expense_details(
+    filters: ReportExpenseDetails,
+    session_user: UserModel = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Detalle de gastos (expense_reports) por rango de fechas.
+    - Con limit y/o cursor: una página + next_cursor (keyset sobre document_date, id).
+    - Sin ellos: el rango completo, como antes.
+    """
+    since_dt, end_dt = _range_from_filters(filters)
+
+    if filters.limit is None and not filters.cursor:
+        # Rango completo: en el threadpool, con una sesión del pool de reportes.
+        data = await run_sync_session(
+            lambda session: list(ExpenseReportClass(session).details_stream(since_dt, end_dt)), ReportSessionLocal
         )
-        .all()
-    )
+        return {"message": data}
 
-    data = []
-    for idx, r in enumerate(rows, start=1):
-        data.append(
-            {
-                "index": idx,
-                "id": r.id,
-                "date": r.document_date.strftime("%Y-%m-%d") if r.document_date else None,
-                "detail": (r.description or r.company or "").strip(),
-                "file": r.file,
-                "file_url": FileClass(db).get(r.file) if r.file else None,
-                "amount": str(r.amount) if r.amount is not None else "",
-            }
+    limit = min(max(filters.limit or 100, 1), EXPENSE_DETAILS_MAX_LIMIT)
+    try:
+        data, next_cursor = await db.run_sync(
+            lambda session: ExpenseReportClass(session).details_page(since_dt, end_dt, cursor=filters.cursor, limit=limit)
         )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    return {"message": data, "next_cursor": next_cursor}
+
+
+@reports.post("/expense-details/stream")
+def expense_details_stream(
+    filters: ReportGenerate,
+    session_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Detalle de gastos como NDJSON (una fila JSON por línea), leído con un cursor
+    del lado servidor: no arma la lista completa en memoria.
+    """
+    since_dt, end_dt = _range_from_filters(filters)
 
-    return {"message": data}
+    def _ndjson(details_db):
+        for row in ExpenseReportClass(details_db).details_stream(since_dt, end_dt):
+            yield (json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8")
 
+    return StreamingResponse(_stream_with_own_session(_ndjson), media_type="application/x-ndjson")
+
+
+@reports.post("/export")
+def export(
+    filters: ReportExport,
+    session_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Exporta expenses / invoices / budgets / tax_returns del rango a CSV o XLSX, en streaming.
+    """
+    dataset = (filters.dataset or "").strip().lower()
+    fmt = (filters.format or "").strip().lower()
+    if dataset not in ReportExportClass.DATASETS:
+        raise HTTPException(status_code=400, detail=f"dataset inválido. Use: {', '.join(ReportExportClass.DATASETS)}")
+    if fmt not in ReportExportClass.FORMATS:
+        raise HTTPException(status_code=400, detail=f"format inválido. Use: {', '.join(ReportExportClass.FORMATS)}")
+
+    since_dt, end_dt = _range_from_filters(filters)
+    media_type, extension = ReportExportClass.FORMATS[fmt]
+    filename = f"{dataset}_{since_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.{extension}"
+
+    return StreamingResponse(
+        _stream_with_own_session(lambda export_db: ReportExportClass(export_db).stream(dataset, fmt, since_dt, end_dt)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@reports.post("/attachments")
+def attachments(
+    filters: ReportAttachments,
+    session_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    ZIP con los archivos adjuntos de los documentos del rango (por dataset) y
+    un manifest.csv por carpeta, en streaming: ni el ZIP ni los archivos se
+    cargan completos en memoria.
+    """
+    datasets = []
+    for dataset in filters.datasets or []:
+        dataset = (dataset or "").strip().lower()
+        if dataset not in ReportExportClass.DATASETS:
+            raise HTTPException(status_code=400, detail=f"dataset inválido. Use: {', '.join(ReportExportClass.DATASETS)}")
+        if dataset not in datasets:
+            datasets.append(dataset)
+    if not datasets:
+        raise HTTPException(status_code=400, detail=f"Indique al menos un dataset: {', '.join(ReportExportClass.DATASETS)}")
+
+    since_dt, end_dt = _range_from_filters(filters)
+    filename = f"attachments_{since_dt.strftime('%Y%m%d')}_{end_dt.strftime('%Y%m%d')}.zip"
+
+    return StreamingResponse(
+        _stream_with_own_session(lambda export_db: ReportExportClass(export_db).attachments_zip(datasets, since_dt, end_dt)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -12,7 +12,12 @@ supplier_categories = APIRouter(
 
 @supplier_categories.post("/")
 def index(supplier_category_inputs: SupplierCategoryList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = SupplierCategoryClass(db).get_all(supplier_category_inputs.page)
+    data = SupplierCategoryClass(db).get_all(
+        supplier_category_inputs.page,
+        exact_count=supplier_category_inputs.exact_count,
+        cursor=supplier_category_inputs.cursor,
+        limit=supplier_category_inputs.limit,
+    )
     return {"message": data}
 
 @supplier_categories.get("/list")
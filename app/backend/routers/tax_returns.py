@@ -1,15 +1,14 @@
 from datetime import datetime
 import uuid
 
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, Request
 from pathlib import Path
-import mimetypes
 from sqlalchemy.orm import Session
 
 from app.backend.auth.auth_user import get_current_active_user
 from app.backend.classes.tax_return_class import TaxReturnClass
 from app.backend.classes.file_class import FileClass
+from app.backend.classes.file_serve_class import FileServeClass
 from app.backend.db.database import get_db
 from app.backend.db.models import TaxReturnModel
 from app.backend.schemas import UserLogin, TaxReturnList, TaxReturnSearch, StoreTaxReturn, UpdateTaxReturn
@@ -22,6 +21,7 @@ tax_returns = APIRouter(
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 FILES_DIR = BASE_DIR / "files"
+file_serve = FileServeClass(FILES_DIR)
 
 
 def _safe_full_path(file_path: str) -> Path:
@@ -35,7 +35,7 @@ def _safe_full_path(file_path: str) -> Path:
 
 @tax_returns.post("/")
 def index(inputs: TaxReturnList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = TaxReturnClass(db).get_all(inputs.page)
+    data = TaxReturnClass(db).get_all(inputs.page, exact_count=inputs.exact_count, cursor=inputs.cursor, limit=inputs.limit)
     return {"message": data}
 
 
@@ -65,7 +65,7 @@ def store(
     extension = file.filename.rsplit('.', 1)[-1].lower() if file.filename and '.' in file.filename else ''
     filename = f"tax_return_{timestamp}_{unique_id}"
     remote_path = f"tax_returns/{filename}.{extension}" if extension else f"tax_returns/{filename}"
-    FileClass(db).upload(file, remote_path)
+    FileClass(db).upload_stream(file, remote_path, max_bytes=FileClass.upload_limit("tax_returns"))
     payload["file"] = remote_path
 
     data = TaxReturnClass(db).store(payload)
@@ -93,7 +93,7 @@ def update(
         extension = file.filename.rsplit('.', 1)[-1].lower() if file.filename and '.' in file.filename else ''
         filename = f"tax_return_{timestamp}_{unique_id}"
         remote_path = f"tax_returns/{filename}.{extension}" if extension else f"tax_returns/{filename}"
-        FileClass(db).upload(file, remote_path)
+        FileClass(db).upload_stream(file, remote_path, max_bytes=FileClass.upload_limit("tax_returns"))
         payload["file"] = remote_path
 
     data = TaxReturnClass(db).update(id, payload)
@@ -121,19 +121,10 @@ def edit(id: int, session_user: UserLogin = Depends(get_current_active_user), db
 
 
 @tax_returns.get("/download/{id}")
-def download(id: int, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
+def download(id: int, request: Request, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
     r = db.query(TaxReturnModel).filter(TaxReturnModel.id == id).first()
     if not r or not r.file:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
 
     full_path = _safe_full_path(r.file)
-    if not full_path.exists() or not full_path.is_file():
-        raise HTTPException(status_code=404, detail="Archivo no encontrado")
-
-    media_type, _ = mimetypes.guess_type(str(full_path))
-    return FileResponse(
-        path=full_path,
-        filename=full_path.name,
-        media_type=media_type or "application/octet-stream",
-        headers={"Content-Disposition": f"attachment; filename={full_path.name}"},
-    )
+    return file_serve.response(full_path, request, download=True, cache_control=FileServeClass.REVALIDATE)
@@ -12,7 +12,7 @@ users = APIRouter(
 
 @users.post("/")
 def index(user: UserList, session_user: UserLogin = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    data = UserClass(db).get_all(user.email, user.page)
+    data = UserClass(db).get_all(user.email, user.page, exact_count=user.exact_count, cursor=user.cursor, limit=user.limit)
 
     return {"message": data}
 
@@ -39,7 +39,10 @@ class UpdateUser(BaseModel):
 
 class UserList(BaseModel):
     email: Optional[str] = None
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class RecoverUser(BaseModel):
     email: str
@@ -80,12 +83,18 @@ class StoreCustomer(BaseModel):
     product_discounts: Optional[Dict[int, float]] = {}
 
 class CustomerList(BaseModel):
-    page: int
+    page: int = 0
     name: Optional[str] = None
     rut: Optional[str] = None
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class CategoryList(BaseModel):
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class InventoryList(BaseModel):
     page: int
@@ -109,7 +118,10 @@ class UpdateCategory(BaseModel):
     color: str
 
 class ExpenseTypeList(BaseModel):
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class StoreExpenseType(BaseModel):
     expense_type: str
@@ -118,7 +130,10 @@ class UpdateExpenseType(BaseModel):
     expense_type: str
 
 class ExpenseReportList(BaseModel):
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class ExpenseReportSearch(BaseModel):
     page: int = 0
@@ -132,6 +147,27 @@ class ReportGenerate(BaseModel):
     until_date: str
     # compatibilidad si algún cliente aún manda end_date
     end_date: Optional[str] = None
+    # /reports/generate: streams comprimidos (FlateDecode) y encabezado compartido
+    compress: Optional[bool] = True
+
+class ReportExpenseDetails(ReportGenerate):
+    # Paginación por cursor: sin limit/cursor se devuelve el rango completo (comportamiento anterior)
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+
+class ReportTotalsSeries(ReportGenerate):
+    # day | week | month | quarter | year
+    granularity: str = "month"
+
+class ReportExport(ReportGenerate):
+    # expenses | invoices | budgets | tax_returns
+    dataset: str = "expenses"
+    # csv | xlsx
+    format: str = "csv"
+
+class ReportAttachments(ReportGenerate):
+    # expenses | invoices | budgets | tax_returns
+    datasets: List[str] = ["expenses", "invoices"]
 
 class StoreExpenseReport(BaseModel):
     expense_type_id: int
@@ -192,7 +228,10 @@ class UpdateExpenseReport(BaseModel):
         )
 
 class InvoiceList(BaseModel):
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class InvoiceSearch(BaseModel):
     page: int = 0
@@ -251,7 +290,10 @@ class UpdateInvoice(BaseModel):
         )
 
 class BudgetList(BaseModel):
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class BudgetSearch(BaseModel):
     page: int = 0
@@ -305,7 +347,10 @@ class UpdateBudget(BaseModel):
 
 
 class TaxReturnList(BaseModel):
-    page: int
+    page: int = 0
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 
 class TaxReturnSearch(BaseModel):
@@ -461,6 +506,9 @@ class SupplierCategoryUpdate(BaseModel):
 
 class SupplierCategoryList(BaseModel):
     page: int = 1
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    exact_count: bool = True
 
 class SupplierCategoryResponse(BaseModel):
     id: int
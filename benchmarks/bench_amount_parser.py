@@ -0,0 +1,57 @@
+"""
+Benchmark del parseo de montos: AmountClass.parse fila a fila (suma en Decimal)
+vs AmountClass.parse_many / AmountClass.sum vectorizados.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_amount_parser.py [cantidad ...]
+"""
+import sys
+sys.path.append('.')
+
+import random
+import time
+from decimal import Decimal
+
+from app.backend.classes.amount_class import AmountClass
+
+
+def fake_amounts(n):
+    random.seed(n)
+    formats = [
+        lambda v: f"{v:,.2f}",                                              # 1,234.56
+        lambda v: f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", "."),  # 1.234,56
+        lambda v: f"$ {int(v):,}".replace(",", "."),                        # $ 1.234
+        lambda v: f"USD {v:,.2f}",                                         # USD 1,234.56
+        lambda v: str(int(v)),                                              # 1234
+        lambda v: "",
+    ]
+    return [random.choice(formats)(random.uniform(-1000, 10_000_000)) for _ in range(n)]
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def scalar_sum(values):
+    total = Decimal("0")
+    for v in values:
+        parsed = AmountClass.parse(v)
+        if parsed is not None:
+            total += parsed
+    return total
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [1_000, 100_000, 1_000_000]
+
+    print(f"{'valores':>9} {'parse':>8} {'parse_many':>11} {'sum esc.':>9} {'sum vect.':>10} {'iguales':>8}")
+    for n in sizes:
+        values = fake_amounts(n)
+        scalar, t_parse = timed(lambda: [AmountClass.parse(v) for v in values])
+        batch, t_many = timed(lambda: AmountClass.parse_many(values))
+        total_scalar, t_sum_scalar = timed(lambda: scalar_sum(values))
+        total_batch, t_sum_batch = timed(lambda: AmountClass.sum(values))
+        same = scalar == batch and total_scalar == total_batch
+        print(f"{n:>9} {t_parse:>8.3f} {t_many:>11.3f} {t_sum_scalar:>9.3f} {t_sum_batch:>10.3f} {str(same):>8}")
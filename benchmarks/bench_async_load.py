@@ -0,0 +1,148 @@
+"""
+Benchmark de carga: la misma lectura (GET /invoices/edit/{id}) servida con la
+ruta sync de antes (Session + threadpool) y con la ruta async actual
+(AsyncSession.run_sync), con 50/200/1000 clientes concurrentes.
+
+Corre contra una SQLite en archivo (pysqlite para sync, aiosqlite para async)
+con el mismo tamaño de pool en ambos engines. Cada sentencia espera --latency-ms
+dentro del driver para emular la ida y vuelta a MySQL por red; sin eso SQLite
+responde en microsegundos y no hay espera que el event loop pueda aprovechar.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_async_load.py [--rows N] [--requests N] [--pool N] [--latency-ms N]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import aiosqlite
+import httpx
+from fastapi import APIRouter, Depends
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+import app.backend.db.database as database
+from app.backend.auth.auth_user import get_current_active_user, get_current_active_user_async
+from app.backend.classes.invoice_class import InvoiceClass
+from app.backend.db.database import get_db
+from app.backend.db.models import InvoiceModel
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=5000)
+parser.add_argument("--requests", type=int, default=3000)
+parser.add_argument("--pool", type=int, default=20)
+parser.add_argument("--latency-ms", type=float, default=2.0)
+args = parser.parse_args()
+
+CONCURRENCY = [50, 200, 1000]
+
+# Ruta sync tal como estaba antes del engine async.
+legacy = APIRouter(prefix="/sync")
+
+
+@legacy.get("/invoices/edit/{id}")
+def legacy_edit(id: int, session_user=Depends(get_current_active_user), db: Session = Depends(get_db)):
+    data = InvoiceClass(db).get(id)
+    return {"message": data}
+
+
+def seed(path, rows):
+    engine = create_engine(f"sqlite:///{path}")
+    InvoiceModel.__table__.create(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(InvoiceModel.__table__.insert(), [
+            {"declared_status_id": 1, "invoice_number": i, "company": f"Company {i % 500}",
+             "amount": "1.000", "invoice_date": date(2024, 1, 1), "added_date": now, "updated_date": now}
+            for i in range(rows)
+        ])
+    engine.dispose()
+
+
+def engines(path, pool, latency):
+    def wait(statement):
+        time.sleep(latency)
+
+    def creator():
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.set_trace_callback(wait)
+        return conn
+
+    async def async_creator():
+        # aiosqlite corre cada conexión en su propio thread: la espera no bloquea el loop.
+        conn = await aiosqlite.connect(path)
+        await conn.set_trace_callback(wait)
+        return conn
+
+    options = {"pool_size": pool, "max_overflow": 0, "pool_timeout": 120}
+    sync_engine = create_engine(f"sqlite:///{path}", creator=creator, **options)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", async_creator=async_creator, **options)
+    return sync_engine, async_engine
+
+
+async def load(client, path, total, concurrency, rows):
+    latencies = []
+    pending = iter(range(total))
+
+    async def worker():
+        for i in pending:
+            start = time.perf_counter()
+            response = await client.get(path.format(id=i % rows + 1))
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    return total / elapsed, p95
+
+
+async def run(app, async_engine):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"filas={args.rows} requests={args.requests} pool={args.pool} latencia={args.latency_ms}ms/sentencia")
+        print(f"{'clientes':>8} {'sync req/s':>11} {'sync p95 ms':>12} {'async req/s':>12} {'async p95 ms':>13}")
+        for concurrency in CONCURRENCY:
+            sync_rps, sync_p95 = await load(client, "/sync/invoices/edit/{id}", args.requests, concurrency, args.rows)
+            async_rps, async_p95 = await load(client, "/invoices/edit/{id}", args.requests, concurrency, args.rows)
+            print(f"{concurrency:>8} {sync_rps:>11.0f} {sync_p95:>12.1f} {async_rps:>12.0f} {async_p95:>13.1f}")
+    # Cierra los threads de aiosqlite; si no, el intérprete no termina.
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed(path, args.rows)
+
+        sync_engine, async_engine = engines(path, args.pool, args.latency_ms / 1000)
+        database.SessionLocal.configure(bind=sync_engine)
+        database.async_engine = async_engine
+        database.AsyncSessionLocal.configure(bind=async_engine)
+
+        import main
+
+        principal = SimpleNamespace(id=1, rol_id=1, email="bench@example.com", full_name="Bench")
+
+        async def async_principal():
+            return principal
+
+        main.app.include_router(legacy)
+        main.app.dependency_overrides[get_current_active_user] = lambda: principal
+        main.app.dependency_overrides[get_current_active_user_async] = async_principal
+
+        asyncio.run(run(main.app, async_engine))
+
+        sync_engine.dispose()
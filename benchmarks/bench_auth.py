@@ -0,0 +1,64 @@
+"""
+Benchmark de la verificación del token por request: microsegundos por llamada
+decodificando el JWT en cada request (como antes) vs decode_token(), que
+verifica la firma una vez y luego sirve los claims desde token_cache.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_auth.py [--calls N]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import time
+from datetime import timedelta
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--calls", type=int, default=50000)
+args = parser.parse_args()
+
+os.environ.setdefault("SECRET_KEY", "7de4c36b48fce8dcb3a4bb527ba62d789ebf3d3a7582472ee49d430b01a7f868")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from jose import jwt
+
+from app.backend.auth.auth_user import decode_token, token_cache
+from app.backend.classes.authentication_class import AuthenticationClass
+
+
+def old_decode(token):
+    return jwt.decode(token, os.environ['SECRET_KEY'], algorithms=[os.environ['ALGORITHM']])
+
+
+def measure(fn, token, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(token)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    token = AuthenticationClass(None).create_token(
+        {"sub": "bench@example.com", "rol_id": 1},
+        timedelta(minutes=30),
+    )
+    assert old_decode(token) == decode_token(token)
+
+    token_cache.clear()
+    start = time.perf_counter()
+    decode_token(token)
+    miss = (time.perf_counter() - start) * 1e6
+
+    old = measure(old_decode, token, args.calls)
+    new = measure(decode_token, token, args.calls)
+
+    print(f"{'camino':<28} {'µs/llamada':>12}")
+    print(f"{'jwt.decode por request':<28} {old:>12.2f}")
+    print(f"{'decode_token (miss)':<28} {miss:>12.2f}")
+    print(f"{'decode_token (hit)':<28} {new:>12.2f}")
+    print(f"mejora: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark de login: logins por segundo (AuthenticationClass.authenticate_user
+sobre una SQLite sembrada) con distintos niveles de concurrencia, y cuántos
+pedidos rechaza el pool de bcrypt con 503 cuando se satura.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_login.py [concurrencia ...] [--rounds N] [--seconds S]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("levels", nargs="*", type=int, default=[1, 4, 16, 64])
+parser.add_argument("--rounds", type=int, default=10)
+parser.add_argument("--seconds", type=float, default=5)
+args = parser.parse_args()
+
+# Antes de importar la app: el pool lee la configuración al crearse.
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+os.environ.setdefault("BCRYPT_QUEUE_TIMEOUT_SECONDS", "1")
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.authentication_class import AuthenticationClass
+from app.backend.classes.password_hash_class import PasswordHashClass
+from app.backend.db.models import UserModel
+
+
+def run(Session, concurrency, seconds):
+    ok = rejected = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        nonlocal ok, rejected
+        db = Session()
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    AuthenticationClass(db).authenticate_user("bench@example.com", "secret")
+                    with lock:
+                        ok += 1
+                except HTTPException as e:
+                    if e.status_code != 503:
+                        raise
+                    with lock:
+                        rejected += 1
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return ok, rejected, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        UserModel.__table__.create(engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        db.add(UserModel(rol_id=1, full_name="Bench", email="bench@example.com", hashed_password=PasswordHashClass.hash("secret")))
+        db.commit()
+        db.close()
+
+        _, slots = PasswordHashClass._pool()
+        print(f"bcrypt rounds={args.rounds} workers={PasswordHashClass._executor._max_workers} "
+              f"capacidad (workers + cola)={slots._initial_value} CPUs={os.cpu_count()}")
+        print(f"{'concurrencia':>12} {'logins':>7} {'503':>5} {'logins/s':>9}")
+        for level in args.levels:
+            ok, rejected, elapsed = run(Session, level, args.seconds)
+            print(f"{level:>12} {ok:>7} {rejected:>5} {ok / elapsed:>9.1f}")
+        engine.dispose()
@@ -0,0 +1,116 @@
+"""
+Benchmark de la búsqueda del usuario en el login sobre una SQLite sembrada:
+camino anterior (UserClass.get -> json.loads + RolClass.get, dos consultas)
+vs UserClass.get_for_login (un join, registro tipado), y latencia completa
+de POST /authentications/login (p50/p95) con bcrypt de costo bajo para que
+domine la parte de base de datos.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_login_lookup.py [--users N] [--calls N] [--rounds N]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--users", type=int, default=10000)
+parser.add_argument("--calls", type=int, default=2000)
+parser.add_argument("--rounds", type=int, default=4)
+args = parser.parse_args()
+
+# Antes de importar la app: el pool lee la configuración al crearse.
+os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+os.environ.setdefault("SECRET_KEY", "7de4c36b48fce8dcb3a4bb527ba62d789ebf3d3a7582472ee49d430b01a7f868")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.password_hash_class import PasswordHashClass
+from app.backend.classes.rol_class import RolClass
+from app.backend.classes.user_class import UserClass
+from app.backend.db.database import get_db
+from app.backend.db.models import RolModel, UserModel
+from app.backend.routers.authentications import authentications
+
+
+def old_lookup(db, email):
+    user = json.loads(UserClass(db).get('email', email))
+    rol = RolClass(db).get('id', user["user_data"]["rol_id"])
+    return user["user_data"], rol.rol
+
+
+def new_lookup(db, email):
+    return UserClass(db).get_for_login(email).user
+
+
+def per_call(fn, db, emails):
+    start = time.perf_counter()
+    for email in emails:
+        fn(db, email)
+    return (time.perf_counter() - start) / len(emails) * 1e6
+
+
+def seed(engine, users):
+    RolModel.__table__.create(engine)
+    UserModel.__table__.create(engine)
+    password = PasswordHashClass.hash("secret")
+    with engine.begin() as conn:
+        conn.execute(RolModel.__table__.insert(), [{"id": i, "rol": f"rol {i}"} for i in range(1, 6)])
+        conn.execute(UserModel.__table__.insert(), [
+            {"rol_id": i % 5 + 1, "full_name": f"User {i}", "email": f"user{i}@example.com", "hashed_password": password}
+            for i in range(users)
+        ])
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False})
+        seed(engine, args.users)
+        Session = sessionmaker(bind=engine)
+        emails = [f"user{(i * 7919) % args.users}@example.com" for i in range(args.calls)]
+
+        db = Session()
+        try:
+            assert old_lookup(db, emails[0])[1] == new_lookup(db, emails[0]).rol
+            old = per_call(old_lookup, db, emails)
+            new = per_call(new_lookup, db, emails)
+        finally:
+            db.close()
+
+        print(f"usuarios={args.users} llamadas={args.calls}")
+        print(f"{'búsqueda':<34} {'µs/login':>10}")
+        print(f"{'get + json.loads + RolClass.get':<34} {old:>10.1f}")
+        print(f"{'get_for_login (join)':<34} {new:>10.1f}")
+        print(f"mejora: {old / new:.1f}x")
+
+        app = FastAPI()
+        app.include_router(authentications)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        client = TestClient(app)
+        latencies = []
+        for email in emails[:min(args.calls, 500)]:
+            start = time.perf_counter()
+            response = client.post("/authentications/login", data={"username": email, "password": "secret"})
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+        latencies.sort()
+        print(f"POST /authentications/login (bcrypt rounds={args.rounds}): "
+              f"p50={statistics.median(latencies):.2f} ms p95={latencies[int(len(latencies) * 0.95)]:.2f} ms")
+        engine.dispose()
@@ -0,0 +1,83 @@
+"""
+Benchmark de paginación sobre una SQLite sembrada: InvoiceClass.get_all por
+página (OFFSET + COUNT) vs por cursor (PaginationClass) a distintas
+profundidades, de la página 1 a la 10.000.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_pagination.py [--rows N] [--repeat N]
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.invoice_class import InvoiceClass
+from app.backend.classes.pagination_class import PaginationClass
+from app.backend.db.models import InvoiceModel
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=200000)
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+ITEMS_PER_PAGE = 10
+PAGES = [1, 10, 100, 1000, 10000]
+
+
+def seed(engine, rows):
+    InvoiceModel.__table__.create(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, rows, 50000):
+            conn.execute(InvoiceModel.__table__.insert(), [
+                {"declared_status_id": 1, "invoice_number": i, "company": f"Company {i % 500}",
+                 "amount": "1.000", "invoice_date": date(2024, 1, 1), "added_date": now, "updated_date": now}
+                for i in range(start, min(start + 50000, rows))
+            ])
+
+
+def ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, args.rows)
+        db = sessionmaker(bind=engine)()
+
+        print(f"filas={args.rows} items_per_page={ITEMS_PER_PAGE}")
+        print(f"{'página':>7} {'offset ms':>10} {'cursor ms':>10}")
+        for page in PAGES:
+            if (page - 1) * ITEMS_PER_PAGE >= args.rows:
+                break
+            offset_ms, by_page = ms(lambda: InvoiceClass(db).get_all(page, ITEMS_PER_PAGE), args.repeat)
+
+            # Cursor que deja en la misma página (el que habría devuelto la anterior).
+            cursor = None
+            if page > 1:
+                last_id = (
+                    db.query(InvoiceModel.id)
+                    .order_by(InvoiceModel.id.desc())
+                    .offset((page - 1) * ITEMS_PER_PAGE - 1)
+                    .limit(1)
+                    .scalar()
+                )
+                cursor = PaginationClass.encode_cursor([last_id])
+            cursor_ms, by_cursor = ms(lambda: InvoiceClass(db).get_all(cursor=cursor, limit=ITEMS_PER_PAGE), args.repeat)
+
+            assert [r["id"] for r in by_page["data"]] == [r["id"] for r in by_cursor["data"]]
+            print(f"{page:>7} {offset_ms:>10.2f} {cursor_ms:>10.2f}")
+
+        db.close()
+        engine.dispose()
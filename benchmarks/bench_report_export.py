@@ -0,0 +1,81 @@
+"""
+Benchmark de /reports/export: filas por segundo del pipeline completo
+(cursor de la DB -> CSV / XLSX en bloques) sobre una SQLite sembrada,
+y memoria máxima asignada durante la exportación.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_report_export.py [filas ...]
+"""
+import sys
+sys.path.append('.')
+
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.report_export_class import ReportExportClass
+from app.backend.db.models import ExpenseReportModel
+
+
+def seed(session, n):
+    start = datetime(2020, 1, 1)
+    batch = []
+    for i in range(n):
+        batch.append({
+            "user_id": 1,
+            "document_date": start + timedelta(minutes=i),
+            "document_number": 100000 + i,
+            "company": f"Supplier {i % 250}",
+            "description": f"Compra de materiales lote {i % 97}",
+            "amount": f"{(i * 37) % 100000:,}.{i % 100:02d}",
+            "amount_numeric": None if i % 10 == 0 else f"{(i * 37) % 100000}.{i % 100:02d}",
+            "file": f"expense_reports/expense_{i}.pdf",
+        })
+        if len(batch) == 10_000:
+            session.bulk_insert_mappings(ExpenseReportModel, batch)
+            batch = []
+    if batch:
+        session.bulk_insert_mappings(ExpenseReportModel, batch)
+    session.commit()
+
+
+def export(session, fmt):
+    size = 0
+    for chunk in ReportExportClass(session).stream("expenses", fmt, datetime(2000, 1, 1), datetime(2100, 1, 1)):
+        size += len(chunk)
+    return size
+
+
+def run(session, fmt):
+    t0 = time.perf_counter()
+    size = export(session, fmt)
+    elapsed = time.perf_counter() - t0
+
+    # Memoria en una pasada aparte: tracemalloc distorsiona el tiempo.
+    tracemalloc.start()
+    export(session, fmt)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 250_000]
+
+    print(f"{'filas':>8} {'formato':>7} {'bytes':>12} {'seg':>7} {'filas/s':>9} {'pico MB':>8}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            ExpenseReportModel.__table__.create(engine)
+            session = sessionmaker(bind=engine)()
+            seed(session, n)
+            for fmt in ("csv", "xlsx"):
+                size, elapsed, peak = run(session, fmt)
+                print(f"{n:>8} {fmt:>7} {size:>12,} {elapsed:>7.2f} {n / elapsed:>9,.0f} {peak / 1e6:>8.1f}")
+            session.close()
+            engine.dispose()
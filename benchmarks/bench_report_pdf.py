@@ -0,0 +1,48 @@
+"""
+Benchmark del PDF de /reports/generate: tamaño y tiempo de armado,
+modo sin comprimir vs compress=True (FlateDecode + Form XObjects).
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/bench_report_pdf.py [filas ...]
+"""
+import sys
+sys.path.append('.')
+
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.backend.classes.expense_report_pdf_class import ExpenseReportPdfClass
+
+
+def fake_rows(n):
+    start = datetime(2020, 1, 1)
+    for i in range(n):
+        yield SimpleNamespace(
+            document_date=start + timedelta(hours=i),
+            document_number=100000 + i,
+            company=f"Supplier {i % 250}",
+            description=f"Compra de materiales lote {i % 97}",
+            amount=f"{(i * 37) % 100000:,}.{i % 100:02d}",
+        )
+
+
+def run(n, compress):
+    since_dt, end_dt = datetime(2020, 1, 1), datetime(2030, 1, 1)
+    writer = ExpenseReportPdfClass(since_dt, end_dt, n, compress=compress)
+    size = 0
+    t0 = time.perf_counter()
+    for chunk in writer.stream(fake_rows(n)):
+        size += len(chunk)
+    return size, time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000]
+
+    print(f"{'filas':>8} {'modo':>12} {'bytes':>12} {'seg':>8} {'ratio':>7}")
+    for n in sizes:
+        plain_size, plain_t = run(n, compress=False)
+        flate_size, flate_t = run(n, compress=True)
+        print(f"{n:>8} {'sin comprimir':>12} {plain_size:>12,} {plain_t:>8.2f} {1:>7.2f}")
+        print(f"{n:>8} {'flate':>12} {flate_size:>12,} {flate_t:>8.2f} {flate_size / plain_size:>7.2f}")
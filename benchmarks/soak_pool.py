@@ -0,0 +1,193 @@
+"""
+Soak test de los pools de conexiones: carga sostenida sobre el pool sync con
+tantos threads como turnos de sesión da la API (40, acotado a la capacidad
+del pool como SYNC_DB_SLOTS en database.py) y reportes largos en paralelo,
+con más threads que conexiones, sobre el pool de reportes.
+
+Usa los mismos tamaños que la app (database.SYNC_POOL / REPORT_POOL según
+DB_MAX_CONNECTIONS y WEB_CONCURRENCY del entorno) contra una SQLite en archivo,
+con --latency-ms por sentencia para emular la red. Cada --drop-every segundos cierra por debajo
+las conexiones ociosas (como el wait_timeout de MySQL) para comprobar que
+pool_pre_ping las reemplaza sin que falle ningún request.
+
+Termina con código 1 si hubo timeouts del pool, errores o conexiones que no
+volvieron al pool.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/soak_pool.py [--seconds N] [--threads N] [--report-threads N]
+    WEB_CONCURRENCY=4 python benchmarks/soak_pool.py
+"""
+import sys
+sys.path.append('.')
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.invoice_class import InvoiceClass
+from app.backend.classes.pool_metrics_class import MeteredQueuePool, PoolMetricsClass
+from app.backend.db import database
+from app.backend.db.models import InvoiceModel
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--seconds", type=int, default=60)
+parser.add_argument("--threads", type=int, default=40)
+parser.add_argument("--report-threads", type=int, default=4)
+parser.add_argument("--rows", type=int, default=20000)
+parser.add_argument("--latency-ms", type=float, default=2.0)
+parser.add_argument("--think-ms", type=float, default=5.0)
+parser.add_argument("--drop-every", type=float, default=10.0)
+args = parser.parse_args()
+
+
+def seed(path, rows):
+    engine = create_engine(f"sqlite:///{path}")
+    InvoiceModel.__table__.create(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(InvoiceModel.__table__.insert(), [
+            {"declared_status_id": 1, "invoice_number": i, "company": f"Company {i % 500}",
+             "amount": "1.000", "invoice_date": date(2024, 1, 1), "added_date": now, "updated_date": now}
+            for i in range(rows)
+        ])
+    engine.dispose()
+
+
+def make_engine(path, name, options):
+    latency = args.latency_ms / 1000
+
+    def wait(statement):
+        time.sleep(latency)
+
+    def creator():
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.set_trace_callback(wait)
+        return conn
+
+    engine = create_engine(
+        f"sqlite:///{path}", creator=creator, poolclass=MeteredQueuePool, pool_logging_name=name, **options
+    )
+    PoolMetricsClass.register(name, engine)
+    return engine
+
+
+def drop_idle(engine):
+    # Cierra el socket (aquí, la conexión sqlite3) de las conexiones ociosas sin
+    # avisarle al pool. Con el mutex de la cola nadie puede sacarlas mientras tanto.
+    queue = engine.pool._pool
+    dropped = 0
+    with queue.mutex:
+        for record in queue.queue:
+            if record.dbapi_connection is not None:
+                record.dbapi_connection.close()
+                dropped += 1
+    return dropped
+
+
+if __name__ == "__main__":
+    sync_options = database.SYNC_POOL
+    report_options = database.REPORT_POOL
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "soak.db")
+        seed(path, args.rows)
+
+        sync_engine = make_engine(path, "soak-sync", sync_options)
+        report_engine = make_engine(path, "soak-reports", report_options)
+        SessionLocal = sessionmaker(bind=sync_engine)
+        ReportSessionLocal = sessionmaker(bind=report_engine)
+
+        stop = threading.Event()
+        counters = {"requests": 0, "reports": 0, "errors": 0, "dropped": 0}
+        lock = threading.Lock()
+
+        def count(key, n=1):
+            with lock:
+                counters[key] += n
+
+        def api_worker():
+            while not stop.is_set():
+                db = SessionLocal()
+                try:
+                    InvoiceClass(db).get(random.randint(1, args.rows))
+                    count("requests")
+                except Exception as e:
+                    count("errors")
+                    print(f"error api: {e!r}")
+                finally:
+                    db.close()
+                time.sleep(random.uniform(0, args.think_ms) / 1000)
+
+        def report_worker():
+            while not stop.is_set():
+                db = ReportSessionLocal()
+                try:
+                    # Recorre el rango completo retiniendo la conexión, como un export.
+                    for _ in db.query(InvoiceModel.id, InvoiceModel.amount).yield_per(1000):
+                        if stop.is_set():
+                            break
+                    count("reports")
+                except Exception as e:
+                    count("errors")
+                    print(f"error reportes: {e!r}")
+                finally:
+                    db.close()
+
+        api_threads = min(args.threads, sync_options["pool_size"] + sync_options["max_overflow"])
+        threads = [threading.Thread(target=api_worker) for _ in range(api_threads)]
+        threads += [threading.Thread(target=report_worker) for _ in range(args.report_threads)]
+
+        print(f"workers={database.WORKERS} conexiones/worker={database.CONNECTIONS_PER_WORKER}")
+        print(f"sync: {sync_options}")
+        print(f"reports: {report_options}")
+        print(f"threads api={api_threads} reportes={args.report_threads} latencia={args.latency_ms}ms/sentencia\n")
+        print(f"{'seg':>5} {'req/s':>7} {'sync out':>8} {'overflow':>8} {'avg wait':>9} {'max wait':>9} {'rep out':>7} {'timeouts':>8} {'errores':>7}")
+
+        for t in threads:
+            t.start()
+
+        start = last = time.monotonic()
+        last_requests = 0
+        last_drop = start
+        while time.monotonic() - start < args.seconds:
+            time.sleep(5)
+            now = time.monotonic()
+            if args.drop_every and now - last_drop >= args.drop_every:
+                count("dropped", drop_idle(sync_engine))
+                last_drop = now
+
+            sync, reports = PoolMetricsClass.get("soak-sync").snapshot(), PoolMetricsClass.get("soak-reports").snapshot()
+            rps = (counters["requests"] - last_requests) / (now - last)
+            last, last_requests = now, counters["requests"]
+            print(
+                f"{now - start:>5.0f} {rps:>7.0f} {sync['checked_out']:>8} {sync['overflow']:>8} "
+                f"{sync['avg_wait_ms']:>9.2f} {sync['max_wait_ms']:>9.2f} {reports['checked_out']:>7} "
+                f"{sync['timeouts'] + reports['timeouts']:>8} {counters['errors']:>7}"
+            )
+
+        stop.set()
+        for t in threads:
+            t.join()
+
+        sync, reports = PoolMetricsClass.get("soak-sync").snapshot(), PoolMetricsClass.get("soak-reports").snapshot()
+        print(f"\nrequests={counters['requests']} reportes={counters['reports']} errores={counters['errors']}")
+        print(f"conexiones cerradas por debajo={counters['dropped']} invalidadas por pre-ping={sync['invalidated']}")
+        print(f"sync: {sync}")
+        print(f"reports: {reports}")
+
+        leaked = sync["checked_out"] + reports["checked_out"]
+        timeouts = sync["timeouts"] + reports["timeouts"]
+        sync_engine.dispose()
+        report_engine.dispose()
+
+        ok = not (timeouts or counters["errors"] or leaked)
+        print("OK: sin agotamiento del pool" if ok else f"FALLA: timeouts={timeouts} errores={counters['errors']} sin devolver={leaked}")
+        sys.exit(0 if ok else 1)
@@ -19,6 +19,13 @@ from app.backend.routers.rols import rols
 from app.backend.routers.invoices import invoices
 from app.backend.routers.budgets import budgets
 from app.backend.routers.tax_returns import tax_returns
+from app.backend.routers.internal import internal
+from app.backend.classes.report_job_class import ReportJobClass
+from app.backend.auth.auth_user import load_jwt_settings
+from app.backend.classes.file_class import FileClass
+from app.backend.classes.query_metrics_class import QueryMetricsMiddleware
+from app.backend.classes.upload_limit_class import UploadLimitMiddleware
+from app.backend.db.database import SessionLocal
 
 app = FastAPI(root_path="/api")
 application = app
@@ -37,14 +44,28 @@ origins = [
     
 ]
 
+# Tamaño máximo del cuerpo en las rutas con archivos adjuntos (se agrega antes
+# que CORS para quedar por dentro: el 413 sale con los headers CORS).
+app.add_middleware(UploadLimitMiddleware, limits={
+    "/invoices": FileClass.upload_limit("invoices"),
+    "/expense_reports": FileClass.upload_limit("expense_reports"),
+    "/budgets": FileClass.upload_limit("budgets"),
+    "/tax-returns": FileClass.upload_limit("tax_returns"),
+})
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Para que el front pueda leer los X-DB-* en modo debug.
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-N-Plus-One"],
 )
 
+# Consultas SQL por request (headers X-DB-* con QUERY_METRICS_DEBUG=1 y /internal/metrics).
+app.add_middleware(QueryMetricsMiddleware)
+
 app.include_router(authentications)
 app.include_router(users)
 app.include_router(files)
@@ -61,6 +82,21 @@ app.include_router(rols)
 app.include_router(invoices)
 app.include_router(budgets)
 app.include_router(tax_returns)
+app.include_router(internal)
+
+@app.on_event("startup")
+def load_auth_settings():
+    # Clave/algoritmo JWT leídos una sola vez (falla al arrancar si no están definidos).
+    load_jwt_settings()
+
+@app.on_event("startup")
+def resume_report_jobs():
+    # Re-encolar los reportes en segundo plano que quedaron pendientes al reiniciar.
+    db = SessionLocal()
+    try:
+        ReportJobClass(db).resume()
+    finally:
+        db.close()
 
 if __name__ == "__main__":
     uvicorn.run("main:app", port=8000, reload=True)
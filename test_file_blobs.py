@@ -0,0 +1,134 @@
+import sys
+sys.path.append('.')
+
+import io
+import os
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.backend.classes.file_class import FileClass
+from app.backend.classes.thumbnail_class import ThumbnailClass
+from app.backend.db.models import FileBlobModel, FileRefModel
+
+
+# Conteo de referencias de los blobs (files/blobs) contra SQLite, con base_dir temporal.
+@pytest.fixture
+def files(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'blobs.db'}")
+    FileBlobModel.__table__.create(engine)
+    FileRefModel.__table__.create(engine)
+    db = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+
+    file_class = FileClass(db)
+    file_class.base_dir = tmp_path / "files"
+    file_class.blob_dir = file_class.base_dir / "blobs"
+    file_class.thumbnails = ThumbnailClass(file_class.base_dir)
+    file_class.base_dir.mkdir()
+    yield file_class
+    db.close()
+    engine.dispose()
+
+
+def _upload(files, remote_path, content):
+    return files.upload_stream(SimpleNamespace(file=io.BytesIO(content)), remote_path)
+
+
+def _ref_count(files, digest):
+    files.db.expire_all()
+    blob = files.db.get(FileBlobModel, digest)
+    return blob.ref_count if blob is not None else 0
+
+
+def test_duplicate_upload_bumps_ref_count(files):
+    first = _upload(files, "invoices/a.txt", b"same content")
+    second = _upload(files, "expense_reports/b.txt", b"same content")
+
+    assert first["sha256"] == second["sha256"]
+    assert _ref_count(files, first["sha256"]) == 2
+    blob_path = files._blob_path(first["sha256"])
+    assert os.path.samefile(blob_path, files.base_dir / "invoices/a.txt")
+    assert os.path.samefile(blob_path, files.base_dir / "expense_reports/b.txt")
+
+
+def test_same_path_twice_keeps_one_ref(files):
+    first = _upload(files, "invoices/a.txt", b"content")
+    _upload(files, "invoices/a.txt", b"content")
+
+    assert _ref_count(files, first["sha256"]) == 1
+
+
+def test_overwrite_releases_old_blob(files):
+    old = _upload(files, "invoices/a.txt", b"old content")
+    new = _upload(files, "invoices/a.txt", b"new content")
+
+    assert _ref_count(files, old["sha256"]) == 0
+    assert not files._blob_path(old["sha256"]).exists()
+    assert _ref_count(files, new["sha256"]) == 1
+    assert (files.base_dir / "invoices/a.txt").read_bytes() == b"new content"
+    assert files.db.get(FileRefModel, "invoices/a.txt").sha256 == new["sha256"]
+
+
+def test_overwrite_keeps_shared_blob(files):
+    shared = _upload(files, "invoices/a.txt", b"shared")
+    _upload(files, "invoices/b.txt", b"shared")
+    _upload(files, "invoices/a.txt", b"other")
+
+    assert _ref_count(files, shared["sha256"]) == 1
+    assert files._blob_path(shared["sha256"]).exists()
+
+
+def test_delete_unlinks_blob_at_zero(files):
+    stored = _upload(files, "invoices/a.txt", b"content")
+    _upload(files, "invoices/b.txt", b"content")
+    blob_path = files._blob_path(stored["sha256"])
+
+    files.delete("invoices/a.txt")
+    assert not (files.base_dir / "invoices/a.txt").exists()
+    assert blob_path.exists()
+    assert _ref_count(files, stored["sha256"]) == 1
+
+    files.delete("invoices/b.txt")
+    assert not blob_path.exists()
+    assert files.db.get(FileBlobModel, stored["sha256"]) is None
+    assert files.db.query(FileRefModel).count() == 0
+
+
+def test_upload_restores_missing_blob(files):
+    # Como si un delete concurrente hubiera dejado el blob en cero y borrado el archivo.
+    stored = _upload(files, "invoices/a.txt", b"content")
+    blob_path = files._blob_path(stored["sha256"])
+    blob_path.unlink()
+
+    _upload(files, "invoices/b.txt", b"content")
+    assert blob_path.read_bytes() == b"content"
+    assert os.path.samefile(blob_path, files.base_dir / "invoices/b.txt")
+    assert _ref_count(files, stored["sha256"]) == 2
+    assert not list(files.blob_dir.glob(".*.tmp"))
+
+
+def test_dedupe_is_idempotent(files):
+    invoices = files.base_dir / "invoices"
+    invoices.mkdir()
+    (invoices / "a.pdf").write_bytes(b"x" * 1000)
+    (invoices / "b.pdf").write_bytes(b"x" * 1000)
+    (invoices / "c.pdf").write_bytes(b"y" * 500)
+    (invoices / ".a.pdf.128.webp").write_bytes(b"derivative")
+
+    dry_run = files.dedupe(dry_run=True)
+    assert files.db.query(FileRefModel).count() == 0
+
+    stats = files.dedupe()
+    assert stats == dry_run
+    assert stats == {"files": 3, "blobs": 2, "duplicates": 1, "bytes_total": 2500, "bytes_reclaimed": 1000}
+    assert os.path.samefile(invoices / "a.pdf", invoices / "b.pdf")
+
+    digest = files.db.get(FileRefModel, "invoices/a.pdf").sha256
+    assert _ref_count(files, digest) == 2
+
+    again = files.dedupe()
+    assert again == {"files": 0, "blobs": 0, "duplicates": 0, "bytes_total": 0, "bytes_reclaimed": 0}
+    assert _ref_count(files, digest) == 2
+    assert files.db.query(FileRefModel).count() == 3
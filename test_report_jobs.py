@@ -0,0 +1,92 @@
+import sys
+sys.path.append('.')
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+
+from app.backend.classes.report_job_class import DONE, QUEUED, ReportJobClass
+from app.backend.db import database
+from app.backend.db.models import Base, ExpenseReportModel
+from app.backend.routers import files
+
+
+# Jobs de reportes contra SQLite en archivo, sin broker: el pool se reemplaza
+# por una llamada directa a run().
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(database.SessionLocal, "kw", {**database.SessionLocal.kw, "bind": engine})
+    monkeypatch.setattr(database.ReportSessionLocal, "kw", {**database.ReportSessionLocal.kw, "bind": engine})
+    monkeypatch.setattr(ReportJobClass, "submit", lambda self, job_id: None)
+
+    session = database.SessionLocal()
+    now = datetime.utcnow()
+    session.add_all([
+        ExpenseReportModel(id=i, user_id=1, expense_type_id=1, document_number=i, company=f"Company {i}",
+                           amount="10.50", document_date=datetime(2024, 1, 1 + i % 28), added_date=now, updated_date=now)
+        for i in range(1, 41)
+    ])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _jobs(db, tmp_path):
+    jobs = ReportJobClass(db)
+    jobs.base_dir = tmp_path / "report_jobs"
+    return jobs
+
+
+def test_store_run_file_path(db, tmp_path):
+    jobs = _jobs(db, tmp_path)
+    job = jobs.store(7, datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59, 59))
+    assert job["status"] == QUEUED
+
+    owner = SimpleNamespace(id=7, rol_id=2)
+    assert jobs.file_path(job["id"], owner)[1] is None
+
+    jobs.run(job["id"])
+
+    done, full_path = jobs.file_path(job["id"], owner)
+    assert done["status"] == DONE
+    assert done["total_rows"] == 40
+    assert done["rows_processed"] == 40
+    assert full_path.read_bytes().startswith(b"%PDF")
+    assert not list(full_path.parent.glob("*.tmp"))
+
+
+def test_file_path_checks_owner(db, tmp_path):
+    jobs = _jobs(db, tmp_path)
+    job = jobs.store(7, datetime(2024, 1, 1), datetime(2024, 1, 31))
+    jobs.run(job["id"])
+
+    assert jobs.file_path(job["id"], SimpleNamespace(id=8, rol_id=2)) == (None, None)
+    assert jobs.file_path(job["id"], SimpleNamespace(id=8, rol_id=1))[1] is not None
+
+
+def test_run_claims_once(db, tmp_path):
+    jobs = _jobs(db, tmp_path)
+    job = jobs.store(7, datetime(2024, 1, 1), datetime(2024, 1, 31))
+    jobs.run(job["id"])
+    finished = jobs.get(job["id"])["finished_date"]
+
+    jobs.run(job["id"])
+    assert jobs.get(job["id"])["finished_date"] == finished
+
+
+@pytest.mark.parametrize("path", [
+    "report_jobs/report_job_1.pdf",
+    "report_cache/abc.pdf",
+    "blobs/aa/bb/aabb",
+    "invoices/../report_jobs/report_job_1.pdf",
+])
+def test_files_router_hides_private_dirs(path):
+    with pytest.raises(HTTPException) as e:
+        files._safe_full_path(path)
+    assert e.value.status_code == 404